@@ -0,0 +1,241 @@
+# background_model.py
+"""
+Vectorized NumPy background model that can be saved before a match and
+restored at startup, so detection works from the first frame instead of
+after MOG2's warm-up (OpenCV cannot serialize MOG2 state).
+
+Drop-in for the MOG2 subtractor in RobotDetector: `apply(image, fgmask=...)`
+returns a 0/255 foreground mask.
+
+Methods:
+  - "average": exponential running average, bg += rate * (frame - bg)
+  - "median":  approximate running median, bg += step * sign(frame - bg);
+               robust to objects passing through, adapts at `step` levels/frame
+
+Capture a snapshot of the empty arena (use the CAMERA_FORMAT the robot runs
+with; a BGR snapshot is also converted to luma when loaded for luma frames):
+    python background_model.py --camera 0 --frames 150 --output arena_bg.npz
+    python background_model.py --pixel-format yuyv --output arena_bg.npz
+"""
+import argparse
+import time
+
+import numpy as np
+
+METHODS = ("average", "median")
+
+
+class NumpyBackgroundModel:
+    """
+    Per-pixel background estimate (float32, same shape as the frames).
+    A pixel is foreground when any channel differs from the background by
+    more than `threshold`.
+    """
+
+    def __init__(self, method="average", learning_rate=0.02, step=1.0, threshold=30,
+                 warmup_frames=30):
+        """
+        :param method: "average" or "median".
+        :param learning_rate: Running-average update rate per frame (0..1).
+        :param step: Running-median adjustment per frame, in intensity levels.
+        :param threshold: Per-channel difference (intensity levels) that counts as foreground.
+        :param warmup_frames: Without a snapshot, the first frames are learned at
+                              a faster 1/n rate so a cold start converges quickly.
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if not 0.0 <= learning_rate <= 1.0:
+            raise ValueError("learning_rate must be in [0, 1]")
+        self.method = method
+        self.learning_rate = learning_rate
+        self.step = step
+        self.threshold = threshold
+        self.warmup_frames = warmup_frames
+        self.background = None
+        self.frames = 0
+        # Restored snapshot as loaded; other sizes / formats are resampled from it
+        self._snapshot = None
+        self._diff = None
+        self._work = None
+        self._dist = None
+        self._fg = None
+
+    def reset(self):
+        self.background = None
+        self.frames = 0
+        self._snapshot = None
+
+    def warming_up(self):
+        """
+        True while the background is too fresh to trust: cold-started, or
+        resized from a learned (not restored) background, and still inside
+        the first `warmup_frames` frames.
+        """
+        return self.background is None or self.frames < self.warmup_frames
+
+    def _allocate(self, shape):
+        self._diff = np.empty(shape, dtype=np.float32)
+        self._work = np.empty(shape, dtype=np.float32)
+        self._dist = np.empty(shape[:2], dtype=np.float32)
+        self._fg = np.empty(shape[:2], dtype=bool)
+
+    def _fit_background(self, image):
+        """
+        Make the background match the frame size: start from the frame if
+        there is none, or adapt it to another size (resized) or to luma
+        frames (BGR converted to luma). A restored snapshot is always
+        resampled from the original, so scale changes back and forth do not
+        blur it; a learned background is resized and warms up again.
+        """
+        if self.background is None:
+            self.background = image.astype(np.float32)
+            self.frames = 0
+        elif self.background.shape != image.shape:
+            if self._snapshot is not None:
+                self.background = self._resample(self._snapshot, image.shape)
+            else:
+                self.background = self._resample(self.background, image.shape)
+                self.frames = 0
+        if self._diff is None or self._diff.shape != image.shape:
+            self._allocate(image.shape)
+
+    @staticmethod
+    def _resample(background, shape):
+        import cv2
+        if background.ndim != len(shape):
+            if background.ndim != 3 or background.shape[2] != 3:
+                raise ValueError(f"background {background.shape} does not match "
+                                 f"frames {shape}; capture the snapshot with "
+                                 f"the camera's pixel format")
+            # BT.601 luma, as in the camera's Y plane
+            background = cv2.cvtColor(background, cv2.COLOR_BGR2GRAY)
+        if background.shape != shape:
+            height, width = shape[:2]
+            background = cv2.resize(background, (width, height), interpolation=cv2.INTER_AREA)
+        return np.ascontiguousarray(background.reshape(shape), dtype=np.float32)
+
+    def apply(self, image, fgmask=None, learningRate=-1):
+        """
+        Foreground mask (uint8, 0/255) for `image`, then update the model.
+        :param fgmask: Optional output array of shape image.shape[:2].
+        :param learningRate: Overrides the update rate (average) or step
+                             (median) for this frame; negative = default, 0 = frozen.
+        """
+        self._fit_background(image)
+        diff, work, dist, fg = self._diff, self._work, self._dist, self._fg
+        if fgmask is None:
+            fgmask = np.empty(image.shape[:2], dtype=np.uint8)
+
+        np.subtract(image, self.background, out=diff, dtype=np.float32)
+        np.abs(diff, out=work)
+        if work.ndim == 3:
+            # Channel-wise maximum; np.max(axis=2) over interleaved channels is ~30x slower
+            np.maximum(work[..., 0], work[..., 1], out=dist)
+            for c in range(2, work.shape[2]):
+                np.maximum(dist, work[..., c], out=dist)
+        else:
+            dist[...] = work
+        np.greater(dist, self.threshold, out=fg)
+        np.multiply(fg.view(np.uint8), 255, out=fgmask)
+
+        self.frames += 1
+        if self.method == "average":
+            rate = self.learning_rate if learningRate < 0 else learningRate
+            if learningRate < 0 and self.frames <= self.warmup_frames:
+                rate = max(rate, 1.0 / self.frames)
+            if rate > 0:
+                np.multiply(diff, rate, out=work)
+                self.background += work
+        else:
+            step = self.step if learningRate < 0 else learningRate
+            if learningRate < 0 and self.frames <= self.warmup_frames:
+                # Converge faster from a cold start
+                step *= 4
+            if step > 0:
+                np.sign(diff, out=work)
+                work *= step
+                self.background += work
+        return fgmask
+
+    def getBackgroundImage(self):
+        if self.background is None:
+            return None
+        return np.clip(self.background, 0, 255).astype(np.uint8)
+
+    def save(self, path):
+        """
+        Write the background and settings to an .npz snapshot.
+        """
+        if self.background is None:
+            raise RuntimeError("No background to save; apply() some frames first.")
+        np.savez(path, background=self.background, method=self.method,
+                 learning_rate=self.learning_rate, step=self.step,
+                 threshold=self.threshold, frames=self.frames)
+
+    def load(self, path):
+        """
+        Restore a snapshot written by save(). The settings passed to the
+        constructor are kept; only the background is replaced.
+        """
+        with np.load(path) as data:
+            self.background = data["background"].astype(np.float32)
+            self.frames = int(data["frames"])
+        self._snapshot = self.background.copy()
+        # Snapshot is already converged: skip the cold-start warm-up
+        self.frames = max(self.frames, self.warmup_frames)
+        self._diff = None
+        return self
+
+    @classmethod
+    def from_snapshot(cls, path, **kwargs):
+        """
+        New model restored from `path`; keyword arguments default to the
+        settings stored in the snapshot.
+        """
+        with np.load(path) as data:
+            settings = dict(method=str(data["method"]),
+                            learning_rate=float(data["learning_rate"]),
+                            step=float(data["step"]), threshold=float(data["threshold"]))
+        settings.update(kwargs)
+        return cls(**settings).load(path)
+
+
+def capture_snapshot(camera, output, frames=150, method="average", settle=0.0):
+    """
+    Learn the background from `frames` camera frames and save it to `output`.
+    """
+    model = NumpyBackgroundModel(method=method, warmup_frames=frames)
+    if settle:
+        time.sleep(settle)
+    for _ in range(frames):
+        model.apply(camera.get_frame())
+    model.save(output)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture a background snapshot of the empty arena.")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--method", choices=METHODS, default="average")
+    parser.add_argument("--pixel-format", default="bgr",
+                        help="camera pixel format, as CAMERA_FORMAT in main.py "
+                             "(bgr, yuyv, yuv420, mjpeg)")
+    parser.add_argument("--output", default="arena_bg.npz")
+    args = parser.parse_args()
+
+    from camera_module import CameraModule
+    camera = CameraModule(camera_index=args.camera, width=args.width, height=args.height,
+                          pixel_format=args.pixel_format)
+    try:
+        capture_snapshot(camera, args.output, frames=args.frames, method=args.method,
+                         settle=1.0)
+    finally:
+        camera.release()
+    print(f"Saved background snapshot to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
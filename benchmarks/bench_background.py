@@ -0,0 +1,135 @@
+"""
+Background model benchmark: OpenCV MOG2 against background_model.NumpyBackgroundModel.
+
+For each model reports the mean apply() time per frame and the warm-up: the
+first frame from which the foreground mask matches the ground-truth robot
+mask (F1 >= --min-f1) for --stable consecutive frames. The NumPy models are
+measured both cold and restored from a snapshot of empty-arena frames.
+
+Frames are a disc moving over a static textured background with per-frame
+sensor noise, so MOG2 has to learn the noise as well.
+
+Usage:
+    python benchmarks/bench_background.py [--frames 300] [--width 640 --height 480]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import common  # noqa: F401  (repo import path)
+from background_model import NumpyBackgroundModel
+
+
+def noisy_scene(count, width, height, noise=4.0, seed=0):
+    """
+    Returns (empty_frames, frames, truth): empty-arena frames for the
+    snapshot, frames with the moving disc, and the disc's boolean masks.
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8).astype(np.int16)
+    # A small pool of noise fields keeps memory bounded for long runs
+    pool = [rng.normal(0.0, noise, (height, width, 3)).astype(np.int16) for _ in range(16)]
+
+    def noisy(image, i):
+        return np.clip(image + pool[i % len(pool)], 0, 255).astype(np.uint8)
+
+    radius = max(4, width // 21)
+    margin = 3 * radius
+    empty, frames, truth = [], [], []
+    for i in range(60):
+        empty.append(noisy(background, i + 7))
+    for i in range(count):
+        x = margin + (i * max(1, width // 160)) % max(1, width - 2 * margin)
+        y = int(height / 2 + height / 8 * np.sin(i / 15.0))
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.circle(mask, (x, y), radius, 255, -1)
+        frame = background.copy()
+        frame[mask > 0] = (200, 50, 50)
+        frames.append(noisy(frame, i))
+        truth.append(mask > 0)
+    return empty, frames, truth
+
+
+def f1_score(mask, truth):
+    fg = mask > 127
+    tp = np.count_nonzero(fg & truth)
+    if tp == 0:
+        return 0.0
+    precision = tp / np.count_nonzero(fg)
+    recall = tp / np.count_nonzero(truth)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_model(model, frames, truth, min_f1, stable):
+    height, width = frames[0].shape[:2]
+    fgmask = np.empty((height, width), dtype=np.uint8)
+    elapsed = 0.0
+    scores = []
+    for frame, target in zip(frames, truth):
+        t0 = time.perf_counter()
+        model.apply(frame, fgmask=fgmask)
+        elapsed += time.perf_counter() - t0
+        scores.append(f1_score(fgmask, target))
+
+    warmup = None
+    run = 0
+    for i, score in enumerate(scores):
+        run = run + 1 if score >= min_f1 else 0
+        if run >= stable:
+            warmup = i - stable + 1
+            break
+    return elapsed / len(frames), warmup, float(np.mean(scores[-stable:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--noise", type=float, default=4.0, help="sensor noise sigma")
+    parser.add_argument("--min-f1", type=float, default=0.8)
+    parser.add_argument("--stable", type=int, default=10)
+    args = parser.parse_args()
+
+    empty, frames, truth = noisy_scene(args.frames, args.width, args.height, args.noise)
+    snapshots = {}
+    tmpdir = tempfile.mkdtemp()
+    for method in ("average", "median"):
+        path = os.path.join(tmpdir, f"{method}.npz")
+        model = NumpyBackgroundModel(method=method, warmup_frames=len(empty))
+        for frame in empty:
+            model.apply(frame)
+        model.save(path)
+        snapshots[method] = path
+
+    models = [
+        ("mog2 (cold)", lambda: cv2.createBackgroundSubtractorMOG2(
+            history=500, varThreshold=16, detectShadows=True)),
+        ("numpy average (cold)", lambda: NumpyBackgroundModel("average")),
+        ("numpy median (cold)", lambda: NumpyBackgroundModel("median")),
+        ("numpy average (snapshot)",
+         lambda: NumpyBackgroundModel.from_snapshot(snapshots["average"])),
+        ("numpy median (snapshot)",
+         lambda: NumpyBackgroundModel.from_snapshot(snapshots["median"])),
+    ]
+
+    print(f"{args.frames} frames at {args.width}x{args.height}, noise sigma {args.noise}; "
+          f"warm-up = first frame of {args.stable} with F1 >= {args.min_f1}")
+    print(f"{'model':28s} {'ms/frame':>9s} {'warm-up':>9s} {'final F1':>9s}")
+    for name, factory in models:
+        per_frame, warmup, final = run_model(factory(), frames, truth, args.min_f1, args.stable)
+        warm = "never" if warmup is None else f"{warmup} fr"
+        print(f"{name:28s} {per_frame * 1e3:9.3f} {warm:>9s} {final:9.3f}")
+
+    for path in snapshots.values():
+        os.remove(path)
+    os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
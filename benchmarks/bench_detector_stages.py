@@ -0,0 +1,120 @@
+"""
+Per-stage timing benchmark for RobotDetector.detect_robot.
+
+Runs the detector's pipeline stages one by one on synthetic 640x480 frames
+(a disc moving over a noisy static background) and reports the mean time of
+each stage, next to the original allocating implementation of the same
+stages. Also reports NumPy bytes allocated per detect_robot() call.
+
+Usage:
+    python benchmarks/bench_detector_stages.py [--frames 300] [--color]
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from common import synthetic_frames
+from robot_detection import RobotDetector
+
+
+def legacy_stages(detector, frame, fg_mask, min_area):
+    """
+    The original allocating pipeline, split into the same stages.
+    """
+    t0 = time.perf_counter()
+    if detector.use_color_filter:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        color_mask = cv2.inRange(hsv, detector.lower_color, detector.upper_color)
+    else:
+        color_mask = np.ones(frame.shape[:2], dtype=np.uint8) * 255
+    _, mask = cv2.threshold(fg_mask, 127, 255, cv2.THRESH_BINARY)
+    mask = cv2.bitwise_and(color_mask, mask)
+    t1 = time.perf_counter()
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, detector.kernel, iterations=2)
+    mask = cv2.erode(mask, detector.kernel, iterations=1)
+    mask = cv2.dilate(mask, detector.kernel, iterations=2)
+    t2 = time.perf_counter()
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    best = None
+    best_area = 0
+    for c in contours:
+        area = cv2.contourArea(c)
+        if area >= min_area and area > best_area:
+            best_area = area
+            best = c
+    if best is not None:
+        cv2.boundingRect(best)
+    t3 = time.perf_counter()
+    return t1 - t0, t2 - t1, t3 - t2
+
+
+def current_stages(detector, frame, fg_mask, min_area):
+    t0 = time.perf_counter()
+    mask = detector._foreground(frame, fg_mask)
+    t1 = time.perf_counter()
+    mask = detector._morphology(mask)
+    t2 = time.perf_counter()
+    detector._largest_blob(mask, min_area)
+    t3 = time.perf_counter()
+    return t1 - t0, t2 - t1, t3 - t2
+
+
+def run_stages(frames, stage_fn, **kwargs):
+    detector = RobotDetector(**kwargs)
+    min_area = detector.effective_min_area()
+    totals = np.zeros(4)
+    for frame in frames:
+        t0 = time.perf_counter()
+        fg_mask = detector.bg_subtractor.apply(frame)
+        totals[0] += time.perf_counter() - t0
+        totals[1:] += stage_fn(detector, frame, fg_mask, min_area)
+    return totals / len(frames) * 1e3
+
+
+def allocated_per_call(frames, **kwargs):
+    detector = RobotDetector(**kwargs)
+    for frame in frames[:10]:
+        detector.detect_robot(frame)
+    total = 0
+    tracemalloc.start()
+    for frame in frames[10:]:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        detector.detect_robot(frame)
+        total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return total / (len(frames) - 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--color", action="store_true", help="enable the HSV color filter")
+    args = parser.parse_args()
+
+    kwargs = {}
+    if args.color:
+        kwargs = dict(use_color_filter=True, lower_color=(100, 0, 0), upper_color=(140, 255, 255))
+
+    frames = synthetic_frames(args.frames)
+    stages = ("mog2", "foreground", "morphology", "blob")
+    rows = [
+        ("legacy", run_stages(frames, legacy_stages, **kwargs)),
+        ("contours", run_stages(frames, current_stages, blob_method="contours", **kwargs)),
+        ("components", run_stages(frames, current_stages, blob_method="components", **kwargs)),
+    ]
+
+    print(f"{'ms/frame':12s}" + "".join(f"{s:>12s}" for s in stages) + f"{'total':>12s}")
+    for label, times in rows:
+        print(f"{label:12s}" + "".join(f"{t:12.3f}" for t in times) + f"{times.sum():12.3f}")
+
+    print(f"\nNumPy bytes allocated per detect_robot(): "
+          f"{allocated_per_call(frames, **kwargs):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: NumPy bytes allocated per captured frame, with and without
+the CameraModule frame pool.
+
+Writes a short synthetic MJPG clip to a temp dir and reads it back through
+CameraModule, so the real cv2.VideoCapture decode path is exercised without
+a camera. Allocations are measured with tracemalloc, which sees NumPy array
+data (OpenCV hands its output frames to NumPy's allocator).
+
+Usage:
+    python benchmarks/bench_frame_alloc.py [--frames 200]
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import common  # noqa: F401  (repo import path)
+from camera_module import CameraModule
+
+
+def write_clip(path, frames, width=640, height=480):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for i in range(frames):
+        frame[:] = 0
+        cv2.circle(frame, (40 + (i * 3) % (width - 80), height // 2), 30, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def measure(clip, frames, pool_size):
+    camera = CameraModule(clip, pool_size=pool_size)
+    try:
+        # Warm up decoder and pool before measuring
+        for _ in range(5):
+            camera.get_frame()
+
+        frame_nbytes = 0
+        total = 0
+        tracemalloc.start()
+        for _ in range(frames):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            frame = camera.get_frame()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - base
+            frame_nbytes = frame.nbytes
+        tracemalloc.stop()
+    finally:
+        camera.release()
+
+    per_frame = total / frames
+    return per_frame, per_frame / frame_nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, "clip.avi")
+        write_clip(clip, args.frames + 10)
+
+        for label, pool_size in (("plain read()", 0), ("frame pool", 3)):
+            per_frame, frame_allocs = measure(clip, args.frames, pool_size)
+            print(f"{label:14s}: {per_frame:10.0f} bytes/frame "
+                  f"(~{frame_allocs:.2f} frame-sized allocations/frame)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Frame-source backends behind CameraModule, without a camera: delivered fps
+and per-frame latency of each backend, plus a check that its frames are right.
+
+  synthetic   frame_sources.SyntheticSource paced to --fps
+  file        a .npy stack of synthetic frames, paced to --fps
+  opencv      cv2.VideoCapture on an MJPG .avi of the same frames
+  picamera2   Picamera2Source on sim_hardware's fake picamera2 (RGB888 and
+              YUV420), checking that every camera request is handed back
+
+Each runs synchronously, threaded, and threaded with a frame pool.
+Exits with status 1 if any check fails.
+
+Usage:
+    python benchmarks/bench_frame_sources.py [--frames 120] [--fps 60]
+        [--width 640 --height 480]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from common import synthetic_frames
+import sim_hardware
+from camera_module import CameraModule, LumaFrame
+from frame_sources import FileSource, OpenCVSource, Picamera2Source, SyntheticSource
+
+MODES = (
+    ("sync", dict()),
+    ("threaded", dict(threaded=True)),
+    ("threaded+pool", dict(threaded=True, pool_size=4)),
+)
+
+
+def check_frame(frame, reference, centres, exact):
+    """
+    The disc (blue > 150 on a darker background) must sit on one of the
+    reference centres; exact backends must also match that frame bit for bit.
+    """
+    ys, xs = np.nonzero(frame[:, :, 0] > 150)
+    if len(xs) == 0:
+        return False
+    cx, cy = xs.mean(), ys.mean()
+    distances = [np.hypot(cx - x, cy - y) for x, y in centres]
+    index = int(np.argmin(distances))
+    if distances[index] > 1.5:
+        return False
+    return not exact or any(np.array_equal(frame, reference[i])
+                            for i in range(len(centres)) if distances[i] <= 1.5)
+
+
+def run(name, make_source, count, reference, exact, **camera_kwargs):
+    """
+    Read `count` new frames (waiting for each) and check every one.
+    """
+    centres = [SyntheticSource(reference[0].shape[1], reference[0].shape[0]).centre(i)
+               for i in range(len(reference))]
+    source = make_source()
+    camera = CameraModule(source=source, pixel_format=source.pixel_format, **camera_kwargs)
+    ok = True
+    last_seq = -1
+    try:
+        for _ in range(count):
+            frame, _, seq = camera.get_frame_info()
+            while seq == last_seq:
+                time.sleep(0.001)
+                frame, _, seq = camera.get_frame_info()
+            last_seq = seq
+            if isinstance(frame, LumaFrame):
+                frame = frame.bgr()
+            ok &= check_frame(frame, reference, centres, exact)
+    finally:
+        camera.release()
+    print(f"{name:34s} {source.stats.summary()}  frames ok: {ok}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+    width, height, count = args.width, args.height, args.frames
+
+    # One full cycle of the disc's path, so looping sources stay on it
+    frames = synthetic_frames(max(count, 480), width, height)
+    tmp = tempfile.mkdtemp()
+    npy = os.path.join(tmp, "frames.npy")
+    np.save(npy, np.stack(frames))
+    avi = os.path.join(tmp, "frames.avi")
+    writer = cv2.VideoWriter(avi, cv2.VideoWriter_fourcc(*"MJPG"), args.fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+    sim_hardware.install_fake_picamera2()
+    cameras = []
+
+    def picamera2(pixel_format):
+        def make():
+            picam2 = sim_hardware.FakePicamera2(fps=args.fps)
+            cameras.append(picam2)
+            return Picamera2Source(width=width, height=height, pixel_format=pixel_format,
+                                   picam2=picam2)
+        return make
+
+    backends = (
+        # (name, factory, bit-exact frames)
+        ("synthetic", lambda: SyntheticSource(width, height, fps=args.fps), True),
+        ("file .npy", lambda: FileSource(npy, fps=args.fps), True),
+        # JPEG is lossy and the .avi plays unpaced
+        ("opencv .avi", lambda: OpenCVSource(avi, width, height), False),
+        ("picamera2 (stub) bgr", picamera2("bgr"), True),
+        # 4:2:0 chroma subsampling and YUV rounding
+        ("picamera2 (stub) yuv420", picamera2("yuv420"), False),
+    )
+
+    print(f"{count} frames {width}x{height}, paced sources at {args.fps:.0f} fps")
+    ok = True
+    for name, make_source, exact in backends:
+        for mode, kwargs in MODES:
+            if name.endswith("yuv420") and "pool_size" in kwargs:
+                continue  # luma frames are not pooled
+            ok &= run(f"{name} {mode}", make_source, count, frames, exact, **kwargs)
+    leaked = [c.buffers_held for c in cameras if c.buffers_held]
+    closed = all(c.closed for c in cameras)
+    print(f"picamera2 requests all released: {not leaked}, cameras closed: {closed}")
+    ok &= not leaked and closed
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Offline iBus capture decoding: ibus_capture.decode_capture against decoding
+frame by frame with IBUSReceiver._check_checksum / _decode_frame.
+
+Uses the same synthetic stream as bench_ibus_parser.py (valid frames mixed
+with noise and corrupted frames) and checks both decoders agree.
+
+Usage:
+    python benchmarks/bench_ibus_capture.py [--megabytes 8]
+"""
+import argparse
+import time
+
+from bench_ibus_parser import make_stream
+from ibus import IBUSReceiver
+from ibus_capture import decode_capture, format_stats
+
+
+class _NoPort:
+    is_open = True
+
+
+def frame_by_frame(data):
+    receiver = IBUSReceiver(ser=_NoPort(), num_channels=14)
+    frames = []
+    pos = 0
+    end = len(data) - IBUSReceiver.IBUS_FRAME_SIZE
+    while True:
+        idx = data.find(IBUSReceiver.IBUS_HEADER, pos)
+        if idx < 0 or idx > end:
+            break
+        frame = data[idx:idx + IBUSReceiver.IBUS_FRAME_SIZE]
+        if receiver._check_checksum(frame):
+            receiver._decode_frame(frame)
+            frames.append(tuple(receiver.channels))
+            pos = idx + IBUSReceiver.IBUS_FRAME_SIZE
+        else:
+            pos = idx + 1
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=8.0)
+    args = parser.parse_args()
+
+    data, _ = make_stream(int(args.megabytes * 1024 * 1024))
+
+    t0 = time.perf_counter()
+    slow = frame_by_frame(data)
+    slow_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    capture = decode_capture(data)
+    fast_time = time.perf_counter() - t0
+
+    fast = capture.channels[capture.valid]
+    agree = len(fast) == len(slow) and all(tuple(a) == b for a, b in zip(fast.tolist(), slow))
+    print(format_stats(capture.stats))
+    mb = len(data) / 1e6
+    print(f"frame by frame: {slow_time * 1e3:8.1f} ms ({mb / slow_time:7.1f} MB/s)")
+    print(f"vectorized:     {fast_time * 1e3:8.1f} ms ({mb / fast_time:7.1f} MB/s)  "
+          f"x{slow_time / fast_time:.1f}")
+    print("decoders agree:", agree)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Throughput benchmark for the IBUSReceiver parser.
+
+Generates a byte stream of valid iBus frames interleaved with random noise
+and corrupted frames, then feeds it through the parser in UART-sized chunks.
+Compares the current parser against the original pop(0)-based one.
+
+Usage:
+    python benchmarks/bench_ibus_parser.py [--megabytes 4] [--chunk 256]
+"""
+import argparse
+import random
+import time
+
+from common import install_stand_ins
+install_stand_ins()
+from ibus import IBUSReceiver  # noqa: E402
+
+
+class ChunkedStream:
+    """
+    Serial-like object that hands out a byte string in fixed-size chunks.
+    """
+
+    def __init__(self, data, chunk):
+        self.data = data
+        self.chunk = chunk
+        self.pos = 0
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, len(self.data) - self.pos)
+
+    def read(self, size=1):
+        out = self.data[self.pos:self.pos + size]
+        self.pos += len(out)
+        return out
+
+    def close(self):
+        self.is_open = False
+
+
+class LegacyIBUSReceiver(IBUSReceiver):
+    """
+    The original parser: bytearray grown per read, resynced with pop(0).
+    """
+
+    def update(self):
+        if not isinstance(self.buffer, bytearray) or len(self.buffer) == self.BUFFER_SIZE:
+            self.buffer = bytearray()
+        data_in = self.ser.read(self.ser.in_waiting or 1)
+        if data_in:
+            self.buffer.extend(data_in)
+        while len(self.buffer) >= self.IBUS_FRAME_SIZE:
+            if self.buffer[0:2] == self.IBUS_HEADER:
+                frame = self.buffer[:self.IBUS_FRAME_SIZE]
+                if self._check_checksum(frame):
+                    for ch_index in range(min(self.num_channels, 14)):
+                        low = frame[2 + ch_index * 2]
+                        high = frame[3 + ch_index * 2]
+                        self.channels[ch_index] = (high << 8) | low
+                del self.buffer[:self.IBUS_FRAME_SIZE]
+            else:
+                self.buffer.pop(0)
+
+
+def make_frame(channels):
+    body = bytearray(IBUSReceiver.IBUS_HEADER)
+    for value in channels:
+        body += value.to_bytes(2, "little")
+    checksum = sum(body) & 0xFFFF
+    return bytes(body + checksum.to_bytes(2, "little"))
+
+
+def make_stream(size, noise_ratio=0.3, seed=0):
+    """
+    Valid frames mixed with noise bursts and frames with a flipped byte.
+    Returns (stream, number of valid frames).
+    """
+    rng = random.Random(seed)
+    out = bytearray()
+    valid = 0
+    while len(out) < size:
+        roll = rng.random()
+        frame = make_frame([rng.randint(1000, 2000) for _ in range(14)])
+        if roll < noise_ratio / 2:
+            out += bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 64)))
+        elif roll < noise_ratio:
+            corrupt = bytearray(frame)
+            corrupt[rng.randint(2, 29)] ^= 0xFF
+            out += corrupt
+        else:
+            out += frame
+            valid += 1
+    return bytes(out), valid
+
+
+def run(cls, data, chunk):
+    receiver = cls(ser=ChunkedStream(data, chunk), num_channels=14)
+    t0 = time.perf_counter()
+    while receiver.ser.pos < len(data):
+        receiver.update()
+    elapsed = time.perf_counter() - t0
+    return elapsed, list(receiver.channels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=4.0)
+    parser.add_argument("--chunk", type=int, default=256, help="bytes per serial read")
+    args = parser.parse_args()
+
+    data, valid = make_stream(int(args.megabytes * 1024 * 1024))
+    print(f"stream: {len(data)} bytes, {valid} valid frames, chunk {args.chunk} bytes")
+    results = {}
+    for label, cls in (("legacy", LegacyIBUSReceiver), ("current", IBUSReceiver)):
+        elapsed, channels = run(cls, data, args.chunk)
+        results[label] = channels
+        print(f"{label:8s}: {elapsed:7.3f} s  {len(data) / elapsed / 1e6:7.2f} MB/s")
+    if results["legacy"] != results["current"]:
+        print("WARNING: parsers disagree on the final channel values")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Kill-switch latency of safety.KillSwitchWatcher, measured end to end.
+
+A pty stands in for the receiver UART (real pyserial on the slave side) and
+the fake RPi.GPIO records duty cycles. A transmitter thread sends iBus frames
+every 7 ms while a busy thread keeps the interpreter loaded, like a slow
+control/vision loop would. Measured:
+  - kill switch: from writing the first kill frame to the pty until all
+    drive motors and the spinner are at 0% duty
+  - signal loss: from the last frame written until the outputs are zeroed,
+    minus the failsafe timeout
+
+Exits with status 1 if the worst case exceeds the bounds.
+
+Usage:
+    python benchmarks/bench_kill_latency.py [--trials 50] [--kill-bound-ms 10]
+        [--loss-bound-ms 15] [--no-load] [--no-realtime]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import tty
+
+from common import install_stand_ins
+install_stand_ins()
+
+from bench_ibus_parser import make_frame  # noqa: E402
+from motor_control import MotorController  # noqa: E402
+from remote_control import RemoteControl  # noqa: E402
+from safety import KillSwitchWatcher  # noqa: E402
+
+KILL_CHANNEL = 5
+FAILSAFE_MS = 100
+
+
+class Transmitter:
+    """
+    Writes the current frame to the pty master every `period` seconds.
+    """
+
+    def __init__(self, fd, period=0.007):
+        self.fd = fd
+        self.period = period
+        self.frame = self.make(killed=False)
+        self.enabled = True
+        self.last_write = None
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def make(killed):
+        channels = [1500, 1500, 1000, 1500, 1000, 2000 if killed else 1000] + [1500] * 8
+        return make_frame(channels)
+
+    def send_now(self, frame):
+        self.frame = frame
+        t = time.monotonic()
+        os.write(self.fd, frame)
+        self.last_write = t
+        return t
+
+    def run(self):
+        while self.running:
+            if self.enabled:
+                os.write(self.fd, self.frame)
+                self.last_write = time.monotonic()
+            time.sleep(self.period)
+
+
+def busy(stop):
+    # Pure-Python work that contends for the GIL
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def outputs_zero(motor_controller):
+    return all(d == 0 for d in motor_controller.last_duty)
+
+
+def wait_for(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.0002)
+    return True
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--kill-bound-ms", type=float, default=10.0)
+    parser.add_argument("--loss-bound-ms", type=float, default=15.0,
+                        help="allowed delay beyond the failsafe timeout")
+    parser.add_argument("--no-load", action="store_true", help="skip the busy thread")
+    parser.add_argument("--no-realtime", action="store_true",
+                        help="do not request SCHED_FIFO for the watcher threads")
+    args = parser.parse_args()
+
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    remote_control = RemoteControl(uart_port=os.ttyname(slave), num_channels=6,
+                                   killswitch_channel=KILL_CHANNEL, failsafe_ms=FAILSAFE_MS)
+    motor_controller = MotorController([17, 27, 22, 23], 24, pwm_freq=1000)
+    tx = Transmitter(master)
+    watcher = KillSwitchWatcher(remote_control, motor_controller,
+                                realtime=not args.no_realtime).start()
+
+    stop = threading.Event()
+    if not args.no_load:
+        threading.Thread(target=busy, args=(stop,), daemon=True).start()
+
+    def drive():
+        # What the control loop does once re-armed
+        if not wait_for(lambda: not watcher.tripped):
+            return False
+        motor_controller.xdrive_move(0.5, 0.5, 0.0)
+        motor_controller.start_spinner()
+        return not outputs_zero(motor_controller)
+
+    kill, loss = [], []
+    for _ in range(args.trials):
+        tx.frame = tx.make(killed=False)
+        tx.enabled = True
+        if not drive():
+            raise RuntimeError("watcher did not re-arm")
+        time.sleep(0.02)
+
+        # Kill switch flipped
+        tx.enabled = False
+        time.sleep(0.003)
+        t_write = tx.send_now(tx.make(killed=True))
+        tx.enabled = True
+        if not wait_for(lambda: watcher.last_trip_time is not None
+                        and watcher.last_trip_time >= t_write and outputs_zero(motor_controller)):
+            raise RuntimeError("kill switch did not stop the motors")
+        kill.append(watcher.last_trip_time - t_write)
+
+        # Re-arm, then lose the signal
+        tx.frame = tx.make(killed=False)
+        if not drive():
+            raise RuntimeError("watcher did not re-arm")
+        tx.enabled = False
+        time.sleep(0.002)
+        t_last = tx.last_write
+        if not wait_for(lambda: watcher.last_trip_time is not None
+                        and watcher.last_trip_time > t_last and outputs_zero(motor_controller)):
+            raise RuntimeError("signal loss did not stop the motors")
+        loss.append(watcher.last_trip_time - t_last - FAILSAFE_MS / 1000.0)
+
+        # Cycle the kill switch to clear the signal-loss latch
+        tx.frame = tx.make(killed=True)
+        tx.enabled = True
+        if not wait_for(lambda: not watcher.latched):
+            raise RuntimeError("kill switch did not clear the signal-loss latch")
+
+    stop.set()
+    tx.running = False
+    watcher.stop()
+    remote_control.close()
+    motor_controller.shutdown()
+    os.close(master)
+
+    def row(name, values):
+        ms = [v * 1e3 for v in values]
+        print(f"{name:28s} p50 {statistics.median(ms):7.3f} ms  p99 {percentile(ms, 0.99):7.3f} ms"
+              f"  max {max(ms):7.3f} ms")
+
+    load = "no load" if args.no_load else "busy Python thread"
+    print(f"{args.trials} trials, pty UART, fake GPIO, {load}, "
+          f"realtime priority {'on' if watcher.realtime_granted else 'off'}")
+    row("kill switch -> outputs 0", kill)
+    row(f"signal loss beyond {FAILSAFE_MS} ms", loss)
+
+    failed = max(kill) * 1e3 > args.kill_bound_ms or max(loss) * 1e3 > args.loss_bound_ms
+    print(f"bounds: kill <= {args.kill_bound_ms} ms, signal loss <= failsafe + "
+          f"{args.loss_bound_ms} ms: {'FAIL' if failed else 'OK'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
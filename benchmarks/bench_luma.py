@@ -0,0 +1,131 @@
+"""
+Luma-only capture: per-frame cost of camera_module's native formats against
+the BGR path, from the camera's raw buffer to a detection.
+
+For each capture format the raw buffers are made once from synthetic BGR
+frames (packed YUYV, planar YUV420, JPEG) and then timed:
+  - bgr:   what CameraModule did before, convert/decode to BGR, detect on BGR
+  - luma:  camera_module.luma_frame() (Y view, or grayscale JPEG decode),
+           detect on the single channel
+Both runs use the same RobotDetector settings. Single-channel MOG2 is a
+different model from the 3-channel one, so detections are compared with the
+true disc centres rather than with each other. LumaFrame.bgr() (the lazy
+colour path, used with --color-filter) must match the BGR conversion exactly.
+
+Usage:
+    python benchmarks/bench_luma.py [--frames 200] [--width 640 --height 480]
+        [--scale 1.0] [--color-filter]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from common import synthetic_frames
+from frame_sources import SyntheticSource
+from camera_module import luma_frame
+from robot_detection import RobotDetector
+
+# A disc brighter than the background: luma-only detection needs luma contrast
+DISC_COLOR = (200, 160, 120)
+# Color filter bounds (HSV) that pass the disc and reject most of the background
+COLOR_FILTER = dict(use_color_filter=True, lower_color=(0, 0, 150), upper_color=(179, 255, 255))
+
+
+def to_yuyv(frame):
+    """
+    Packed YUYV (H, W, 2) as a V4L2 camera delivers it.
+    """
+    height, width = frame.shape[:2]
+    yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
+    packed = np.empty((height, width, 2), dtype=np.uint8)
+    packed[:, :, 0] = yuv[:, :, 0]
+    packed[:, 0::2, 1] = yuv[:, 0::2, 1]
+    packed[:, 1::2, 1] = yuv[:, 0::2, 2]
+    return packed
+
+
+def raw_frames(frames, pixel_format):
+    if pixel_format == "yuyv":
+        return [to_yuyv(f) for f in frames]
+    if pixel_format == "yuv420":
+        return [cv2.cvtColor(f, cv2.COLOR_BGR2YUV_I420) for f in frames]
+    return [cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 90])[1] for f in frames]
+
+
+def to_bgr(raw, pixel_format):
+    if pixel_format == "yuyv":
+        return cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV)
+    if pixel_format == "yuv420":
+        return cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_I420)
+    return cv2.imdecode(raw, cv2.IMREAD_COLOR)
+
+
+def accuracy(detections, truth, warmup):
+    """
+    (detection rate, mean centre error in pixels) after warm-up.
+    """
+    errors = [np.hypot(d[0] - t[0], d[1] - t[1])
+              for d, t in zip(detections[warmup:], truth[warmup:]) if d is not None]
+    rate = len(errors) / (len(truth) - warmup)
+    return rate, float(np.mean(errors)) if errors else float("nan")
+
+
+def run(raws, convert, warmup, **kwargs):
+    """
+    Returns (ms per frame, detections) for convert + detect on every raw buffer.
+    """
+    detector = RobotDetector(**kwargs)
+    detections = []
+    elapsed = 0.0
+    for i, raw in enumerate(raws):
+        t0 = time.perf_counter()
+        detections.append(detector.detect_robot(convert(raw)))
+        if i >= warmup:
+            elapsed += time.perf_counter() - t0
+    return 1e3 * elapsed / (len(raws) - warmup), detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--color-filter", action="store_true")
+    args = parser.parse_args()
+
+    width, height = args.width, args.height
+    frames = synthetic_frames(args.frames, width, height, color=DISC_COLOR)
+    warmup = min(30, args.frames // 4)
+    kwargs = dict(min_area=500 * (width * height) / (640 * 480), scale=args.scale,
+                  track=True, refine=args.scale != 1.0)
+    if args.color_filter:
+        kwargs.update(COLOR_FILTER)
+
+    print(f"{args.frames} frames {width}x{height}, scale {args.scale}, "
+          f"color filter {'on' if args.color_filter else 'off'}")
+    truth = [SyntheticSource(width, height).centre(i) for i in range(args.frames)]
+    ok = True
+    for pixel_format in ("yuyv", "yuv420", "mjpeg"):
+        raws = raw_frames(frames, pixel_format)
+        lazy = luma_frame(raws[0], pixel_format, width, height).bgr()
+        ok &= bool(np.array_equal(lazy, to_bgr(raws[0], pixel_format)))
+
+        bgr_ms, bgr_hits = run(raws, lambda raw: to_bgr(raw, pixel_format), warmup, **kwargs)
+        luma_ms, luma_hits = run(raws, lambda raw: luma_frame(raw, pixel_format, width, height),
+                                 warmup, **kwargs)
+        print(f"{pixel_format:7s} bgr {bgr_ms:6.2f} ms  luma {luma_ms:6.2f} ms  "
+              f"x{bgr_ms / luma_ms:.2f}")
+        for name, hits in (("bgr", bgr_hits), ("luma", luma_hits)):
+            rate, error = accuracy(hits, truth, warmup)
+            print(f"        {name:4s} found {100 * rate:5.1f}%  mean error {error:4.1f} px")
+    print("lazy colour matches BGR conversion:", ok)
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Motion-gated RobotDetector (motion_gate.MotionGate) against ungated
+detection on a clip where the disc alternates between moving and standing
+still, with per-frame sensor noise on every frame.
+
+Reported for each gate setting: ms per frame, the gate's hit / partial /
+full split, and, separately for moving and still frames, how often the
+detection agrees with the ungated detector and with the true disc centre
+(same found / not found, centres within --tolerance px). While the disc
+stands still MOG2 absorbs it and ungated detection loses it; the gate keeps
+returning the last detection instead, so the two are expected to differ there.
+
+Checks (exit status 1 on failure):
+  - motion_gate.BlockBackgroundModel gives the same MOG2 mask as a single
+    subtractor on every frame
+  - on moving frames, the default gate finds the true centre no less often
+    than ungated detection, minus --slack
+
+Usage:
+    python benchmarks/bench_motion_gate.py [--frames 600] [--segment 60]
+        [--noise 2.0] [--tolerance 4] [--slack 0.05]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from common import synthetic_frames
+from frame_sources import SyntheticSource
+from motion_gate import BlockBackgroundModel, MotionGate
+from robot_detection import RobotDetector
+
+GATES = (
+    # (name, MotionGate kwargs)
+    ("default", dict()),
+    ("threshold 20", dict(threshold=20.0)),
+    ("no partial", dict(max_changed=0.0)),
+    ("refresh 10", dict(refresh_interval=10)),
+)
+
+
+def paused_clip(count, segment, width, height, noise, seed=0):
+    """
+    Frames, true centres and moving flags: the disc moves for `segment` frames, then stands
+    still for `segment` frames, and so on. Gaussian noise is added to each frame.
+    """
+    moving = synthetic_frames(count + 1, width, height)
+    source = SyntheticSource(width, height)
+    rng = np.random.default_rng(seed)
+    frames, truth, moves = [], [], []
+    position = 0
+    for i in range(count):
+        moves.append((i // segment) % 2 == 0)
+        if moves[-1]:
+            position += 1
+        noisy = moving[position].astype(np.float32)
+        noisy += rng.normal(0.0, noise, noisy.shape).astype(np.float32)
+        frames.append(np.clip(noisy, 0, 255).astype(np.uint8))
+        truth.append(source.centre(position))
+    return frames, truth, moves
+
+
+def check_block_model(frames, grid):
+    single = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=True)
+    blocks = BlockBackgroundModel(
+        grid, lambda: cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16,
+                                                         detectShadows=True))
+    return sum(not np.array_equal(single.apply(f), blocks.apply(f)) for f in frames)
+
+
+def run(frames, warmup, gate=None):
+    detector = RobotDetector(track=True, motion_gate=gate)
+    detections = []
+    elapsed = 0.0
+    for i, frame in enumerate(frames):
+        t0 = time.perf_counter()
+        detections.append(detector.detect_robot(frame))
+        if i >= warmup:
+            elapsed += time.perf_counter() - t0
+    return 1e3 * elapsed / (len(frames) - warmup), detections
+
+
+def agreement(detections, reference, tolerance, frames):
+    """
+    Fraction of `frames` (indices) where both agree: neither found, or
+    centres within `tolerance` pixels.
+    """
+    same = 0
+    for i in frames:
+        d, r = detections[i], reference[i]
+        if d is None or r is None:
+            same += d is None and r is None
+        else:
+            same += np.hypot(d[0] - r[0], d[1] - r[1]) <= tolerance
+    return same / max(1, len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--segment", type=int, default=60)
+    parser.add_argument("--noise", type=float, default=2.0)
+    parser.add_argument("--tolerance", type=float, default=4.0)
+    parser.add_argument("--slack", type=float, default=0.05)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    frames, truth, moves = paused_clip(args.frames, args.segment, args.width, args.height,
+                                       args.noise)
+    warmup = min(30, args.frames // 4)
+    moving = [i for i in range(warmup, len(frames)) if moves[i]]
+    still = [i for i in range(warmup, len(frames)) if not moves[i]]
+    grid = MotionGate().grid
+    checked = min(120, len(frames))
+    bad_masks = check_block_model(frames[:checked], grid)
+    print(f"block MOG2 grid {grid[0]}x{grid[1]}: {bad_masks} of {checked} masks differ "
+          f"from a single MOG2")
+
+    print(f"{args.frames} frames {args.width}x{args.height}, moving/still every "
+          f"{args.segment} frames, noise sigma {args.noise}; agreement within "
+          f"{args.tolerance:g} px on moving / still frames")
+    base_ms, base = run(frames, warmup)
+    base_truth = agreement(base, truth, args.tolerance, moving)
+    print(f"{'ungated':14s} {base_ms:6.2f} ms         truth {100 * base_truth:5.1f}% / "
+          f"{100 * agreement(base, truth, args.tolerance, still):5.1f}%")
+    ok = bad_masks == 0
+    for name, kwargs in GATES:
+        gate = MotionGate(**kwargs)
+        ms, detections = run(frames, warmup, gate)
+        gated_truth = agreement(detections, truth, args.tolerance, moving)
+        print(f"{name:14s} {ms:6.2f} ms x{base_ms / ms:4.2f}  "
+              f"truth {100 * gated_truth:5.1f}% / "
+              f"{100 * agreement(detections, truth, args.tolerance, still):5.1f}%  "
+              f"ungated {100 * agreement(detections, base, args.tolerance, moving):5.1f}% / "
+              f"{100 * agreement(detections, base, args.tolerance, still):5.1f}%")
+        print(f"{'':14s} {gate.summary()}")
+        if name == "default":
+            ok &= gated_truth >= base_truth - args.slack
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Startup-time benchmark: time from process start to the first motor command
+driven by RC input, and to vision being ready, against stand-in hardware.
+
+Each mode runs in a fresh interpreter so module import time is included:
+  - sequential: the original bring-up (eager cv2 import, then motors, camera,
+                detector and UART one after another)
+  - concurrent: main.bring_up() (lazy imports, motors / RC / vision in
+                parallel, first command as soon as RC is live)
+
+Stand-ins: fake RPi.GPIO, an in-memory UART that opens after --uart-delay
+and then streams iBus frames every 7 ms, and a camera that imports OpenCV
+like CameraModule does and takes --camera-delay seconds to open.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--camera-delay 1.0] [--uart-delay 0.05]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("sequential", "concurrent")
+
+
+def install_stand_in_hardware(camera_delay, uart_delay):
+    """
+    Register fake GPIO, a delayed streaming UART and a slow-opening camera.
+    Must run before the robot modules are imported.
+    """
+    import threading
+    import types
+
+    import sim_hardware
+    sim_hardware.install_fake_gpio()
+    serial = sim_hardware.install_fake_serial(force=True)
+
+    class StreamingSerial(sim_hardware.FakeSerial):
+        def __init__(self, *args, **kwargs):
+            time.sleep(uart_delay)
+            super().__init__(*args, **kwargs)
+            from bench_ibus_parser import make_frame
+            # Manual mode, kill switch off, stick slightly right
+            frame = make_frame([1600, 1500, 1000, 1500, 1000, 1000] + [1500] * 8)
+
+            def transmit():
+                while self.is_open:
+                    self.inject(frame)
+                    time.sleep(0.007)
+
+            threading.Thread(target=transmit, daemon=True).start()
+
+    serial.Serial = StreamingSerial
+
+    class SlowCamera:
+        def __init__(self, camera_index=0, width=640, height=480, **kwargs):
+            import cv2  # noqa: F401  (CameraModule's import cost)
+            import numpy as np
+            time.sleep(camera_delay)
+            self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+            self.seq = -1
+
+        def get_frame_info(self, timeout=None, newer_than=None):
+            time.sleep(1.0 / 30)
+            self.seq += 1
+            return self.frame, time.monotonic(), self.seq
+
+        def get_frame(self):
+            return self.get_frame_info()[0]
+
+        def release(self):
+            pass
+
+    module = types.ModuleType("camera_module")
+    module.CameraModule = SlowCamera
+    sys.modules["camera_module"] = module
+
+
+def wait_for_rc(remote_control):
+    while remote_control.ibus.get_snapshot().timestamp is None:
+        time.sleep(0.0005)
+
+
+def child(mode, camera_delay, uart_delay):
+    t0 = time.perf_counter()
+    sys.path.insert(0, os.path.join(HERE, ".."))
+    sys.path.insert(0, HERE)
+    install_stand_in_hardware(camera_delay, uart_delay)
+
+    if mode == "sequential":
+        import cv2  # noqa: F401
+        from camera_module import CameraModule
+        from robot_detection import RobotDetector
+        import main
+        motor_controller = main.init_motors()
+        camera = CameraModule(camera_index=0, width=640, height=480, threaded=True)
+        RobotDetector(min_area=500, track=True, max_misses=3)
+        t_vision = time.perf_counter() - t0
+        remote_control = main.init_remote_control()
+        wait_for_rc(remote_control)
+        motor_controller.xdrive_move(*remote_control.get_movement())
+        t_first = time.perf_counter() - t0
+        camera.release()
+    else:
+        import main
+        from instrumentation import Profiler
+        motor_controller, remote_control, vision_init = main.bring_up(Profiler(enabled=False))
+        wait_for_rc(remote_control)
+        motor_controller.xdrive_move(*remote_control.get_movement())
+        t_first = time.perf_counter() - t0
+        vision = vision_init.result(timeout=30)
+        # vision_init times are time.monotonic(); convert to this run's clock
+        t_vision = vision_init.finished + (time.perf_counter() - time.monotonic()) - t0
+        vision.worker.stop()
+
+    remote_control.close()
+    motor_controller.shutdown()
+    print(json.dumps(dict(first_command=t_first, vision_ready=t_vision)))
+
+
+def run_child(mode, args):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                          "--camera-delay", str(args.camera_delay),
+                          "--uart-delay", str(args.uart_delay)],
+                         check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--camera-delay", type=float, default=1.0,
+                        help="simulated camera open time (s)")
+    parser.add_argument("--uart-delay", type=float, default=0.05,
+                        help="simulated UART open time (s)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.camera_delay, args.uart_delay)
+        return
+
+    print(f"camera open {args.camera_delay:.2f} s, UART open {args.uart_delay:.2f} s, "
+          f"median of {args.runs} runs")
+    print(f"{'mode':12s} {'first motor cmd':>16s} {'vision ready':>14s}")
+    for mode in MODES:
+        runs = [run_child(mode, args) for _ in range(args.runs)]
+        first = statistics.median(r["first_command"] for r in runs)
+        vision = statistics.median(r["vision_ready"] for r in runs)
+        print(f"{mode:12s} {first * 1e3:13.1f} ms {vision * 1e3:11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
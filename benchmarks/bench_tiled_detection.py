@@ -0,0 +1,81 @@
+"""
+Tiled RobotDetector (workers > 1) against the serial path: a 1-4 worker
+scaling benchmark. That tiled results equal the serial ones is asserted by
+tests/test_tiled_detection.py.
+
+Scaling: per-frame time of the tiled stages alone (threshold, morphology,
+blob search on recorded MOG2 masks) and of the whole detect_robot, for
+1-4 workers. OpenCV's own thread count is reported alongside (--cv-threads
+sets it), since MOG2 and morphology are already parallel inside OpenCV.
+
+Usage:
+    python benchmarks/bench_tiled_detection.py [--frames 200] [--cv-threads N]
+"""
+import argparse
+import os
+import time
+
+import cv2
+
+from common import synthetic_frames
+from robot_detection import RobotDetector
+
+RESOLUTIONS = ((640, 480), (1280, 720))
+WORKERS = (1, 2, 3, 4)
+
+
+def time_stages(masks, workers, min_area):
+    detector = RobotDetector(workers=workers)
+    for fg in masks[:10]:
+        detector._find_robot(None, fg, min_area)
+    t0 = time.perf_counter()
+    for fg in masks:
+        detector._find_robot(None, fg, min_area)
+    elapsed = time.perf_counter() - t0
+    detector.close()
+    return 1e3 * elapsed / len(masks)
+
+
+def time_detect(frames, workers, min_area, warmup=30):
+    detector = RobotDetector(workers=workers, min_area=min_area)
+    for frame in frames[:warmup]:
+        detector.detect_robot(frame)
+    t0 = time.perf_counter()
+    for frame in frames[warmup:]:
+        detector.detect_robot(frame)
+    elapsed = time.perf_counter() - t0
+    detector.close()
+    return 1e3 * elapsed / (len(frames) - warmup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--cv-threads", type=int, help="cv2.setNumThreads() before timing")
+    args = parser.parse_args()
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+    # MOG2 warm-up frames left out of the timing
+    warmup = min(30, args.frames // 4)
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+
+    print(f"{os.cpu_count()} CPUs, OpenCV threads {cv2.getNumThreads()}; ms per frame")
+    print(f"{'':30s}" + "".join(f"{f'{w} workers':14s}" for w in WORKERS))
+    for width, height in RESOLUTIONS:
+        frames = synthetic_frames(args.frames, width, height)
+        min_area = 500 * (width * height) / (640 * 480)
+        mog2 = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16,
+                                                  detectShadows=True)
+        masks = [mog2.apply(frame) for frame in frames][warmup:]
+        rows = (("threshold+morph+blob", lambda w: time_stages(masks, w, min_area)),
+                ("detect_robot", lambda w: time_detect(frames, w, min_area, warmup)))
+        for name, timer in rows:
+            times = [timer(w) for w in WORKERS]
+            cells = "".join(f"{t:6.3f} x{times[0] / t:.2f} " for t in times)
+            print(f"{f'{width}x{height} {name}':30s}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared helpers for the benchmark scripts: repo import path, stand-in
+hardware and synthetic test data.
+"""
+import os
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import sim_hardware  # noqa: E402
+
+
+def install_stand_ins():
+    """
+    Fake RPi.GPIO always (benchmarks must never drive real pins); fake
+    serial only if pyserial is missing. Call before importing robot modules.
+    """
+    sim_hardware.install_fake_gpio()
+    sim_hardware.install_fake_serial()
+
+
+def synthetic_frames(count, width=640, height=480, radius=None, seed=0, color=(200, 50, 50)):
+    """
+    A disc moving over a noisy static background, as a list of BGR frames
+    (frame_sources.SyntheticSource). The default disc colour has about the
+    background's luma, so it is only distinct in colour; pass a brighter
+    `color` for luma-only detection.
+    """
+    from frame_sources import SyntheticSource
+
+    source = SyntheticSource(width, height, count=count, radius=radius, seed=seed, color=color)
+    return [source.read()[1] for _ in range(count)]
+
+
+def load_recorded_frames(path, limit=None):
+    """
+    Frames from a recorder file (zero-copy views into the mapping), a .npy
+    stack or a video file.
+    """
+    from camera_module import CameraModule
+    from frame_sources import FileSource
+    from recorder import RecordingReader, is_recording
+
+    if is_recording(path):
+        frames = RecordingReader(path).frames
+        return list(frames[:limit] if limit else frames)
+
+    camera = CameraModule(source=FileSource(path, loop=False))
+    frames = []
+    try:
+        while limit is None or len(frames) < limit:
+            try:
+                frames.append(np.array(camera.get_frame()))
+            except RuntimeError:
+                break
+    finally:
+        camera.release()
+    return frames
@@ -0,0 +1,156 @@
+"""
+Hardware-free benchmark suite with machine-readable output.
+
+Runs on any Linux box using the stand-in GPIO/serial modules from
+sim_hardware.py and covers:
+  - RobotDetector.detect_robot fps on synthetic frames at several
+    resolutions, and on recorded frames (--recording clip.npy|clip.avi)
+  - IBUSReceiver parser throughput (bytes/sec)
+  - MotorController.xdrive_move calls/sec
+
+Results are written as JSON. Pass --compare with an earlier result file to
+print per-metric ratios and flag regressions.
+
+Usage:
+    python benchmarks/run_suite.py --output bench.json
+    python benchmarks/run_suite.py --output new.json --compare bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from common import install_stand_ins, load_recorded_frames, synthetic_frames
+install_stand_ins()
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from bench_ibus_parser import ChunkedStream, make_stream  # noqa: E402
+from ibus import IBUSReceiver  # noqa: E402
+from motor_control import MotorController  # noqa: E402
+from robot_detection import RobotDetector  # noqa: E402
+
+RESOLUTIONS = ((320, 240), (640, 480), (1280, 720))
+# Every metric is "higher is better" unless listed here
+LOWER_IS_BETTER = ("ms_per_frame", "ns_per_call")
+
+
+def _time_detector(frames, warmup, **kwargs):
+    detector = RobotDetector(**kwargs)
+    for frame in frames[:warmup]:
+        detector.detect_robot(frame)
+    found = 0
+    t0 = time.perf_counter()
+    for frame in frames[warmup:]:
+        if detector.detect_robot(frame) is not None:
+            found += 1
+    elapsed = time.perf_counter() - t0
+    n = len(frames) - warmup
+    return dict(fps=n / elapsed, ms_per_frame=1e3 * elapsed / n, detection_rate=found / n)
+
+
+def bench_detector(frame_count, recording=None):
+    results = {}
+    warmup = min(30, frame_count // 4)
+    for width, height in RESOLUTIONS:
+        frames = synthetic_frames(frame_count, width, height)
+        min_area = 500 * (width * height) / (640 * 480)
+        results[f"detector.synthetic.{width}x{height}"] = _time_detector(
+            frames, warmup, min_area=min_area)
+    if recording:
+        frames = load_recorded_frames(recording, limit=frame_count)
+        if len(frames) > warmup:
+            height, width = frames[0].shape[:2]
+            results[f"detector.recorded.{width}x{height}"] = _time_detector(frames, warmup)
+    return results
+
+
+def bench_ibus(megabytes, chunk=256):
+    data, valid = make_stream(int(megabytes * 1024 * 1024))
+    receiver = IBUSReceiver(ser=ChunkedStream(data, chunk), num_channels=14)
+    t0 = time.perf_counter()
+    while receiver.ser.pos < len(data):
+        receiver.update()
+    elapsed = time.perf_counter() - t0
+    return {"ibus.parser": dict(bytes_per_sec=len(data) / elapsed,
+                                frames_per_sec=receiver.frames_ok / elapsed,
+                                frames_found=receiver.frames_ok / max(1, valid))}
+
+
+def bench_motor(calls):
+    motor_controller = MotorController([17, 27, 22, 23], 24, pwm_freq=1000)
+    rng = np.random.default_rng(0)
+    commands = rng.uniform(-1.0, 1.0, (1024, 3)).tolist()
+    t0 = time.perf_counter()
+    for i in range(calls):
+        x, y, r = commands[i & 1023]
+        motor_controller.xdrive_move(x, y, r)
+    elapsed = time.perf_counter() - t0
+    motor_controller.shutdown()
+    return {"motor.xdrive_move": dict(calls_per_sec=calls / elapsed,
+                                      ns_per_call=1e9 * elapsed / calls)}
+
+
+def environment():
+    return dict(python=platform.python_version(), numpy=np.__version__,
+                opencv=cv2.__version__, machine=platform.machine(),
+                processor=platform.processor(), system=platform.platform(),
+                timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+
+
+def compare(old, new, threshold):
+    """
+    Print new/old for every shared metric; returns the number of regressions.
+    """
+    regressions = 0
+    for name, metrics in sorted(new["results"].items()):
+        for metric, value in sorted(metrics.items()):
+            before = old.get("results", {}).get(name, {}).get(metric)
+            if not before:
+                continue
+            ratio = value / before
+            lower_better = metric in LOWER_IS_BETTER
+            worse = ratio > 1 + threshold if lower_better else ratio < 1 - threshold
+            regressions += worse
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name:32s} {metric:16s} {before:14.4g} -> {value:14.4g}  x{ratio:6.3f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change counted as a regression (default 0.10)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--recording", help=".npy or video file of recorded frames")
+    parser.add_argument("--ibus-megabytes", type=float, default=4.0)
+    parser.add_argument("--motor-calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_detector(args.frames, args.recording))
+    results.update(bench_ibus(args.ibus_megabytes))
+    results.update(bench_motor(args.motor_calls))
+    report = dict(environment=environment(), results=results)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if compare(old, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,365 @@
+import threading
+import time
 import cv2
+import numpy as np
+from frame_sources import FrameSource, open_source
+
+class FramePool:
+    """
+    Fixed set of preallocated frame buffers with reference-counted
+    acquire/release semantics. Buffers are reused forever, so once the pool
+    is built the capture path allocates nothing.
+    """
+
+    def __init__(self, size, shape, dtype=np.uint8):
+        """
+        :param size: Number of buffers to preallocate.
+        :param shape: Frame shape, e.g. (480, 640, 3).
+        :param dtype: Frame dtype.
+        """
+        if size < 1:
+            raise ValueError("FramePool size must be >= 1")
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(size)]
+        self._index = {id(buf): i for i, buf in enumerate(self.buffers)}
+        self._refcount = [0] * size
+        self._free = list(range(size - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a free buffer (reference count 1), or None if all buffers are in use.
+        """
+        with self._lock:
+            if not self._free:
+                return None
+            i = self._free.pop()
+            self._refcount[i] = 1
+            return self.buffers[i]
+
+    def retain(self, buf):
+        """
+        Add a reference to a buffer that is already in use.
+        """
+        i = self._index[id(buf)]
+        with self._lock:
+            if self._refcount[i] == 0:
+                raise ValueError("retain() on a buffer that is not acquired")
+            self._refcount[i] += 1
+
+    def release(self, buf):
+        """
+        Drop a reference. The buffer goes back to the free list when the last
+        reference is released.
+        """
+        i = self._index[id(buf)]
+        with self._lock:
+            if self._refcount[i] == 0:
+                raise ValueError("release() on a buffer that is not acquired")
+            self._refcount[i] -= 1
+            if self._refcount[i] == 0:
+                self._free.append(i)
+
+    def available(self):
+        with self._lock:
+            return len(self._free)
+
+
+class LumaFrame(np.ndarray):
+    """
+    Single-channel (H, W) luma frame that remembers the raw camera buffer it
+    came from. `bgr()` converts that buffer to colour on first use and caches
+    it, so the colour image is only produced when something asks for it.
+    Arrays derived from a LumaFrame (slices, copies) have no colour source.
+    """
+
+    def __array_finalize__(self, obj):
+        self.raw = None
+        self.pixel_format = None
+        self._bgr = None
+
+    def bgr(self):
+        """
+        The full frame as BGR (H, W, 3), converted once and cached.
+        """
+        if self._bgr is None:
+            if self.raw is None:
+                raise ValueError("LumaFrame has no raw buffer to convert to colour")
+            if self.pixel_format == "yuyv":
+                self._bgr = cv2.cvtColor(self.raw, cv2.COLOR_YUV2BGR_YUYV)
+            elif self.pixel_format == "yuv420":
+                self._bgr = cv2.cvtColor(self.raw, cv2.COLOR_YUV2BGR_I420)
+            else:
+                self._bgr = cv2.imdecode(self.raw, cv2.IMREAD_COLOR)
+        return self._bgr
+
+
+def luma_frame(raw, pixel_format, width, height):
+    """
+    Wrap a raw camera buffer as a LumaFrame.
+      yuyv:   Y is every other byte of the packed buffer, returned as a view
+      yuv420: Y is the first plane of the planar buffer, returned as a view
+      mjpeg:  the JPEG is decoded to grayscale only (no chroma upsampling or
+              colour conversion); colour is decoded on demand
+    """
+    if pixel_format == "mjpeg":
+        raw = raw.reshape(-1)
+        luma = cv2.imdecode(raw, cv2.IMREAD_GRAYSCALE)
+        if luma is None:
+            raise RuntimeError("Could not decode MJPEG frame.")
+    else:
+        if pixel_format == "yuyv":
+            shape = (height, width, 2)
+        else:
+            shape = (height * 3 // 2, width)
+        if raw.size != shape[0] * shape[1] * (shape[2] if len(shape) == 3 else 1):
+            raise RuntimeError(
+                f"Camera delivered {raw.size} bytes, expected {pixel_format} {width}x{height}")
+        raw = raw.reshape(shape)
+        luma = raw[:, :, 0] if pixel_format == "yuyv" else raw[:height]
+    frame = luma.view(LumaFrame)
+    frame.raw = raw
+    frame.pixel_format = pixel_format
+    return frame
+
 
 class CameraModule:
-    def __init__(self, camera_index=0, width=640, height=480):
-        self.capture = cv2.VideoCapture(camera_index)
-        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        if not self.capture.isOpened():
-            raise RuntimeError(f"Could not open camera index {camera_index}")
+    """
+    Camera capture on top of a frame_sources backend: OpenCV's VideoCapture
+    by default, or Picamera2, a file or synthetic frames (`backend`), or any
+    FrameSource passed as `source`. `self.source.stats` has the delivered
+    fps and per-frame latency.
 
-    def get_frame(self):
-        ret, frame = self.capture.read()
+    By default `get_frame()` reads synchronously from the camera. With
+    `threaded=True`, a background thread keeps grabbing frames into a small
+    ring and `get_frame()` returns the newest one immediately. Older frames
+    are dropped rather than queued, so the caller never works on a stale
+    buffered frame.
+
+    With `pixel_format` other than "bgr", the camera is asked for its native
+    YUYV / YUV420 / MJPEG stream without OpenCV's BGR conversion and frames
+    are returned as (H, W) LumaFrames: the Y plane, with the colour image
+    computed lazily by `frame.bgr()`. Motion detection only needs luma.
+
+    With `pool_size > 0`, frames are decoded into a `FramePool` of
+    preallocated buffers instead of a fresh array per read. Use
+    `acquire_frame()` / `release_frame()` for explicit ownership; `get_frame()`
+    still works and keeps its frame valid until the next `get_frame()` call.
+    """
+
+    def __init__(self, camera_index=0, width=640, height=480,
+                 threaded=False, ring_size=2, pool_size=0, pixel_format="bgr",
+                 backend="opencv", source=None):
+        """
+        :param camera_index: Camera index (or a video file path for "opencv" / "file").
+        :param width, height: Requested capture resolution.
+        :param threaded: Capture on a background thread, keep only the newest frames.
+        :param ring_size: Number of most recent frames kept by the capture thread.
+        :param pool_size: Number of preallocated frame buffers (0 disables the pool).
+                          In threaded mode this must be at least ring_size + 2.
+        :param pixel_format: "bgr", or "yuyv", "yuv420" or "mjpeg" for luma-only
+                             LumaFrames (no frame pool); the backend must support it.
+        :param backend: "opencv", "picamera2", "file" or "synthetic" (see frame_sources).
+        :param source: FrameSource to use instead of creating one from `backend`.
+        """
+        if pixel_format != "bgr" and pool_size > 0:
+            raise ValueError("pool_size requires pixel_format='bgr'")
+        if source is None:
+            source = open_source(backend, camera_index, width, height, pixel_format)
+        elif not isinstance(source, FrameSource):
+            raise ValueError("source must be a frame_sources.FrameSource")
+        elif source.pixel_format != pixel_format:
+            raise ValueError(f"source delivers {source.pixel_format}, not {pixel_format}")
+        self.source = source
+        self.threaded = threaded
+        self.pixel_format = pixel_format
+        self.width = source.width
+        self.height = source.height
+
+        self.pool = None
+        self._held = None  # pool buffer returned by the last get_frame()
+        if pool_size > 0:
+            if threaded and pool_size < ring_size + 2:
+                raise ValueError("pool_size must be >= ring_size + 2 in threaded mode")
+            self.pool = FramePool(pool_size, (self.height, self.width, 3))
+
+        # Metadata of the frame most recently returned by get_frame()
+        self.last_timestamp = None
+        self.last_seq = -1
+
+        if threaded:
+            if ring_size < 1:
+                raise ValueError("ring_size must be >= 1")
+            # Ring of (frame, timestamp, seq); only the newest entry is ever handed out
+            self._ring = [None] * ring_size
+            self._ring_head = -1
+            self._seq = 0
+            self._error = None
+            self._cond = threading.Condition()
+            self._running = True
+            self._thread = threading.Thread(target=self._capture_loop,
+                                            name="camera-capture", daemon=True)
+            self._thread.start()
+
+    def _read_into_pool(self, buf):
+        """
+        Decode the next frame directly into a pool buffer.
+        """
+        ret, frame = self.source.read(buf)
+        if ret and frame is not buf:
+            raise RuntimeError(
+                f"Camera delivered {frame.shape} frames, pool buffers are {buf.shape}")
+        return ret
+
+    def _read(self):
+        """
+        Read the next frame without a pool: BGR, or a LumaFrame in native formats.
+        """
+        ret, frame = self.source.read()
+        if ret and self.pixel_format != "bgr":
+            frame = luma_frame(frame, self.pixel_format, self.width, self.height)
+        return ret, frame
+
+    def _capture_loop(self):
+        """
+        Background thread: grab frames as fast as the camera delivers them and
+        overwrite the oldest ring slot. Never blocks on the consumer.
+        """
+        ring_size = len(self._ring)
+        pool = self.pool
+        while self._running:
+            if pool is None:
+                try:
+                    ret, frame = self._read()
+                except RuntimeError as e:
+                    ret, self._error = False, e
+            else:
+                frame = pool.acquire()
+                if frame is None:
+                    # Consumer is holding every spare buffer: drain the camera
+                    # without decoding so we don't fall behind.
+                    ret = self.source.grab()
+                    if ret:
+                        continue
+                else:
+                    try:
+                        ret = self._read_into_pool(frame)
+                    except RuntimeError as e:
+                        ret, self._error = False, e
+                    if not ret:
+                        pool.release(frame)
+            timestamp = time.monotonic()
+            with self._cond:
+                if not ret:
+                    if self._error is None:
+                        self._error = RuntimeError("Failed to read from camera.")
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                self._ring_head = (self._ring_head + 1) % ring_size
+                old = self._ring[self._ring_head]
+                self._ring[self._ring_head] = (frame, timestamp, self._seq)
+                self._seq += 1
+                self._cond.notify_all()
+            if pool is not None and old is not None:
+                # The ring's reference to the overwritten frame
+                pool.release(old[0])
+
+    def get_frame_info(self, timeout=1.0, newer_than=None):
+        """
+        Return (frame, timestamp, seq) for the newest captured frame.
+        `timestamp` is time.monotonic() at capture and `seq` increases by one per
+        captured frame, so a gap in `seq` tells the caller how many frames were dropped.
+        In threaded mode this only waits if no frame has been captured yet, or,
+        with `newer_than=seq`, until a frame after that one has been captured
+        (so a consumer faster than the camera never gets the same frame twice).
+        Synchronous reads always return a new frame.
+        In pool mode the frame stays valid until the next get_frame_info() call.
+        """
+        if self.pool is not None:
+            result = self.acquire_frame(timeout, newer_than)
+            if self._held is not None:
+                self.pool.release(self._held)
+            self._held = result[0]
+            return result
+
+        if not self.threaded:
+            ret, frame = self._read()
+            if not ret:
+                raise RuntimeError("Failed to read from camera.")
+            self.last_timestamp = time.monotonic()
+            self.last_seq += 1
+            return frame, self.last_timestamp, self.last_seq
+
+        return self._latest(timeout, retain=False, newer_than=newer_than)
+
+    def acquire_frame(self, timeout=1.0, newer_than=None):
+        """
+        Pool mode: return (buffer, timestamp, seq) for the newest frame. The caller
+        owns a reference to `buffer` and must hand it back with release_frame().
+        `newer_than` as in get_frame_info().
+        """
+        if self.pool is None:
+            raise RuntimeError("acquire_frame() requires pool_size > 0")
+
+        if self.threaded:
+            return self._latest(timeout, retain=True, newer_than=newer_than)
+
+        buf = self.pool.acquire()
+        if buf is None:
+            raise RuntimeError("Frame pool exhausted; release frames before acquiring more.")
+        try:
+            ret = self._read_into_pool(buf)
+        except RuntimeError:
+            self.pool.release(buf)
+            raise
         if not ret:
+            self.pool.release(buf)
             raise RuntimeError("Failed to read from camera.")
+        self.last_timestamp = time.monotonic()
+        self.last_seq += 1
+        return buf, self.last_timestamp, self.last_seq
+
+    def release_frame(self, frame):
+        """
+        Return a buffer obtained from acquire_frame() to the pool.
+        """
+        self.pool.release(frame)
+
+    def _latest(self, timeout, retain, newer_than=None):
+        """
+        Threaded mode: newest ring entry (captured after `newer_than`, if
+        given), optionally retaining its pool buffer.
+        """
+        def ready():
+            if self._error is not None:
+                return True
+            if self._ring_head < 0:
+                return False
+            return newer_than is None or self._ring[self._ring_head][2] > newer_than
+
+        with self._cond:
+            if not ready():
+                self._cond.wait_for(ready, timeout=timeout)
+            if self._error is not None:
+                raise self._error
+            if self._ring_head < 0:
+                raise RuntimeError("Timed out waiting for first camera frame.")
+            if not ready():
+                raise RuntimeError("Timed out waiting for a new camera frame.")
+            frame, timestamp, seq = self._ring[self._ring_head]
+            if retain:
+                self.pool.retain(frame)
+
+        self.last_timestamp = timestamp
+        self.last_seq = seq
+        return frame, timestamp, seq
+
+    def get_frame(self):
+        frame, _, _ = self.get_frame_info()
         return frame
 
     def release(self):
-        if self.capture.isOpened():
-            self.capture.release()
+        if self.threaded and self._running:
+            self._running = False
+            self._thread.join(timeout=1.0)
+        self.source.release()
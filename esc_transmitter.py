@@ -0,0 +1,156 @@
+# esc_transmitter.py
+import threading
+import time
+
+PACKET_START = 0xAA
+PACKET_SIZE = 6
+
+def map_duty_to_value(duty, in_min=5, in_max=10, out_min=0, out_max=255):
+    """
+    Maps a duty cycle (in %) to a value between out_min and out_max.
+    For example, duty=5 (zero throttle) -> 0, duty=10 (full throttle) -> 255.
+    """
+    return int((duty - in_min) * (out_max - out_min) / (in_max - in_min) + out_min)
+
+def encode_packet(packet, ch1, ch2, ch3, ch4):
+    """
+    Fill a 6-byte buffer with [0xAA, ch1, ch2, ch3, ch4, checksum] in place;
+    the checksum is the sum of the previous bytes modulo 256.
+    """
+    packet[0] = PACKET_START
+    packet[1] = ch1
+    packet[2] = ch2
+    packet[3] = ch3
+    packet[4] = ch4
+    packet[5] = (PACKET_START + ch1 + ch2 + ch3 + ch4) & 0xFF
+    return packet
+
+class ESCTransmitter:
+    """
+    Sends 4-channel ESC command packets ([0xAA, ch1..ch4, checksum], see
+    ibus2.py) over a UART without blocking the caller.
+
+    `send()` only stores the values in a latest-value slot. A writer thread
+    encodes the newest values into a preallocated packet and writes it, at
+    most `max_rate_hz` times per second; commands that arrive faster are
+    coalesced (only the newest one is sent). With `threaded=False`, `send()`
+    writes immediately instead (for scripts).
+
+    TX statistics: commands, packets, bytes, coalesced, errors,
+    max_write_time, total_write_time; `summary()` formats them.
+    """
+
+    def __init__(self, port='/dev/serial0', baud=115200, max_rate_hz=100.0, threaded=True,
+                 ser=None):
+        """
+        :param port: Serial device.
+        :param baud: Baud rate.
+        :param max_rate_hz: Maximum packets per second (None or 0 = unlimited).
+        :param threaded: Write from a background thread (send() never blocks).
+        :param ser: Already-open serial-like object (port/baud are then ignored).
+        """
+        if ser is None:
+            import serial
+            ser = serial.Serial(port, baud, timeout=1)
+        self.ser = ser
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz else 0.0
+        self.packet = bytearray(PACKET_SIZE)
+
+        self.commands = 0
+        self.packets = 0
+        self.bytes = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_error = None
+        self.max_write_time = 0.0
+        self.total_write_time = 0.0
+        self.last_send_time = None
+
+        self._pending = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = threaded
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._writer_loop, name="esc-tx", daemon=True)
+            self._thread.start()
+
+    def send(self, ch1, ch2, ch3, ch4):
+        """
+        Queue a command (each channel 0..255); replaces any command not yet sent.
+        """
+        for value in (ch1, ch2, ch3, ch4):
+            if not 0 <= value <= 255:
+                raise ValueError("channel values must be in 0..255")
+        self.commands += 1
+        if self._thread is None:
+            self._write(ch1, ch2, ch3, ch4)
+            return
+        # The lock only guards the slot, never a write, so this does not block
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (ch1, ch2, ch3, ch4)
+        self._wake.set()
+
+    def _write(self, ch1, ch2, ch3, ch4):
+        encode_packet(self.packet, ch1, ch2, ch3, ch4)
+        t0 = time.monotonic()
+        try:
+            written = self.ser.write(self.packet)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = e
+            return
+        elapsed = time.monotonic() - t0
+        self.packets += 1
+        self.bytes += PACKET_SIZE if written is None else written
+        self.total_write_time += elapsed
+        if elapsed > self.max_write_time:
+            self.max_write_time = elapsed
+        self.last_send_time = t0
+
+    def _writer_loop(self):
+        while self._running:
+            if not self._wake.wait(timeout=0.1):
+                continue
+            if self.last_send_time is not None and self.min_interval:
+                delay = self.last_send_time + self.min_interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self._wake.clear()
+            with self._lock:
+                values = self._pending
+                self._pending = None
+            if values is not None:
+                self._write(*values)
+
+    def flush(self, timeout=1.0):
+        """
+        Wait until every queued command has been written (or coalesced).
+        Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while self.packets + self.errors + self.coalesced < self.commands:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def summary(self):
+        mean = self.total_write_time / self.packets if self.packets else 0.0
+        return (f"{self.commands} commands, {self.packets} packets ({self.bytes} bytes), "
+                f"{self.coalesced} coalesced, {self.errors} errors, "
+                f"write mean {mean * 1e3:.3f} ms / max {self.max_write_time * 1e3:.3f} ms")
+
+    def close(self):
+        """
+        Send the last pending command, stop the writer and close the port.
+        """
+        if self._thread is not None:
+            self.flush()
+            self._running = False
+            self._wake.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.ser.close()
@@ -0,0 +1,364 @@
+# frame_sources.py
+"""
+Frame-source backends for CameraModule. Each backend delivers frames with
+VideoCapture-style `read(out=None) -> (ret, frame)`, where `out` is an
+optional preallocated buffer to fill, and keeps FrameSourceStats:
+
+  OpenCVSource      cv2.VideoCapture (camera index or video file)
+  Picamera2Source   Raspberry Pi camera through Picamera2 requests
+  FileSource        .npy frame stack or video file, optionally paced
+  SyntheticSource   generated moving-disc frames, optionally paced
+
+    camera = CameraModule(backend="picamera2", threaded=True)
+    ...
+    print(camera.source.stats.summary())
+
+OpenCV and NumPy (and picamera2) are imported when a backend is created.
+"""
+import collections
+import time
+
+from instrumentation import LatencyHistogram
+
+BACKENDS = ("opencv", "picamera2", "file", "synthetic")
+
+
+class FrameSourceStats:
+    """
+    Delivered frame rate and per-frame latency of a frame source.
+      latency    capture -> delivered by read(), for backends that know when
+                 the frame was captured; otherwise the time spent in read()
+      read_time  time spent in read() (waiting for the frame plus decode/copy)
+    The frame rate is measured over the last `window` frames.
+    """
+
+    def __init__(self, window=60):
+        self.frames = 0
+        self.latency = LatencyHistogram()
+        self.read_time = LatencyHistogram()
+        self._delivered = collections.deque(maxlen=window)
+
+    def record(self, delivered, read_time, latency):
+        self.frames += 1
+        self.read_time.record(read_time)
+        self.latency.record(latency)
+        self._delivered.append(delivered)
+
+    def fps(self):
+        if len(self._delivered) < 2:
+            return 0.0
+        elapsed = self._delivered[-1] - self._delivered[0]
+        return (len(self._delivered) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.frames} frames at {self.fps():.1f} fps, latency "
+                f"mean {self.latency.mean() * 1e3:.2f} ms / p99 "
+                f"{self.latency.percentile(99) * 1e3:.2f} ms, read mean "
+                f"{self.read_time.mean() * 1e3:.2f} ms")
+
+
+class FrameSource:
+    """
+    Base class. Subclasses set `width`, `height` and `pixel_format` and
+    implement `_read(out)`, returning (frame, capture_time) or None when no
+    frame could be read. `capture_time` is time.monotonic() at capture, or
+    None if the backend cannot tell.
+    """
+
+    pixel_formats = ("bgr",)
+
+    def __init__(self, pixel_format="bgr", fps=None):
+        """
+        :param pixel_format: Requested format; see the backend's pixel_formats.
+        :param fps: Pace delivery to at most this rate (file and synthetic sources).
+        """
+        if pixel_format not in self.pixel_formats:
+            raise ValueError(f"{type(self).__name__} supports pixel_format "
+                             f"{', '.join(self.pixel_formats)}")
+        self.pixel_format = pixel_format
+        self.period = 1.0 / fps if fps else 0.0
+        self._next_time = time.monotonic()
+        self.stats = FrameSourceStats()
+
+    def read(self, out=None):
+        """
+        Next frame as (ret, frame). With `out`, the frame is written into that
+        buffer where the backend can (check `frame is out`).
+        """
+        t0 = time.monotonic()
+        result = self._read(out)
+        t1 = time.monotonic()
+        if result is None:
+            return False, None
+        frame, capture_time = result
+        self.stats.record(t1, t1 - t0, t1 - (t0 if capture_time is None else capture_time))
+        return True, frame
+
+    def grab(self):
+        """
+        Skip one frame without handing it out. Returns False on failure.
+        """
+        return self._read(None) is not None
+
+    def _pace(self):
+        """
+        Sleep until the next frame is due at `fps`; returns its due time.
+        """
+        now = time.monotonic()
+        if not self.period:
+            return now
+        delay = self._next_time - now
+        if delay > 0:
+            time.sleep(delay)
+        due = self._next_time
+        self._next_time = max(self._next_time + self.period, time.monotonic())
+        return max(due, now)
+
+    def _read(self, out):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+# V4L2 fourcc requested from the camera for each pixel_format
+FOURCC = {
+    "bgr": None,
+    "yuyv": "YUYV",
+    "yuv420": "YU12",
+    "mjpeg": "MJPG",
+}
+
+
+class OpenCVSource(FrameSource):
+    """
+    cv2.VideoCapture. With a pixel_format other than "bgr" the camera is
+    asked for that fourcc and frames are its raw buffers (no BGR conversion).
+    """
+
+    pixel_formats = tuple(FOURCC)
+
+    def __init__(self, camera_index=0, width=640, height=480, pixel_format="bgr"):
+        """
+        :param camera_index: OpenCV camera index (or a video file path).
+        :param width, height: Requested capture resolution.
+        """
+        import cv2
+        super().__init__(pixel_format)
+        self.capture = cv2.VideoCapture(camera_index)
+        fourcc = FOURCC[pixel_format]
+        if fourcc is not None:
+            self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Could not open camera index {camera_index}")
+        if fourcc is not None:
+            # Hand out the camera's own buffer instead of a BGR conversion
+            if not self.capture.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+                raise RuntimeError(f"Camera backend cannot deliver raw {pixel_format} frames")
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or width
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or height
+
+    def _read(self, out):
+        ret, frame = self.capture.read(out) if out is not None else self.capture.read()
+        return (frame, None) if ret else None
+
+    def grab(self):
+        return self.capture.grab()
+
+    def release(self):
+        if self.capture.isOpened():
+            self.capture.release()
+
+
+class Picamera2Source(FrameSource):
+    """
+    Raspberry Pi camera through Picamera2's request API. Each read takes one
+    completed request, copies the mapped "main" buffer straight into the
+    destination (the caller's `out` buffer, e.g. a FramePool buffer) and
+    hands the request back to the camera. capture_array() instead makes an
+    extra array per frame; here a pooled camera allocates nothing and copies
+    each frame once, which is the minimum since the camera reuses its buffer.
+
+    Picamera2's "RGB888" is B, G, R in memory, i.e. OpenCV's BGR; "yuv420"
+    delivers the planar YUV420 buffer for luma-only capture.
+    Capture time comes from the request's SensorTimestamp (CLOCK_MONOTONIC).
+    """
+
+    pixel_formats = ("bgr", "yuv420")
+    _FORMATS = {"bgr": "RGB888", "yuv420": "YUV420"}
+
+    def __init__(self, camera_num=0, width=640, height=480, pixel_format="bgr",
+                 buffer_count=4, picam2=None):
+        """
+        :param camera_num: Picamera2 camera number.
+        :param buffer_count: Camera buffers in the video configuration.
+        :param picam2: Already created Picamera2 object (it is configured and started here).
+        """
+        from picamera2 import MappedArray, Picamera2
+        super().__init__(pixel_format)
+        self._mapped_array = MappedArray
+        self.picam2 = picam2 if picam2 is not None else Picamera2(camera_num)
+        config = self.picam2.create_video_configuration(
+            main={"size": (width, height), "format": self._FORMATS[pixel_format]},
+            buffer_count=buffer_count)
+        self.picam2.configure(config)
+        self.width, self.height = config["main"]["size"]
+        self.picam2.start()
+        self._started = True
+
+    def _read(self, out):
+        import numpy as np
+
+        request = self.picam2.capture_request()
+        try:
+            with self._mapped_array(request, "main") as mapped:
+                if out is None:
+                    out = np.empty(mapped.array.shape, dtype=mapped.array.dtype)
+                elif out.shape != mapped.array.shape:
+                    # Let the caller see the mismatch (frame is not out)
+                    return mapped.array.copy(), None
+                np.copyto(out, mapped.array)
+            timestamp = request.get_metadata().get("SensorTimestamp")
+        finally:
+            request.release()
+        return out, (timestamp / 1e9 if timestamp else None)
+
+    def grab(self):
+        self.picam2.capture_request().release()
+        return True
+
+    def release(self):
+        if self._started:
+            self._started = False
+            self.picam2.stop()
+            self.picam2.close()
+
+
+class FileSource(FrameSource):
+    """
+    Frames from a .npy stack of shape (N, H, W, C) (memory-mapped, returned
+    without a copy unless `out` is given) or any video file OpenCV can
+    decode. Capture time is when the frame was due at `fps`.
+    """
+
+    def __init__(self, path, fps=None, loop=True, pixel_format="bgr"):
+        """
+        :param path: .npy frame stack or video file.
+        :param fps: Deliver at most this many frames per second (None = as fast as possible).
+        :param loop: Rewind at the end instead of stopping.
+        """
+        import os
+        super().__init__(pixel_format, fps)
+        self.path = path
+        self.loop = loop
+        if path.endswith(".npy"):
+            import numpy as np
+            self._frames = np.load(path, mmap_mode="r")
+            if self._frames.ndim != 4:
+                raise ValueError(f"{path}: expected (N, H, W, C) frames, got {self._frames.shape}")
+            self._capture = None
+            self._index = 0
+            self.height, self.width = self._frames.shape[1:3]
+        else:
+            import cv2
+            if not os.path.exists(path):
+                raise RuntimeError(f"Could not open video file {path}")
+            self._frames = None
+            self._capture = cv2.VideoCapture(path)
+            if not self._capture.isOpened():
+                raise RuntimeError(f"Could not open video file {path}")
+            self.width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def _read(self, out):
+        due = self._pace()
+        if self._capture is None:
+            if self._index >= len(self._frames):
+                if not self.loop:
+                    return None
+                self._index = 0
+            frame = self._frames[self._index]
+            self._index += 1
+            if out is not None and out.shape == frame.shape:
+                out[...] = frame
+                frame = out
+            return frame, due
+
+        ret, frame = self._capture.read(out) if out is not None else self._capture.read()
+        if not ret and self.loop:
+            import cv2
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._capture.read(out) if out is not None else self._capture.read()
+        return (frame, due) if ret else None
+
+    def release(self):
+        if self._capture is not None and self._capture.isOpened():
+            self._capture.release()
+
+
+class SyntheticSource(FrameSource):
+    """
+    A disc moving over a static noisy background, generated per frame: no
+    camera or files needed. `centre(i)` is the disc centre in frame i.
+    Capture time is when the frame was due at `fps`.
+    """
+
+    def __init__(self, width=640, height=480, fps=None, count=None, radius=None,
+                 seed=0, color=(200, 50, 50), pixel_format="bgr"):
+        """
+        :param count: Stop after this many frames (None = endless).
+        :param radius: Disc radius (default width // 21).
+        :param color: BGR disc colour.
+        """
+        import numpy as np
+        super().__init__(pixel_format, fps)
+        self.width = width
+        self.height = height
+        self.count = count
+        self.color = color
+        self.radius = radius or max(4, width // 21)
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+        self.index = 0
+
+    def centre(self, i):
+        import math
+        margin = 3 * self.radius
+        x = margin + (i * max(1, self.width // 160)) % max(1, self.width - 2 * margin)
+        y = int(self.height / 2 + self.height / 8 * math.sin(i / 15.0))
+        return x, y
+
+    def _read(self, out):
+        import cv2
+
+        if self.count is not None and self.index >= self.count:
+            return None
+        due = self._pace()
+        if out is None or out.shape != self.background.shape:
+            out = self.background.copy()
+        else:
+            out[...] = self.background
+        cv2.circle(out, self.centre(self.index), self.radius, self.color, -1)
+        self.index += 1
+        return out, due
+
+
+def open_source(backend="opencv", source=0, width=640, height=480, pixel_format="bgr",
+                fps=None):
+    """
+    Create a frame source by backend name.
+    :param source: Camera index (opencv, picamera2) or file path (file; opencv also
+                   accepts video paths). Unused for synthetic.
+    :param fps: Pacing for the file and synthetic backends.
+    """
+    if backend == "opencv":
+        return OpenCVSource(source, width, height, pixel_format)
+    if backend == "picamera2":
+        return Picamera2Source(int(source), width, height, pixel_format)
+    if backend == "file":
+        return FileSource(str(source), fps=fps, pixel_format=pixel_format)
+    if backend == "synthetic":
+        return SyntheticSource(width, height, fps=fps, pixel_format=pixel_format)
+    raise ValueError(f"backend must be one of {', '.join(BACKENDS)}")
@@ -0,0 +1,145 @@
+# governor.py
+import time
+from collections import deque
+
+class FrameBudgetGovernor:
+    """
+    Keeps RobotDetector inside a per-frame time budget by stepping through a
+    ladder of quality levels. Each level is (scale, morph_iterations, skip_every):
+      - scale:            detector processing scale
+      - morph_iterations: detector close/dilate iterations
+      - skip_every:       skip detection on every Nth camera frame (0 = never)
+
+    Feed it the measured detect_robot() time of every processed frame with
+    `observe()`, and ask `should_skip()` before each frame. Skipped frames
+    count as zero cost, so the budget is compared against the average
+    detection time per camera frame over the last `window` frames.
+
+    Hysteresis: it degrades as soon as a full window is over budget, but only
+    restores a level after `upgrade_hold` seconds below `headroom * budget`.
+    Every level change is appended to `decisions` as
+    (time, old_level, new_level, average_ms).
+
+    A scale change makes MOG2 re-learn its background from scratch (the
+    detector reports warming_up() meanwhile), so the default ladder uses up
+    the morphology and frame-skip steps before it changes the scale.
+    """
+
+    LEVELS = (
+        (1.0, 2, 0),
+        (1.0, 1, 0),
+        (1.0, 1, 3),
+        (1.0, 1, 2),
+        (0.5, 1, 0),
+        (0.5, 1, 2),
+        (0.25, 1, 2),
+    )
+
+    def __init__(self, detector, budget, levels=None, window=15, headroom=0.6,
+                 upgrade_hold=2.0, verbose=False, clock=time.monotonic):
+        """
+        :param detector: RobotDetector to adjust (via set_quality()).
+        :param budget: Detection time budget per camera frame, in seconds.
+        :param levels: Quality ladder, best first; defaults to LEVELS.
+        :param window: Number of frames averaged per decision.
+        :param headroom: Fraction of the budget the average must stay under to upgrade.
+        :param upgrade_hold: Seconds of headroom required before each upgrade.
+        :param verbose: Print each level change.
+        :param clock: Injectable time source, for simulation.
+        """
+        if budget <= 0:
+            raise ValueError("budget must be positive")
+        self.detector = detector
+        self.budget = budget
+        self.levels = tuple(self.LEVELS if levels is None else levels)
+        if not self.levels:
+            raise ValueError("levels must not be empty")
+        self.window = window
+        self.headroom = headroom
+        self.upgrade_hold = upgrade_hold
+        self.verbose = verbose
+        self.clock = clock
+        self.samples = deque(maxlen=window)
+        self.decisions = []
+        self.frames = 0
+        self.skipped = 0
+        self.level = 0
+        self._apply(0)
+        now = clock()
+        self._level_since = now
+        self._headroom_since = None
+        self.time_at_level = [0.0] * len(self.levels)
+
+    def _apply(self, level):
+        scale, morph_iterations, _ = self.levels[level]
+        self.detector.set_quality(scale=scale, morph_iterations=morph_iterations)
+        self.level = level
+
+    @property
+    def skip_every(self):
+        return self.levels[self.level][2]
+
+    def should_skip(self):
+        """
+        True if detection should be skipped on this camera frame. Call once
+        per frame; skipped frames are recorded as zero-cost samples.
+        """
+        self.frames += 1
+        n = self.skip_every
+        if n and self.frames % n == 0:
+            self.skipped += 1
+            self.samples.append(0.0)
+            return True
+        return False
+
+    def observe(self, detect_time):
+        """
+        Record the detect_robot() time (seconds) of a processed frame and
+        adjust the level. Returns the new level if it changed, else None.
+        """
+        self.samples.append(detect_time)
+        if len(self.samples) < self.window:
+            return None
+        average = sum(self.samples) / len(self.samples)
+        now = self.clock()
+
+        if average > self.budget:
+            self._headroom_since = None
+            if self.level + 1 < len(self.levels):
+                return self._change(self.level + 1, average, now)
+            return None
+
+        if average < self.budget * self.headroom and self.level > 0:
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= self.upgrade_hold:
+                return self._change(self.level - 1, average, now)
+        else:
+            self._headroom_since = None
+        return None
+
+    def _change(self, level, average, now):
+        old = self.level
+        self.time_at_level[old] += now - self._level_since
+        self._level_since = now
+        self._headroom_since = None
+        self._apply(level)
+        # Judge the new level on its own samples only
+        self.samples.clear()
+        self.decisions.append((now, old, level, average * 1e3))
+        if self.verbose:
+            scale, morph_iterations, skip_every = self.levels[level]
+            print(f"governor: level {old} -> {level} (avg {average * 1e3:.1f} ms, "
+                  f"budget {self.budget * 1e3:.1f} ms): scale {scale}, "
+                  f"morph {morph_iterations}, skip every {skip_every or '-'}")
+        return level
+
+    def summary(self):
+        times = list(self.time_at_level)
+        times[self.level] += self.clock() - self._level_since
+        total = sum(times) or 1.0
+        degrades = sum(1 for _, old, new, _ in self.decisions if new > old)
+        shares = ", ".join(f"L{i} {100.0 * t / total:.0f}%" for i, t in enumerate(times) if t > 0)
+        return (f"level {self.level}, {degrades} degrades, "
+                f"{len(self.decisions) - degrades} upgrades, "
+                f"{self.skipped}/{self.frames} frames skipped; time at level: {shares}")
@@ -1,6 +1,13 @@
 import serial
+import threading
 import time
 import struct
+from collections import namedtuple
+
+# Channel values of one decoded frame, when it was decoded (time.monotonic())
+# and the running count of valid frames. Published as a single object so
+# readers never see channels from two different frames.
+ChannelSnapshot = namedtuple('ChannelSnapshot', ['channels', 'timestamp', 'frame'])
 
 class IBUSReceiver:
     """
@@ -13,56 +20,152 @@ class IBUSReceiver:
       1) You must enable the Pi’s hardware UART (disable serial console, enable serial port).
       2) Connect the FlySky iBus signal line to the Pi's Rx pin (e.g. GPIO14 on older models).
          On the Pi 5, confirm which pins map to /dev/ttyAMA0 or /dev/ttyAMA2, etc.
-      3) This is a minimal example. Adjust or expand for reliability (e.g. ring buffer approach).
+      3) Incoming bytes go into a fixed-size buffer that is parsed in place:
+         headers are located with find(), frames are unpacked with a single
+         struct call, and only the newest valid frame of a backlog is decoded.
+      4) Either call update() from your loop, or start_reader() to have a
+         background thread block on the port and publish each frame as soon as
+         it arrives. Read values with get_channel()/get_snapshot() either way.
     """
 
     IBUS_FRAME_SIZE = 32  # Each iBus frame is 32 bytes total
     IBUS_HEADER = b'\x20\x40'  # Typical iBus packet header
+    IBUS_MAX_CHANNELS = 14
+    # Header, 14 little-endian channels, checksum
+    IBUS_STRUCT = struct.Struct('<2s14HH')
+    BUFFER_SIZE = 4096
 
-    def __init__(self, uart_port='/dev/ttyAMA0', baud=115200, num_channels=6):
+    def __init__(self, uart_port='/dev/ttyAMA0', baud=115200, num_channels=6, ser=None):
+        """
+        :param ser: Already-open serial-like object to read from instead of
+                    opening uart_port (e.g. a pty or a recorded stream).
+        """
         self.num_channels = num_channels
         # Store channel values in microseconds 1000..2000
         self.channels = [1500]*num_channels
 
-        # Open the serial port
-        self.ser = serial.Serial(
-            port=uart_port,
-            baudrate=baud,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_1,
-            bytesize=serial.EIGHTBITS,
-            timeout=0.02
-        )
+        if ser is None:
+            # Open the serial port
+            ser = serial.Serial(
+                port=uart_port,
+                baudrate=baud,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                bytesize=serial.EIGHTBITS,
+                timeout=0.02
+            )
+        self.ser = ser
         if not self.ser.is_open:
             raise IOError(f"Failed to open serial port {uart_port}")
 
-        # A small buffer to accumulate data read
-        self.buffer = bytearray()
+        # Fixed-size receive buffer; unparsed bytes live in buffer[start:end]
+        self.buffer = bytearray(self.BUFFER_SIZE)
+        self.start = 0
+        self.end = 0
+
+        # Parser statistics
+        self.frames_ok = 0
+        self.frames_bad = 0
+
+        # Newest decoded frame (timestamp None until the first valid frame)
+        self.snapshot = ChannelSnapshot(tuple(self.channels), None, 0)
+        self._reader = None
+        self._reader_running = False
+        # Callables run with each new ChannelSnapshot (see add_listener)
+        self._listeners = ()
 
     def update(self):
         """
         Poll serial for new data, parse any complete iBus frames.
         Store the last valid frame's channel values in self.channels.
         Call this frequently from your main loop (e.g. ~50+ times per second).
+        Returns True if a new valid frame was decoded.
+        Does nothing while the background reader is running.
         """
+        if self._reader_running:
+            return False
         # Read whatever is available
         data_in = self.ser.read(self.ser.in_waiting or 1)
         if data_in:
-            self.buffer.extend(data_in)
-
-        # Try to find and parse complete 32-byte frames in the buffer
-        while len(self.buffer) >= self.IBUS_FRAME_SIZE:
-            # Look for the iBus header at the start
-            if self.buffer[0:2] == self.IBUS_HEADER:
-                # If we have at least 32 bytes, attempt to parse one frame
-                frame = self.buffer[:self.IBUS_FRAME_SIZE]
-                if self._check_checksum(frame):
-                    self._decode_frame(frame)
-                # Remove the first 32 bytes (parsed frame) from buffer
-                del self.buffer[:self.IBUS_FRAME_SIZE]
+            return self.feed(data_in)
+        return False
+
+    def feed(self, data):
+        """
+        Append raw bytes and parse every complete frame now in the buffer.
+        Only the newest valid frame is decoded. Returns True if one was found.
+        """
+        found = False
+        view = memoryview(data)
+        while len(view):
+            space = self.BUFFER_SIZE - self.end
+            if space == 0:
+                self._compact()
+                space = self.BUFFER_SIZE - self.end
+            chunk = view[:space]
+            self.buffer[self.end:self.end + len(chunk)] = chunk
+            self.end += len(chunk)
+            view = view[len(chunk):]
+            found = self._parse() or found
+        return found
+
+    def _compact(self):
+        """
+        Move the unparsed tail (less than one frame after _parse) to the front.
+        """
+        remaining = self.end - self.start
+        if remaining > self.BUFFER_SIZE - self.IBUS_FRAME_SIZE:
+            # A full buffer without a single frame: keep only the last partial frame
+            self.start = self.end - (self.IBUS_FRAME_SIZE - 1)
+            remaining = self.IBUS_FRAME_SIZE - 1
+        self.buffer[:remaining] = self.buffer[self.start:self.end]
+        self.start = 0
+        self.end = remaining
+
+    def _parse(self):
+        """
+        Scan buffer[start:end] for complete frames and decode the newest valid one.
+        """
+        buf = self.buffer
+        end = self.end
+        pos = self.start
+        newest = -1
+        while True:
+            idx = buf.find(self.IBUS_HEADER, pos, end)
+            if idx < 0:
+                # Keep a trailing 0x20 that may be the start of the next header
+                pos = end - 1 if end > pos and buf[end - 1] == self.IBUS_HEADER[0] else end
+                break
+            if idx + self.IBUS_FRAME_SIZE > end:
+                pos = idx  # incomplete frame, wait for more bytes
+                break
+            if self._check_checksum_at(idx):
+                newest = idx
+                self.frames_ok += 1
+                pos = idx + self.IBUS_FRAME_SIZE
             else:
-                # If no header, pop one byte and keep searching
-                self.buffer.pop(0)
+                # Header bytes inside noise: resync one byte further
+                self.frames_bad += 1
+                pos = idx + 1
+
+        if newest >= 0:
+            self._decode_frame(buf, newest)
+            self._publish()
+
+        if pos >= end:
+            self.start = self.end = 0
+        else:
+            self.start = pos
+        return newest >= 0
+
+    def _check_checksum_at(self, offset):
+        """
+        Checksum check for the frame starting at buffer[offset].
+        """
+        buf = self.buffer
+        chksum = sum(buf[offset:offset + 30]) & 0xFFFF
+        frame_sum = buf[offset + 30] | (buf[offset + 31] << 8)
+        return chksum == frame_sum
 
     def _check_checksum(self, frame):
         """
@@ -75,30 +178,89 @@ class IBUSReceiver:
         frame_sum = frame[30] | (frame[31] << 8)
         return (chksum == frame_sum)
 
-    def _decode_frame(self, frame):
+    def _decode_frame(self, frame, offset=0):
         """
-        Parse the channel data (14 channels x 2 bytes each = 28 bytes) from positions 2..29,
-        but we only store up to self.num_channels.
+        Unpack all 14 channels (little-endian 16-bit, positions 2..29) with one
+        struct call, but we only store up to self.num_channels.
         """
         # The first 2 bytes are header (0x20 0x40), next 28 bytes are channel data, last 2 are checksum
-        # Channels are little-endian 16-bit. Each channel is 2 bytes.
-        # Example: channel 0 is frame[2..4], channel 1 is frame[4..6], etc.
-        for ch_index in range(min(self.num_channels, 14)):
-            # Each channel: 2 bytes, little-endian
-            low = frame[2 + ch_index*2]
-            high = frame[3 + ch_index*2]
-            value = (high << 8) | low
-            # Typically iBus channel value is ~1000..2000
-            self.channels[ch_index] = value
+        values = self.IBUS_STRUCT.unpack_from(frame, offset)
+        n = min(self.num_channels, self.IBUS_MAX_CHANNELS)
+        # Typically iBus channel value is ~1000..2000
+        self.channels[:n] = values[1:1 + n]
+
+    def _publish(self):
+        """
+        Replace the snapshot with the freshly decoded channels in one assignment.
+        """
+        snapshot = ChannelSnapshot(tuple(self.channels), time.monotonic(), self.frames_ok)
+        self.snapshot = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+
+    def add_listener(self, callback):
+        """
+        Call `callback(snapshot)` on every newly decoded frame, on the thread
+        that decoded it (the reader thread when running). Keep it short.
+        """
+        self._listeners = self._listeners + (callback,)
+
+    def remove_listener(self, callback):
+        self._listeners = tuple(cb for cb in self._listeners if cb is not callback)
+
+    def start_reader(self):
+        """
+        Start a background thread that blocks on the serial port and parses
+        frames as soon as bytes arrive.
+        """
+        if self._reader_running:
+            return
+        self._reader_running = True
+        self._reader = threading.Thread(target=self._reader_loop, name="ibus-reader", daemon=True)
+        self._reader.start()
+
+    def stop_reader(self):
+        if self._reader_running:
+            self._reader_running = False
+            self._reader.join(timeout=1.0)
+            self._reader = None
+
+    def _reader_loop(self):
+        while self._reader_running:
+            try:
+                # Blocks for at most the port timeout when idle
+                data_in = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError):
+                if not self._reader_running:
+                    break
+                raise
+            if data_in:
+                self.feed(data_in)
+
+    def get_snapshot(self):
+        """
+        Newest ChannelSnapshot(channels, timestamp, frame).
+        """
+        return self.snapshot
+
+    def signal_age(self):
+        """
+        Seconds since the last valid frame, or infinity if none was received yet.
+        """
+        timestamp = self.snapshot.timestamp
+        if timestamp is None:
+            return float('inf')
+        return time.monotonic() - timestamp
 
     def get_channel(self, ch_index):
         """
         Return the channel value in the range [1000..2000], or a default 1500 if out of range.
         """
         if 0 <= ch_index < self.num_channels:
-            return self.channels[ch_index]
+            return self.snapshot.channels[ch_index]
         return 1500
 
     def close(self):
+        self.stop_reader()
         if self.ser and self.ser.is_open:
             self.ser.close()
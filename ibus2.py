@@ -1,5 +1,5 @@
-import serial
 import time
+from esc_transmitter import ESCTransmitter, map_duty_to_value
 
 # --- 1. Serial Port Setup ---
 # Use the UART TX pin on the Pi to send data.
@@ -7,37 +7,24 @@ SERIAL_PORT = '/dev/serial0'  # Update as needed for your Pi
 BAUD_RATE = 115200            # Choose a baud rate that FS-IA6B expects
 
 try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
+    # Synchronous writes: this script sends one packet at a time and sleeps.
+    # Control loops should use the default threaded transmitter instead.
+    transmitter = ESCTransmitter(SERIAL_PORT, BAUD_RATE, threaded=False)
 except Exception as e:
     print(f"Error opening serial port: {e}")
     exit(1)
 
 # --- 2. Mapping Function ---
-def map_duty_to_value(duty, in_min=5, in_max=10, out_min=0, out_max=255):
-    """
-    Maps a duty cycle (in %) to a value between out_min and out_max.
-    For example, duty=5 (zero throttle) -> 0, duty=10 (full throttle) -> 255.
-    """
-    return int((duty - in_min) * (out_max - out_min) / (in_max - in_min) + out_min)
+# map_duty_to_value() lives in esc_transmitter.py
 
 # --- 3. Packet Builder and Sender ---
 def send_esc_packet(ch1, ch2, ch3, ch4):
     """
-    Constructs a packet with:
-      [Start Byte, ch1, ch2, ch3, ch4, Checksum]
-    and sends it over the serial port.
+    Sends a [Start Byte, ch1, ch2, ch3, ch4, Checksum] packet
+    (built by ESCTransmitter in a preallocated buffer).
     """
-    packet = bytearray()
-    packet.append(0xAA)        # Start byte
-    packet.append(ch1)
-    packet.append(ch2)
-    packet.append(ch3)
-    packet.append(ch4)
-    # Checksum: simple sum modulo 256 of the previous bytes
-    checksum = (0xAA + ch1 + ch2 + ch3 + ch4) & 0xFF
-    packet.append(checksum)
-    ser.write(packet)
-    print(f"Sent packet: {[hex(b) for b in packet]}")
+    transmitter.send(ch1, ch2, ch3, ch4)
+    print(f"Sent packet: {[hex(b) for b in transmitter.packet]}")
 
 # --- 4. Main Control Routine (Calibration & Testing) ---
 try:
@@ -103,5 +90,5 @@ try:
 except KeyboardInterrupt:
     print("Operation interrupted by user.")
 finally:
-    ser.close()
+    transmitter.close()
     print("Serial port closed.")
@@ -0,0 +1,252 @@
+# ibus_capture.py
+"""
+Bulk decoder for raw iBus UART captures (e.g. `cat /dev/ttyAMA0 > capture.bin`).
+
+Decodes a whole capture with NumPy instead of one frame at a time:
+  1) find every 0x20 0x40 header with one vectorized comparison
+  2) verify all candidate checksums at once from a cumulative byte sum
+  3) gather the 14 channels of every candidate into an (N, 14) array
+
+Frames follow the same rules as IBUSReceiver: checksum = sum of the first
+30 bytes & 0xFFFF, and header bytes inside an accepted frame are not
+candidates. Usage:
+    capture = decode_capture(load_capture("capture.bin"),
+                             chunk_times=load_chunk_times("capture.bin"))
+    good = capture.channels[capture.valid]
+    print(format_stats(capture.stats))
+or from the shell: python ibus_capture.py capture.bin [--csv frames.csv]
+
+A raw byte stream does not show when the receiver went silent, so
+dropouts need arrival times: record_capture() (or
+`python ibus_capture.py capture.bin --record /dev/ttyAMA0 --seconds 60`)
+also writes capture.bin.times.npy with the end offset and time of every
+read. Without it, dropout statistics are reported as unknown.
+"""
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+FRAME_SIZE = 32
+HEADER = (0x20, 0x40)
+NUM_CHANNELS = 14
+# FlySky receivers send one frame every 7 ms
+FRAME_PERIOD = 0.007
+# Sidecar with one (end byte offset, time in seconds) row per read
+TIMES_SUFFIX = ".times.npy"
+
+# channels: (N, 14) uint16 per candidate frame; valid: (N,) checksum OK;
+# offsets: (N,) byte offset of each frame; stats: dict (see capture_stats)
+DecodedCapture = namedtuple('DecodedCapture', ['channels', 'valid', 'offsets', 'stats'])
+
+
+def load_capture(path, use_mmap=True):
+    """
+    Raw capture as a uint8 array: memory-mapped (no read into RAM) or
+    loaded with np.fromfile.
+    """
+    if use_mmap:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode="r")
+    return np.fromfile(path, dtype=np.uint8)
+
+
+def load_chunk_times(path):
+    """
+    The (K, 2) read times written next to `path` by record_capture(), or
+    None if the capture has no timestamps.
+    """
+    times_path = path + TIMES_SUFFIX
+    if not os.path.exists(times_path):
+        return None
+    return np.load(times_path)
+
+
+def record_capture(ser, path, duration, clock=time.monotonic):
+    """
+    Copy raw bytes from `ser` to `path` for `duration` seconds, and the end
+    offset and arrival time of every read to path + TIMES_SUFFIX.
+    Returns the number of bytes captured.
+    """
+    rows = []
+    size = 0
+    deadline = clock() + duration
+    with open(path, "wb") as out:
+        while clock() < deadline:
+            data = ser.read(ser.in_waiting or 1)
+            if data:
+                size += len(data)
+                rows.append((size, clock()))
+                out.write(data)
+    np.save(path + TIMES_SUFFIX, np.array(rows, dtype=np.float64).reshape(-1, 2))
+    return size
+
+
+def frame_times(offsets, chunk_times):
+    """
+    Arrival time of each frame at `offsets`: the time of the read that
+    delivered its last byte.
+    """
+    ends = chunk_times[:, 0]
+    index = np.searchsorted(ends, offsets + FRAME_SIZE, side="left")
+    return chunk_times[np.minimum(index, len(ends) - 1), 1]
+
+
+def _accept_overlapping(starts):
+    """
+    Greedy left-to-right acceptance of valid frame starts, skipping any that
+    begin inside an already accepted frame (what the streaming parser does).
+    """
+    keep = np.ones(len(starts), dtype=bool)
+    end = -1
+    for i, start in enumerate(starts.tolist()):
+        if start < end:
+            keep[i] = False
+        else:
+            end = start + FRAME_SIZE
+    return keep
+
+
+def decode_capture(data, out_of_range=(900, 2100), frame_period=FRAME_PERIOD,
+                   chunk_times=None):
+    """
+    Decode every candidate frame in `data` (bytes, bytearray or uint8 array).
+    :param out_of_range: (low, high) channel values outside which a frame with a
+                         good checksum is still counted as suspicious.
+    :param frame_period: Nominal seconds per frame, for dropout durations.
+    :param chunk_times: (K, 2) read end offsets and times (see load_chunk_times);
+                        without them dropouts cannot be counted.
+    Returns a DecodedCapture.
+    """
+    data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    size = len(data)
+    if size < FRAME_SIZE:
+        empty = np.zeros((0, NUM_CHANNELS), dtype=np.uint16)
+        none = np.zeros(0, dtype=np.int64)
+        return DecodedCapture(empty, np.zeros(0, dtype=bool), none,
+                              capture_stats(size, none, np.zeros(0, dtype=bool), empty,
+                                            out_of_range, frame_period,
+                                            None if chunk_times is None else np.zeros(0)))
+
+    # 1) Header candidates with room for a whole frame
+    last = size - FRAME_SIZE + 1
+    starts = np.flatnonzero((data[:last] == HEADER[0]) & (data[1:last + 1] == HEADER[1]))
+
+    # 2) All checksums at once: sum(data[s:s+30]) from a cumulative sum
+    cumsum = np.empty(size + 1, dtype=np.int64)
+    cumsum[0] = 0
+    np.cumsum(data, dtype=np.int64, out=cumsum[1:])
+    computed = (cumsum[starts + 30] - cumsum[starts]) & 0xFFFF
+    stored = data[starts + 30].astype(np.int64) | (data[starts + 31].astype(np.int64) << 8)
+    valid = computed == stored
+
+    # Valid frames that start inside an earlier valid frame are payload bytes
+    good = starts[valid]
+    if len(good) > 1 and np.any(np.diff(good) < FRAME_SIZE):
+        drop = np.zeros(len(starts), dtype=bool)
+        drop[np.flatnonzero(valid)[~_accept_overlapping(good)]] = True
+        valid[drop] = False
+        good = starts[valid]
+    # Any other candidate inside an accepted frame is not a frame either
+    if len(good):
+        prev = np.searchsorted(good, starts, side="right") - 1
+        inside = (prev >= 0) & (starts < good[np.maximum(prev, 0)] + FRAME_SIZE) & ~valid
+        keep = ~inside
+        starts = starts[keep]
+        valid = valid[keep]
+
+    # 3) Gather the 28 channel bytes of every candidate and view them as uint16
+    payload = data[starts[:, None] + np.arange(2, 2 + 2 * NUM_CHANNELS)]
+    channels = np.ascontiguousarray(payload).view("<u2").reshape(len(starts), NUM_CHANNELS)
+
+    times = None if chunk_times is None else frame_times(starts, chunk_times)
+    stats = capture_stats(size, starts, valid, channels, out_of_range, frame_period, times)
+    return DecodedCapture(channels, valid, starts, stats)
+
+
+def capture_stats(size, offsets, valid, channels, out_of_range=(900, 2100),
+                  frame_period=FRAME_PERIOD, times=None):
+    """
+    Dropout and corruption statistics. Dropouts come from arrival times:
+    frames delivered by one read share its time, so between two reads n
+    frame periods apart n frames were due, and any of them not among the
+    frames of the later read never arrived (or arrived corrupt). A host
+    stall that delivers buffered frames in one read therefore loses
+    nothing. Byte gaps say nothing about time (noise takes bytes, silence
+    takes none), so without `times` (arrival time per candidate frame) the
+    dropout fields are None.
+    """
+    n_valid = int(np.count_nonzero(valid))
+    low, high = out_of_range
+    suspicious = np.any((channels[valid] < low) | (channels[valid] > high), axis=1)
+    stats = dict(
+        bytes=int(size),
+        candidates=int(len(offsets)),
+        valid_frames=n_valid,
+        bad_checksum=int(len(offsets) - n_valid),
+        out_of_range_frames=int(np.count_nonzero(suspicious)),
+        garbage_bytes=int(size - n_valid * FRAME_SIZE),
+        dropouts=None,
+        missing_frames=None,
+        longest_dropout_frames=None,
+        longest_dropout_s=None,
+        frame_loss=None,
+    )
+    if times is None:
+        return stats
+    arrivals, received = np.unique(times[valid], return_counts=True)
+    due = np.rint(np.diff(arrivals) / frame_period).astype(np.int64)
+    missing = due - received[1:]
+    missing = missing[missing > 0]
+    longest = int(missing.max()) if len(missing) else 0
+    stats.update(
+        dropouts=int(len(missing)),
+        missing_frames=int(missing.sum()),
+        longest_dropout_frames=longest,
+        longest_dropout_s=longest * frame_period,
+        frame_loss=float(missing.sum() / max(1, missing.sum() + n_valid)),
+    )
+    return stats
+
+
+def format_stats(stats):
+    text = (f"{stats['bytes']} bytes, {stats['valid_frames']} valid frames, "
+            f"{stats['bad_checksum']} bad checksums, {stats['out_of_range_frames']} out of range, "
+            f"{stats['garbage_bytes']} garbage bytes; ")
+    if stats['missing_frames'] is None:
+        return text + "dropouts unknown (no timestamps)"
+    return text + (f"{stats['dropouts']} dropouts, "
+                   f"{stats['missing_frames']} frames missing ({100 * stats['frame_loss']:.2f}%), "
+                   f"longest {stats['longest_dropout_frames']} frames "
+                   f"(~{stats['longest_dropout_s'] * 1e3:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode a raw iBus UART capture.")
+    parser.add_argument("capture", help="raw byte capture file (read times from FILE.times.npy)")
+    parser.add_argument("--csv", help="write offset,valid,ch1..ch14 per frame here")
+    parser.add_argument("--no-mmap", action="store_true", help="read with np.fromfile instead")
+    parser.add_argument("--record", metavar="PORT",
+                        help="first record a timestamped capture from this serial port")
+    parser.add_argument("--seconds", type=float, default=60.0, help="recording length")
+    args = parser.parse_args()
+
+    if args.record:
+        import serial
+        with serial.Serial(args.record, 115200, timeout=0.01) as ser:
+            size = record_capture(ser, args.capture, args.seconds)
+        print(f"Recorded {size} bytes to {args.capture}")
+    capture = decode_capture(load_capture(args.capture, use_mmap=not args.no_mmap),
+                             chunk_times=load_chunk_times(args.capture))
+    print(format_stats(capture.stats))
+    if args.csv:
+        table = np.column_stack([capture.offsets, capture.valid, capture.channels])
+        header = "offset,valid," + ",".join(f"ch{i + 1}" for i in range(NUM_CHANNELS))
+        np.savetxt(args.csv, table, fmt="%d", delimiter=",", header=header, comments="")
+
+
+if __name__ == "__main__":
+    main()
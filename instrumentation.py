@@ -0,0 +1,177 @@
+# instrumentation.py
+"""
+Low-overhead per-stage latency instrumentation.
+
+Each named stage gets a LatencyHistogram with fixed, preallocated,
+log-spaced buckets, so recording a sample is a few arithmetic operations
+and never allocates. When the profiler is disabled, `profiler.stage(name)`
+returns a shared no-op context manager.
+
+Usage:
+    profiler = Profiler(enabled=True)
+    with profiler.stage("camera.get_frame"):
+        frame = camera.get_frame()
+    ...
+    print(profiler.report())          # p50 / p99 / max per stage
+    profiler.install_signal_dump()    # or dump on SIGUSR1
+"""
+import math
+import signal
+import sys
+import time
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram. Buckets are spaced by 2**(1/4) (about
+    19% wide) from `min_value` up to `max_value` seconds; samples outside the
+    range land in the first/last bucket. The exact maximum is kept separately.
+    """
+
+    BUCKETS_PER_OCTAVE = 4
+
+    def __init__(self, min_value=1e-6, max_value=10.0):
+        self.min_value = min_value
+        octaves = math.log2(max_value / min_value)
+        self.num_buckets = int(math.ceil(octaves * self.BUCKETS_PER_OCTAVE)) + 1
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        if value > self.min_value:
+            index = int(math.log2(value / self.min_value) * self.BUCKETS_PER_OCTAVE)
+            if index >= self.num_buckets:
+                index = self.num_buckets - 1
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def bucket_upper(self, index):
+        return self.min_value * 2.0 ** ((index + 1) / self.BUCKETS_PER_OCTAVE)
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile (p in 0..100),
+        capped at the exact maximum. Returns 0.0 with no samples.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * p / 100.0)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.bucket_upper(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        for i in range(self.num_buckets):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class _StageTimer:
+    """
+    Context manager that records its elapsed time into one histogram.
+    One instance per stage, reused for every sample (not reentrant).
+    """
+    __slots__ = ('histogram', '_start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self._start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """
+    Registry of per-stage histograms. Stage names are dotted, e.g.
+    "detector.detect_robot" and its substages "detector.mog2", ...
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self._timers = {}
+
+    def stage(self, name):
+        """
+        Context manager timing one stage; a shared no-op when disabled.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+            timer = self._timers[name] = _StageTimer(histogram)
+        return timer
+
+    def record(self, name, seconds):
+        """
+        Record a duration measured elsewhere.
+        """
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.stage(name).histogram
+        histogram.record(seconds)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def report(self):
+        """
+        Text table of count / mean / p50 / p99 / max (ms) for every stage.
+        """
+        lines = [f"{'stage':32s} {'count':>8s} {'mean':>9s} {'p50':>9s} {'p99':>9s} {'max':>9s}"]
+        for name in sorted(self.histograms):
+            h = self.histograms[name]
+            lines.append(f"{name:32s} {h.count:8d} {h.mean() * 1e3:9.3f} "
+                         f"{h.percentile(50) * 1e3:9.3f} {h.percentile(99) * 1e3:9.3f} "
+                         f"{h.max * 1e3:9.3f}")
+        return "\n".join(lines)
+
+    def install_signal_dump(self, signum=signal.SIGUSR1, stream=None):
+        """
+        Print the report whenever the process receives `signum`
+        (e.g. `kill -USR1 <pid>`). Must be called from the main thread.
+        """
+        def _dump(_signum, _frame):
+            print(self.report(), file=stream or sys.stderr, flush=True)
+        signal.signal(signum, _dump)
+
+
+# Shared disabled profiler, used when a component is not given one
+DISABLED = Profiler(enabled=False)
@@ -1,24 +1,176 @@
+import os
 import time
-import cv2
-from camera_module import CameraModule
-from robot_detection import RobotDetector  # <-- Make sure this is the advanced version
+from collections import namedtuple
+# Light modules only: OpenCV / NumPy are imported by init_vision() on its own
+# thread, so manual control is live before they finish loading.
 from motor_control import MotorController
 from remote_control import RemoteControl
+from safety import KillSwitchWatcher
+from instrumentation import Profiler
+from scheduler import RateScheduler
+from startup import BackgroundInit
+from target_tracker import AlphaBetaTracker
+from telemetry import TelemetryLogger, fit_log_capacity, log_path, prune_logs
 
-def main():
-    # -----------------------------
-    # 1) Initialize Hardware
-    # -----------------------------
+# Control loop rate; detection results are applied whenever they arrive
+CONTROL_RATE_HZ = 100
+
+# Time from issuing a motor command to the wheels responding (seconds); the
+# target position is predicted this far past "now"
+ACTUATION_LATENCY = 0.03
+
+# Oldest vision result (seconds since capture) autonomous mode still acts on;
+# older means the worker stalled or died, and the motors are stopped
+VISION_TIMEOUT = 0.25
+
+# Detection time budget per camera frame (seconds); the governor lowers the
+# detector's scale / morphology / frame rate when it is exceeded
+DETECT_BUDGET = 1.0 / 30
+
+# Per-stage latency histograms; set PROFILE_STAGES=1 to enable. The report is
+# printed on shutdown, or any time with `kill -USR1 <pid>`.
+PROFILE_STAGES = os.environ.get("PROFILE_STAGES") == "1"
+
+# Set RECORD_PATH=match.rec to record frames, RC channels and detections
+# (replay with recorder.ReplayFrameSource). RECORD_SECONDS sizes the file:
+# 640x480 BGR at 30 fps is about 28 MB per second, and the length is cut to
+# what fits on the disk.
+RECORD_PATH = os.environ.get("RECORD_PATH")
+RECORD_SECONDS = float(os.environ.get("RECORD_SECONDS", "30"))
+
+# Per-tick flight record (mode, kill switch, RC channels, new detections, motor
+# duties), a ring of the last TELEMETRY_SECONDS in a memory-mapped file. The
+# name is expanded with time.strftime (and numbered if taken), so each boot
+# keeps its own file. Read it with telemetry.read_telemetry(path). Set
+# TELEMETRY_PATH= to keep it in memory. Only the newest TELEMETRY_KEEP files
+# are kept (0 keeps all), and the ring is cut to what fits on the disk
+# (in memory if nothing does).
+TELEMETRY_PATH = os.environ.get("TELEMETRY_PATH", "telemetry-%Y%m%d-%H%M%S.bin") or None
+TELEMETRY_SECONDS = float(os.environ.get("TELEMETRY_SECONDS", "300"))
+TELEMETRY_KEEP = int(os.environ.get("TELEMETRY_KEEP", "20"))
+
+# Set BACKGROUND_SNAPSHOT=arena_bg.npz (from `python background_model.py`) to
+# start from a saved background instead of warming up MOG2 during the match.
+BACKGROUND_SNAPSHOT = os.environ.get("BACKGROUND_SNAPSHOT")
+
+# Camera pixel format: "bgr", or "yuyv" / "yuv420" / "mjpeg" to detect on the
+# luma plane only (colour is converted only if the color filter is enabled).
+# Luma-only detection needs the opponent to differ from the arena in brightness.
+CAMERA_FORMAT = os.environ.get("CAMERA_FORMAT", "bgr")
+# Frame source: "opencv" (V4L2 via VideoCapture) or "picamera2" for the Pi
+# camera module; see frame_sources.py.
+CAMERA_BACKEND = os.environ.get("CAMERA_BACKEND", "opencv")
+
+# Threads for RobotDetector's tiled threshold/morphology/blob search (1 = serial;
+# results are identical either way).
+DETECT_WORKERS = int(os.environ.get("DETECT_WORKERS", "1"))
+
+# Set MOTION_GATE=1 to skip detection on frames where nothing moved and run
+# background subtraction only on the blocks that changed (see motion_gate.py).
+# A full recompute is still forced every MOTION_GATE_REFRESH frames.
+MOTION_GATE = os.environ.get("MOTION_GATE") == "1"
+MOTION_GATE_THRESHOLD = float(os.environ.get("MOTION_GATE_THRESHOLD", "12"))
+MOTION_GATE_REFRESH = int(os.environ.get("MOTION_GATE_REFRESH", "30"))
+
+def pursuit_command(cx, cy, width, height, kP=0.4):
+    """
+    Proportional steering towards a detection at (cx, cy) in a width x height
+    frame. Returns (move_x, move_y, rotate) for MotorController.xdrive_move.
+    """
+    center_x = width // 2
+    center_y = height // 2
+
+    # Error signals: how far from center
+    error_x = (cx - center_x) / float(center_x)  # range ~ -1..+1
+    error_y = (center_y - cy) / float(center_y)  # range ~ -1..+1
+
+    # Simple proportional gain
+    move_x = kP * error_x
+    move_y = kP * error_y
+    rotate = 0.0  # no rotation in this example
+
+    # Clamp speeds
+    def clamp(val, low=-1.0, high=1.0):
+        return max(low, min(high, val))
+
+    return clamp(move_x), clamp(move_y), rotate
+
+# Everything the vision side owns, so shutdown can release it
+VisionStack = namedtuple('VisionStack', ['camera', 'detector', 'governor', 'recorder', 'worker'])
+
+def apply_killswitch(remote_control, motor_controller):
+    """
+    Kill-switch step of a control tick. Returns True if the robot is killed
+    (kill switch on, RC signal lost, or the KillSwitchWatcher still tripped,
+    e.g. latched after a signal loss until the kill switch is cycled) after
+    zeroing the drive motors and spinner. Otherwise the spinner is commanded
+    on: the KillSwitchWatcher kills at boot (no RC frame yet) and on every
+    dropout but only re-arms, so the spinner has to be commanded again each
+    tick (repeated writes are coalesced by MotorController).
+    """
+    if remote_control.get_killswitch() or motor_controller.killed:
+        # The kill watcher has already stopped everything; this keeps the
+        # outputs at zero whatever the loop commanded before
+        motor_controller.stop_all()
+        motor_controller.stop_spinner()
+        return True
+    # Start spinner at full throttle (100% duty)
+    motor_controller.start_spinner()
+    return False
+
+def init_motors():
     # Example BCM pins for the 4 drive motors
     motor_pins = [17, 27, 22, 23]
     # BCM pin for the spinner weapon
     spinner_pin = 24
 
     # Create MotorController (RPi.GPIO PWM)
-    motor_controller = MotorController(motor_pins, spinner_pin, pwm_freq=1000)
+    # Duty changes under 0.25% are not rewritten. For kernel hardware PWM on
+    # capable pins, pass e.g.
+    #   backend=SysfsPWMBackend(1000, fallback=SoftwarePWMBackend(1000))
+    return MotorController(motor_pins, spinner_pin, pwm_freq=1000, deadband=0.25)
+
+def init_remote_control():
+    # Single-pin FlySky iBus (Placeholder or real UART approach in ibus.py)
+    # Also includes a kill switch channel
+    return RemoteControl(
+        uart_port='/dev/ttyAMA0',
+        mode_channel=4,     # channel for manual/auton toggle
+        x_channel=0,
+        y_channel=1,
+        rotate_channel=3,
+        killswitch_channel=5,
+        threaded=True,      # decode RC frames as they arrive, not when the loop gets here
+        failsafe_ms=100     # no valid frame for 100 ms => treat as kill
+    )
+
+def init_vision(profiler, rc_init):
+    """
+    Import OpenCV, open the camera and build the detection stack.
+    :param rc_init: BackgroundInit of the RemoteControl (the recorder reads RC
+                    snapshots once detection is running).
+    Returns a VisionStack with the worker paused.
+    """
+    from camera_module import CameraModule
+    from robot_detection import RobotDetector  # <-- Make sure this is the advanced version
+    from governor import FrameBudgetGovernor
+    from vision_worker import VisionWorker
 
     # Create CameraModule (OpenCV capture)
-    camera = CameraModule(camera_index=0, width=640, height=480)
+    # Threaded capture: get_frame() returns the newest frame without blocking
+    camera = CameraModule(camera_index=0, width=640, height=480, threaded=True,
+                          pixel_format=CAMERA_FORMAT, backend=CAMERA_BACKEND)
+
+    background_model = None
+    if BACKGROUND_SNAPSHOT:
+        from background_model import NumpyBackgroundModel
+        background_model = NumpyBackgroundModel.from_snapshot(BACKGROUND_SNAPSHOT)
+
+    motion_gate = None
+    if MOTION_GATE:
+        from motion_gate import MotionGate
+        motion_gate = MotionGate(threshold=MOTION_GATE_THRESHOLD,
+                                 refresh_interval=MOTION_GATE_REFRESH)
 
     # Create our advanced classical RobotDetector
     # Adjust parameters as needed (e.g., color filtering, thresholds)
@@ -30,94 +182,241 @@ def main():
         # lower_color=(0, 100, 100),
         # upper_color=(10, 255, 255),
         history=500,
-        var_threshold=16
+        var_threshold=16,
+        # Only search around the last detection once the opponent is locked
+        track=True,
+        max_misses=3,
+        # Processing scale is set at runtime by the FrameBudgetGovernor below
+        # (min_area is rescaled automatically). To refine reduced-scale hits at
+        # full resolution:
+        # refine=True,
+        background_model=background_model,
+        workers=DETECT_WORKERS,
+        motion_gate=motion_gate,
+        profiler=profiler,
     )
 
-    # Single-pin FlySky iBus (Placeholder or real UART approach in ibus.py)
-    # Also includes a kill switch channel
-    remote_control = RemoteControl(
-        ibus_gpio_pin=21,   # or /dev/ttyAMA0 if using a real UART approach
-        mode_channel=4,     # channel for manual/auton toggle
-        x_channel=0,
-        y_channel=1,
-        rotate_channel=3,
-        killswitch_channel=5
-    )
+    recorder = None
+    on_result = None
+    if RECORD_PATH:
+        from recorder import Recorder, fit_capacity
+        first = camera.get_frame()
+        wanted = int(RECORD_SECONDS * 30)
+        capacity = fit_capacity(RECORD_PATH, first.shape, wanted)
+        if capacity < wanted:
+            print(f"Recording cut to {capacity / 30:.0f} s to fit on the disk")
+        if capacity > 0:
+            recorder = Recorder(RECORD_PATH, first.shape, capacity=capacity)
 
-    # Start spinner at full throttle (100% duty)
-    motor_controller.start_spinner()
+    if recorder is not None:
+        def on_result(frame, result):
+            rc = rc_init.result().ibus.get_snapshot()
+            recorder.append(frame, channels=rc.channels, detection=result.detection,
+                            frame_seq=result.seq, capture_time=result.capture_time,
+                            rc_time=rc.timestamp)
+
+    # Keep detection inside its per-frame budget; level changes are printed
+    governor = FrameBudgetGovernor(detector, budget=DETECT_BUDGET, verbose=True)
+
+    # Detection runs on its own thread; the control loop applies its newest result
+    worker = VisionWorker(camera, detector, profiler=profiler, on_result=on_result,
+                          governor=governor)
+    return VisionStack(camera, detector, governor, recorder, worker)
+
+def bring_up(profiler):
+    """
+    Initialize motors, RC and vision concurrently. Returns
+    (motor_controller, remote_control, vision_init) as soon as motors and RC
+    are ready; vision keeps initializing in the background and
+    vision_init.result() yields its VisionStack.
+    """
+    motors_init = BackgroundInit(init_motors, name="init-motors")
+    rc_init = BackgroundInit(init_remote_control, name="init-rc")
+    vision_init = BackgroundInit(lambda: init_vision(profiler, rc_init), name="init-vision")
+    return motors_init.result(), rc_init.result(), vision_init
+
+def shutdown_vision(vision_init, timeout=5.0):
+    """
+    Stop the vision stack, waiting for a still-running initialization so the
+    camera is released. Returns the VisionStack, or None if it never came up.
+    """
+    try:
+        vision = vision_init.result(timeout)
+    except Exception:
+        return None
+    vision.worker.stop()
+    vision.detector.close()
+    if vision.recorder is not None:
+        vision.recorder.close()
+    vision.camera.release()
+    return vision
+
+def main():
+    profiler = Profiler(enabled=PROFILE_STAGES)
+    if PROFILE_STAGES:
+        profiler.install_signal_dump()
+
+    # -----------------------------
+    # 1) Initialize Hardware
+    # -----------------------------
+    # Motors and RC gate the control loop; camera + detector come up meanwhile
+    motor_controller, remote_control, vision_init = bring_up(profiler)
+
+    # Kill switch / RC signal loss stop the motors from the iBus reader and a
+    # watchdog thread, whatever this loop is doing
+    kill_watcher = KillSwitchWatcher(remote_control, motor_controller).start()
+    vision = None
+    vision_pending = True
+    last_vision_seq = None
+    frame_shape = None
+
+    # Constant-velocity target prediction between detector and controller
+    tracker = AlphaBetaTracker(alpha=0.85, beta=0.3, max_coast=0.25)
+
+    # Fixed-rate control tick with absolute deadlines
+    scheduler = RateScheduler(rate_hz=CONTROL_RATE_HZ)
+
+    telemetry_capacity = int(TELEMETRY_SECONDS * CONTROL_RATE_HZ)
+    telemetry_path = None
+    if TELEMETRY_PATH:
+        if TELEMETRY_KEEP > 0:
+            # Leave room for this run's file
+            prune_logs(TELEMETRY_PATH, TELEMETRY_KEEP - 1)
+        telemetry_path = log_path(TELEMETRY_PATH)
+        fitted = fit_log_capacity(telemetry_path, telemetry_capacity)
+        if fitted == 0:
+            print("No disk space for telemetry; keeping it in memory")
+            telemetry_path = None
+        elif fitted < telemetry_capacity:
+            print(f"Telemetry cut to {fitted / CONTROL_RATE_HZ:.0f} s to fit on the disk")
+            telemetry_capacity = fitted
+    telemetry = TelemetryLogger(capacity=telemetry_capacity, path=telemetry_path)
+    if telemetry_path:
+        print("Telemetry:", telemetry_path)
+    mode = 0
+    killed = False
+    detection = None
+    detection_seq = -1
 
     try:
         while True:
+            if scheduler.ticks:
+                # Record the tick that just finished (every `continue` lands here)
+                duties = motor_controller.last_duty
+                telemetry.log(mode, killed, remote_control.ibus.get_snapshot().channels,
+                              detection, duties, duties[-1], seq=detection_seq)
+            scheduler.wait()
+            # Only a result that arrives this tick is logged
+            detection = None
+            detection_seq = -1
+
             # -----------------------------
             # 2) Read RC input
             # -----------------------------
-            remote_control.update()
+            with profiler.stage("remote_control.update"):
+                remote_control.update()
+
+            if vision_pending and vision_init.done():
+                vision_pending = False
+                try:
+                    vision = vision_init.result()
+                    print(f"Vision ready after {vision_init.elapsed():.2f} s")
+                except Exception as e:
+                    # Manual control keeps working without a camera
+                    print("Vision init failed, autonomous mode disabled:", repr(e))
 
             # -----------------------------
             # 3) Check Kill Switch
             # -----------------------------
-            if remote_control.get_killswitch():
-                # Immediately stop all motors and spinner
-                motor_controller.stop_all()
-                motor_controller.stop_spinner()
-                # Wait a bit and continue checking in next loop iteration
-                time.sleep(0.1)
+            mode = remote_control.get_mode()
+            killed = apply_killswitch(remote_control, motor_controller)
+            if killed:
+                if vision is not None:
+                    vision.worker.set_enabled(False)
+                # Keep checking on the next tick
                 continue
 
             # -----------------------------
             # 4) Manual vs. Autonomous
             # -----------------------------
-            mode = remote_control.get_mode()
+            if vision is not None:
+                vision.worker.set_enabled(mode != 0)
 
             if mode == 0:
                 # ---- MANUAL MODE ----
+                tracker.reset()
+                # Autonomous mode starts over from its next fresh result
+                frame_shape = None
+                last_vision_seq = None
                 x_cmd, y_cmd, r_cmd = remote_control.get_movement()
-                motor_controller.xdrive_move(x_cmd, y_cmd, r_cmd)
+                with profiler.stage("motor_controller.xdrive_move"):
+                    motor_controller.xdrive_move(x_cmd, y_cmd, r_cmd)
 
             else:
                 # ---- AUTONOMOUS MODE ----
-                frame = camera.get_frame()
-                detection = detector.detect_robot(frame)
+                result = vision.worker.latest() if vision is not None else None
+                if result is not None and time.monotonic() - result.capture_time > VISION_TIMEOUT:
+                    # Stalled worker, or a result left from an earlier session
+                    result = None
+                new_result = result is not None and result.seq != last_vision_seq
+                if new_result:
+                    last_vision_seq = result.seq
+                    detection = result.detection
+                    detection_seq = result.seq
+                    frame_shape = result.frame_shape
+                    if result.warming_up:
+                        # Fresh background model (startup or governor scale
+                        # change): its blobs are mostly noise
+                        tracker.reset()
+                    elif result.detection is None:
+                        tracker.miss(result.capture_time)
+                    else:
+                        cx, cy = result.detection
+                        tracker.update(cx, cy, result.capture_time)
 
-                if detection is None:
+                if result is None or frame_shape is None:
+                    # Vision still starting (or failed), no fresh frame
+                    # processed: don't keep driving on an old command
+                    motor_controller.stop_all()
+                    continue
+                if result.warming_up:
+                    # Hold still until the background model has settled
+                    motor_controller.stop_all()
+                    continue
+
+                # Aim where the target will be when this command takes effect;
+                # the tracker also bridges short detection dropouts.
+                target = tracker.predict(time.monotonic() + ACTUATION_LATENCY)
+                if target is None:
                     # No robot detected => spin in place searching
                     motor_controller.search_spin()
-                else:
-                    # Move towards the detected robot
-                    cx, cy = detection
-                    height, width, _ = frame.shape
-                    center_x = width // 2
-                    center_y = height // 2
-
-                    # Error signals: how far from center
-                    error_x = (cx - center_x) / float(center_x)  # range ~ -1..+1
-                    error_y = (center_y - cy) / float(center_y)  # range ~ -1..+1
-
-                    # Simple proportional gain
-                    kP = 0.4
-                    move_x = kP * error_x
-                    move_y = kP * error_y
-                    rotate = 0.0  # no rotation in this example
-
-                    # Clamp speeds
-                    def clamp(val, low=-1.0, high=1.0):
-                        return max(low, min(high, val))
-                    move_x = clamp(move_x)
-                    move_y = clamp(move_y)
+                    continue
 
+                # Move towards the (predicted) robot position
+                height, width = frame_shape
+                cx = min(max(target[0], 0.0), width - 1.0)
+                cy = min(max(target[1], 0.0), height - 1.0)
+                move_x, move_y, rotate = pursuit_command(cx, cy, width, height)
+                with profiler.stage("motor_controller.xdrive_move"):
                     motor_controller.xdrive_move(move_x, move_y, rotate)
 
-            # Sleep briefly to avoid 100% CPU usage
-            time.sleep(0.02)
-
     except KeyboardInterrupt:
         print("Shutting down...")
 
     finally:
         # Cleanup on exit
+        print("Control loop:", scheduler.summary())
+        vision = shutdown_vision(vision_init)
+        if vision is not None:
+            print("Governor:", vision.governor.summary())
+            print("Camera:", vision.camera.source.stats.summary())
+            if vision.detector.motion_gate is not None:
+                print("Motion gate:", vision.detector.motion_gate.summary())
+        if PROFILE_STAGES:
+            print(profiler.report())
+        telemetry.close()
+        kill_watcher.stop()
         remote_control.close()
-        camera.release()
         motor_controller.shutdown()
 
 if __name__ == "__main__":
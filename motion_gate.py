@@ -0,0 +1,224 @@
+# motion_gate.py
+import cv2
+import numpy as np
+
+# MotionGate.check() result: recompute the whole frame
+ALL_BLOCKS = "all"
+
+
+class MotionGate:
+    """
+    Cheap change detector in front of RobotDetector. Each frame is reduced
+    to a small thumbnail (INTER_AREA, so sensor noise averages out) and
+    compared with the thumbnail of the last frame that was processed, over
+    a `grid` of blocks. A block has changed when any channel of any of its
+    thumbnail pixels moved by more than `threshold` levels (per channel, so
+    a change in colour only is seen too).
+
+    check() returns:
+      - None:        nothing changed, reuse the previous detection (a hit)
+      - block array: flat indices (row * cols + col) of the changed blocks,
+                     when at most `max_changed` of the grid changed and the
+                     caller can recompute blocks (a partial miss)
+      - ALL_BLOCKS:  recompute everything (a full miss), also forced every
+                     `refresh_interval` frames and for the first frame
+
+    The reference thumbnail is only updated where work was done, so slow
+    drift accumulates until it crosses the threshold.
+
+    Counters: frames, hits, partial, full, refreshes, blocks_recomputed.
+    """
+
+    def __init__(self, grid=(8, 6), block_cells=8, threshold=12.0, max_changed=0.25,
+                 refresh_interval=30):
+        """
+        :param grid: (cols, rows) of change blocks.
+        :param block_cells: Thumbnail pixels per block side (thumbnail is
+                            cols*block_cells x rows*block_cells).
+        :param threshold: Change of a thumbnail pixel (in any channel) that marks its block changed.
+        :param max_changed: Largest fraction of changed blocks still recomputed block-wise.
+        :param refresh_interval: Force a full recompute after this many frames
+                                 without one (0 = never).
+        """
+        cols, rows = grid
+        if cols < 1 or rows < 1 or block_cells < 1:
+            raise ValueError("grid and block_cells must be positive")
+        if not 0.0 <= max_changed <= 1.0:
+            raise ValueError("max_changed must be in [0, 1]")
+        self.grid = (cols, rows)
+        self.block_cells = block_cells
+        self.threshold = threshold
+        self.max_changed = max_changed
+        self.refresh_interval = refresh_interval
+        self.thumb_size = (cols * block_cells, rows * block_cells)
+
+        self._thumb = np.empty(self.thumb_size[::-1], dtype=np.uint8)
+        self._reference = np.empty_like(self._thumb)
+        self._diff = np.empty_like(self._thumb)
+        self._has_reference = False
+        self._since_full = 0
+
+        self.frames = 0
+        self.hits = 0
+        self.partial = 0
+        self.full = 0
+        self.refreshes = 0
+        self.blocks_recomputed = 0
+
+    def reset(self):
+        """
+        Forget the reference, so the next frame is fully recomputed.
+        """
+        self._has_reference = False
+
+    def _thumbnail(self, frame):
+        shape = self.thumb_size[::-1] + frame.shape[2:]
+        if self._thumb.shape != shape:
+            # Channel count changed (BGR <-> luma): the reference is not comparable
+            self._thumb = np.empty(shape, dtype=np.uint8)
+            self._reference = np.empty_like(self._thumb)
+            self._diff = np.empty_like(self._thumb)
+            self._has_reference = False
+        cv2.resize(frame, self.thumb_size, dst=self._thumb, interpolation=cv2.INTER_AREA)
+        return self._thumb
+
+    def check(self, frame, partial=True, active=None):
+        """
+        Compare `frame` with the reference; see the class docstring.
+        :param partial: The caller can recompute individual blocks this frame.
+        :param active: Flat indices of blocks that must be recomputed along with
+                       any change (e.g. blocks with foreground, whose mask keeps
+                       evolving while the image stands still). They alone do
+                       not make a frame a miss.
+        """
+        self.frames += 1
+        thumb = self._thumbnail(frame)
+        cols, rows = self.grid
+        cells = self.block_cells
+
+        refresh = self.refresh_interval and self._since_full + 1 >= self.refresh_interval
+        if not self._has_reference or refresh:
+            if self._has_reference:
+                self.refreshes += 1
+            return self._recompute_all(thumb)
+
+        cv2.absdiff(thumb, self._reference, dst=self._diff)
+        block_max = self._diff.reshape(rows, cells, cols, -1).max(axis=(1, 3))
+        changed = np.flatnonzero(block_max > self.threshold)
+        self._since_full += 1
+        if len(changed) == 0:
+            self.hits += 1
+            return None
+        if active is not None:
+            changed = np.union1d(changed, active)
+        if not partial or len(changed) > self.max_changed * cols * rows:
+            return self._recompute_all(thumb)
+
+        self.partial += 1
+        self.blocks_recomputed += len(changed)
+        reference = self._reference.reshape(rows, cells, cols, -1)
+        current = thumb.reshape(rows, cells, cols, -1)
+        by, bx = np.divmod(changed, cols)
+        reference[by, :, bx] = current[by, :, bx]
+        return changed
+
+    def _recompute_all(self, thumb):
+        self.full += 1
+        self.blocks_recomputed += self.grid[0] * self.grid[1]
+        self._reference[...] = thumb
+        self._has_reference = True
+        self._since_full = 0
+        return ALL_BLOCKS
+
+    def summary(self):
+        frames = max(1, self.frames)
+        blocks = self.grid[0] * self.grid[1]
+        return (f"{self.frames} frames: {100 * self.hits / frames:.1f}% reused, "
+                f"{100 * self.partial / frames:.1f}% partial, {100 * self.full / frames:.1f}% full "
+                f"({self.refreshes} forced refreshes); "
+                f"{100 * self.blocks_recomputed / (frames * blocks):.1f}% of blocks recomputed")
+
+
+class BlockBackgroundModel:
+    """
+    A grid of background subtractors, one per MotionGate block. MOG2 models
+    every pixel independently, so applying all blocks gives the same mask as
+    one subtractor on the whole image; apply_blocks() updates only the listed
+    blocks and leaves the rest of `fgmask` as it was.
+
+    MOG2 learns at 1 / min(2 * frames seen, history). Blocks that were
+    skipped have seen fewer frames and would learn faster than the rest, so
+    the grid counts frames once for all blocks and passes that rate
+    explicitly. The grid is rebuilt (and re-learns) when the image size changes.
+    """
+
+    def __init__(self, grid, factory):
+        """
+        :param grid: (cols, rows), the same as the MotionGate's.
+        :param factory: Creates one subtractor, e.g.
+                        lambda: cv2.createBackgroundSubtractorMOG2(500, 16, True).
+        """
+        self.grid = grid
+        self.factory = factory
+        self.frames = 0
+        self._shape = None
+        self._models = []
+        self._slices = []
+
+    def _prepare(self, shape):
+        if shape == self._shape:
+            return
+        cols, rows = self.grid
+        height, width = shape[:2]
+        ys = [height * j // rows for j in range(rows + 1)]
+        xs = [width * i // cols for i in range(cols + 1)]
+        self._slices = [(slice(ys[j], ys[j + 1]), slice(xs[i], xs[i + 1]))
+                        for j in range(rows) for i in range(cols)]
+        self._models = [self.factory() for _ in self._slices]
+        self._shape = shape
+        self.frames = 0
+
+    def ready_for(self, shape):
+        """
+        True if the grid is built for images of `shape` (blocks can be applied).
+        """
+        return shape == self._shape
+
+    def apply(self, image, fgmask=None, learningRate=-1):
+        if fgmask is None:
+            fgmask = np.empty(image.shape[:2], dtype=np.uint8)
+        self._prepare(image.shape)
+        return self.apply_blocks(image, fgmask, range(len(self._slices)), learningRate)
+
+    def apply_blocks(self, image, fgmask, blocks, learningRate=-1):
+        """
+        Update the models and the mask of `blocks` (flat indices) only.
+        """
+        self.frames += 1
+        if learningRate < 0 and hasattr(self._models[0], "getHistory"):
+            learningRate = 1.0 / min(2 * self.frames, self._models[0].getHistory())
+        for block in blocks:
+            ys, xs = self._slices[block]
+            fgmask[ys, xs] = self._models[block].apply(image[ys, xs], learningRate=learningRate)
+        return fgmask
+
+    def foreground_blocks(self, fgmask):
+        """
+        Flat indices of the blocks with any foreground (or shadow) in `fgmask`.
+        """
+        cols, rows = self.grid
+        height, width = fgmask.shape
+        if height % rows or width % cols:
+            # Uneven blocks: check them one by one
+            return np.array([block for block, (ys, xs) in enumerate(self._slices)
+                             if fgmask[ys, xs].any()], dtype=np.intp)
+        return np.flatnonzero(fgmask.reshape(rows, height // rows, cols, width // cols)
+                              .max(axis=(1, 3)))
+
+    def getBackgroundImage(self):
+        if self._shape is None:
+            return None
+        image = np.empty(self._shape, dtype=np.uint8)
+        for (ys, xs), model in zip(self._slices, self._models):
+            image[ys, xs] = model.getBackgroundImage()
+        return image
@@ -1,13 +1,24 @@
 # motor_control.py
-import RPi.GPIO as GPIO
+import threading
 import time
+from pwm_backends import SoftwarePWMBackend
 
 class MotorController:
     """
     Controls:
       - Four motors in an X-drive configuration
       - A spinner (weapon) ESC
-    Using RPi.GPIO software PWM at a chosen frequency.
+    Using RPi.GPIO software PWM at a chosen frequency by default, or any
+    backend from pwm_backends (e.g. SysfsPWMBackend for hardware PWM).
+
+    Outputs are write-coalesced: a duty cycle within `deadband` percent of
+    the value last written to that channel is not written again, so a loop
+    that repeats the same command costs nothing on the PWM side.
+
+    Kill latch: `kill()` zeroes every output and, until `rearm()`, refuses
+    any non-zero duty, so a control loop that has not noticed the kill yet
+    cannot restart the motors. Writes are serialized by a lock, so kill()
+    may be called from any thread (see safety.KillSwitchWatcher).
 
     DISCLAIMER: 
     - If your driver requires forward/reverse signals, you'll need
@@ -16,31 +27,58 @@ class MotorController:
       (0-100%) per pin, clamping negative speeds to 0.
     """
 
-    def __init__(self, motor_pins, spinner_pin, pwm_freq=1000):
+    def __init__(self, motor_pins, spinner_pin, pwm_freq=1000, backend=None, deadband=0.0):
         """
         :param motor_pins: list of 4 GPIO pins for the drive motors
         :param spinner_pin: pin for the weapon spinner
         :param pwm_freq: PWM frequency in Hz
+        :param backend: PWM backend (default: SoftwarePWMBackend(pwm_freq))
+        :param deadband: Skip duty writes that differ from the last written
+                         value by no more than this many percent (0 = only
+                         identical values are skipped)
         """
-        GPIO.setmode(GPIO.BCM)
-
         self.motor_pins = motor_pins
         self.spinner_pin = spinner_pin
         self.pwm_freq = pwm_freq
+        self.backend = backend if backend is not None else SoftwarePWMBackend(pwm_freq)
+        self.deadband = deadband
 
         # Motor PWM
         self.motor_pwm = []
         for pin in self.motor_pins:
-            GPIO.setup(pin, GPIO.OUT)
-            pwm_obj = GPIO.PWM(pin, self.pwm_freq)
+            pwm_obj = self.backend.open_channel(pin)
             pwm_obj.start(0)  # 0% duty initially
             self.motor_pwm.append(pwm_obj)
 
         # Spinner PWM
-        GPIO.setup(self.spinner_pin, GPIO.OUT)
-        self.spinner_pwm = GPIO.PWM(self.spinner_pin, self.pwm_freq)
+        self.spinner_pwm = self.backend.open_channel(self.spinner_pin)
         self.spinner_pwm.start(0)
 
+        # Last duty written per channel (motors 0..3, then the spinner)
+        self.last_duty = [0.0] * (len(self.motor_pwm) + 1)
+        self.writes = 0
+        self.writes_suppressed = 0
+        self.writes_blocked = 0
+        self.killed = False
+        self._lock = threading.Lock()
+
+    def _write_duty(self, slot, pwm_obj, duty):
+        """
+        Write a duty cycle unless it is within the deadband of the last one.
+        Full off (0) and full on (100) are always written exactly.
+        """
+        with self._lock:
+            if self.killed and duty != 0:
+                self.writes_blocked += 1
+                return
+            last = self.last_duty[slot]
+            if duty == last or (abs(duty - last) <= self.deadband and 0.0 < duty < 100.0):
+                self.writes_suppressed += 1
+                return
+            pwm_obj.ChangeDutyCycle(duty)
+            self.last_duty[slot] = duty
+            self.writes += 1
+
     def set_motor_speed(self, index, speed):
         """
         speed in [-1..+1]. Negative is clamped to 0 if your driver can't reverse.
@@ -52,20 +90,20 @@ class MotorController:
                 duty = 0
             if duty > 100:
                 duty = 100
-            self.motor_pwm[index].ChangeDutyCycle(duty)
+            self._write_duty(index, self.motor_pwm[index], duty)
 
     def start_spinner(self):
         """
         Run the spinner at 100% duty. If your ESC interprets this as max throttle,
         it will spin continuously.
         """
-        self.spinner_pwm.ChangeDutyCycle(100)
+        self._write_duty(len(self.motor_pwm), self.spinner_pwm, 100)
 
     def stop_spinner(self):
         """
         Set spinner to 0% duty, effectively stopping or disarming it.
         """
-        self.spinner_pwm.ChangeDutyCycle(0)
+        self._write_duty(len(self.motor_pwm), self.spinner_pwm, 0)
 
     def xdrive_move(self, x, y, rotate):
         """
@@ -103,8 +141,25 @@ class MotorController:
         """
         Zero duty on all drive motors.
         """
-        for pwm_obj in self.motor_pwm:
-            pwm_obj.ChangeDutyCycle(0)
+        for index, pwm_obj in enumerate(self.motor_pwm):
+            self._write_duty(index, pwm_obj, 0)
+
+    def kill(self):
+        """
+        Zero all drive motors and the spinner and latch them off until rearm().
+        """
+        with self._lock:
+            self.killed = True
+        self.stop_all()
+        self.stop_spinner()
+
+    def rearm(self):
+        """
+        Allow non-zero duties again after kill(). Outputs stay at zero until
+        the next command.
+        """
+        with self._lock:
+            self.killed = False
 
     def shutdown(self):
         """
@@ -115,4 +170,4 @@ class MotorController:
         for pwm_obj in self.motor_pwm:
             pwm_obj.stop()
         self.spinner_pwm.stop()
-        GPIO.cleanup()
+        self.backend.cleanup()
@@ -0,0 +1,453 @@
+# pipeline.py
+"""
+Multi-core pipelined runtime: capture, detection and control run as separate
+worker processes instead of serially in one loop.
+
+  capture process  --(SharedFrameRing, shared memory)-->  detect process
+  detect process   --(SharedLatest, shared memory)----->  control process
+
+Frames never get pickled: the capture stage writes them straight into
+shared-memory slots and the detect stage reads them in place. Every stage
+only ever consumes the most recent item; anything older is dropped.
+
+Headless run against stand-in GPIO and a recorded clip:
+    python pipeline.py --sim --source clip.npy --duration 10
+"""
+import argparse
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach_shm(name):
+    """
+    Attach to an existing shared memory block. Worker processes share the
+    parent's resource tracker, so the block is unlinked once, by its creator.
+    """
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """
+    Fixed number of frame slots in one shared memory block, plus a small
+    header (per-slot sequence number and capture timestamp, newest slot,
+    claimed slot) guarded by a multiprocessing lock.
+
+    Single writer, single reader. The writer never touches the newest slot
+    or the slot the reader has claimed, so three slots are enough for
+    tear-free hand-off with no copies on the reader side.
+    """
+
+    def __init__(self, shape, slots=3, dtype=np.uint8, lock=None, name=None):
+        """
+        :param shape: Frame shape, e.g. (480, 640, 3).
+        :param slots: Number of frame slots (>= 3).
+        :param lock: Shared lock; created if omitted (creator side).
+        :param name: Attach to an existing ring instead of creating one.
+        """
+        if slots < 3:
+            raise ValueError("SharedFrameRing needs at least 3 slots")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        # Header: slot_seq[slots] int64, slot_ts[slots] float64, newest, claimed, written
+        header_bytes = 8 * (2 * slots + 3)
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + frame_bytes * slots)
+            self.owner = True
+        else:
+            self.shm = _attach_shm(name)
+            self.owner = False
+        self.lock = lock if lock is not None else mp.Lock()
+
+        buf = self.shm.buf
+        self._seq = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=0)
+        self._ts = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=8 * slots)
+        # [newest slot, claimed slot, frames written]
+        self._state = np.ndarray((3,), dtype=np.int64, buffer=buf, offset=16 * slots)
+        self.frames = [
+            np.ndarray(self.shape, dtype=self.dtype, buffer=buf,
+                       offset=header_bytes + i * frame_bytes)
+            for i in range(slots)
+        ]
+        if self.owner:
+            self._seq[:] = -1
+            self._ts[:] = 0.0
+            self._state[:] = (-1, -1, 0)
+        self._write_slot = None
+
+    def spec(self):
+        """
+        Picklable description for attaching from another process.
+        """
+        return dict(shape=self.shape, slots=self.slots, dtype=self.dtype.str,
+                    lock=self.lock, name=self.shm.name)
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec["shape"], spec["slots"], spec["dtype"], spec["lock"], spec["name"])
+
+    # ---- writer side ----
+    def begin_write(self):
+        """
+        Return a free slot buffer to fill; publish it with end_write().
+        """
+        with self.lock:
+            newest, claimed, _ = self._state
+            for i in range(self.slots):
+                if i != newest and i != claimed:
+                    # Oldest eligible slot first
+                    if self._write_slot is None or self._seq[i] < self._seq[self._write_slot]:
+                        self._write_slot = i
+        return self.frames[self._write_slot]
+
+    def end_write(self, timestamp):
+        with self.lock:
+            slot = self._write_slot
+            self._seq[slot] = self._state[2]
+            self._ts[slot] = timestamp
+            self._state[0] = slot
+            self._state[2] += 1
+        self._write_slot = None
+
+    def write(self, frame, timestamp):
+        np.copyto(self.begin_write(), frame)
+        self.end_write(timestamp)
+
+    # ---- reader side ----
+    def claim_latest(self, after_seq=-1):
+        """
+        Claim the newest frame if its sequence number is greater than
+        `after_seq`. Returns (slot, frame, seq, timestamp) or None. The frame
+        is a view into shared memory, valid until release().
+        """
+        with self.lock:
+            slot = int(self._state[0])
+            if slot < 0 or self._seq[slot] <= after_seq:
+                return None
+            self._state[1] = slot
+            return slot, self.frames[slot], int(self._seq[slot]), float(self._ts[slot])
+
+    def release(self):
+        with self.lock:
+            self._state[1] = -1
+
+    def frames_written(self):
+        with self.lock:
+            return int(self._state[2])
+
+    def close(self):
+        # Drop our views before closing the mapping
+        self.frames = []
+        self._seq = self._ts = self._state = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedLatest:
+    """
+    Latest-value slot for a small fixed record of float64 fields in shared
+    memory. Writers overwrite, readers get the most recent copy.
+    """
+
+    def __init__(self, fields, lock=None, name=None):
+        self.fields = tuple(fields)
+        size = 8 * len(self.fields)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = _attach_shm(name)
+            self.owner = False
+        self.lock = lock if lock is not None else mp.Lock()
+        self._values = np.ndarray((len(self.fields),), dtype=np.float64, buffer=self.shm.buf)
+        if self.owner:
+            self._values[:] = 0.0
+        self._index = {f: i for i, f in enumerate(self.fields)}
+
+    def spec(self):
+        return dict(fields=self.fields, lock=self.lock, name=self.shm.name)
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec["fields"], spec["lock"], spec["name"])
+
+    def write(self, **values):
+        with self.lock:
+            for key, value in values.items():
+                self._values[self._index[key]] = value
+
+    def read(self):
+        with self.lock:
+            return dict(zip(self.fields, self._values.tolist()))
+
+    def close(self):
+        self._values = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# Detection result published by the detect stage
+DETECTION_FIELDS = ("seq", "frame_seq", "capture_ts", "detect_ts", "found", "cx", "cy",
+                    "width", "height", "detect_time")
+# Counters published by each stage
+STATS_FIELDS = ("capture_frames", "detect_frames", "detect_time_total",
+                "control_ticks", "commands", "latency_total", "latency_max")
+
+
+def open_frame_source(source, width=640, height=480, fps=None):
+    """
+    CameraModule for an integer camera index, ReplayFrameSource for a
+    recorder file, CameraModule over a looping FileSource for any other path.
+    """
+    from camera_module import CameraModule
+    if isinstance(source, int) or str(source).isdigit():
+        return CameraModule(camera_index=int(source), width=width, height=height)
+    from recorder import ReplayFrameSource, is_recording
+    if is_recording(str(source)):
+        return ReplayFrameSource(str(source), fps=fps, loop=True)
+    from frame_sources import FileSource
+    return CameraModule(source=FileSource(str(source), fps=fps))
+
+
+def probe_frame_shape(source, width=640, height=480):
+    if isinstance(source, int) or str(source).isdigit():
+        return (height, width, 3)
+    from recorder import RecordingReader, is_recording
+    if is_recording(str(source)):
+        reader = RecordingReader(str(source))
+        shape = reader.frame_shape
+        reader.close()
+        return shape
+    from frame_sources import FileSource
+    file_source = FileSource(str(source), loop=False)
+    try:
+        ret, frame = file_source.read()
+    finally:
+        file_source.release()
+    if not ret:
+        raise RuntimeError(f"No frames in {source}")
+    return frame.shape
+
+
+def capture_stage(source, width, height, fps, ring_spec, stats_spec, stop):
+    """
+    Worker: read frames from the source into the shared ring as fast as they come.
+    """
+    ring = SharedFrameRing.attach(ring_spec)
+    stats = SharedLatest.attach(stats_spec)
+    camera = open_frame_source(source, width, height, fps)
+    count = 0
+    try:
+        while not stop.is_set():
+            frame, timestamp, _ = camera.get_frame_info()
+            if frame.shape != ring.shape:
+                raise RuntimeError(f"Frame shape {frame.shape} does not match ring {ring.shape}")
+            ring.write(frame, timestamp)
+            count += 1
+            stats.write(capture_frames=count)
+    finally:
+        camera.release()
+        ring.close()
+        stats.close()
+
+
+def detect_stage(ring_spec, result_spec, stats_spec, detector_kwargs, stop):
+    """
+    Worker: run RobotDetector on the newest frame in the ring, publish the result.
+    """
+    from robot_detection import RobotDetector
+
+    ring = SharedFrameRing.attach(ring_spec)
+    results = SharedLatest.attach(result_spec)
+    stats = SharedLatest.attach(stats_spec)
+    detector = RobotDetector(**detector_kwargs)
+    last_seq = -1
+    count = 0
+    busy = 0.0
+    try:
+        while not stop.is_set():
+            claimed = ring.claim_latest(last_seq)
+            if claimed is None:
+                time.sleep(0.0005)
+                continue
+            _, frame, seq, capture_ts = claimed
+            t0 = time.monotonic()
+            try:
+                detection = detector.detect_robot(frame)
+            finally:
+                ring.release()
+            t1 = time.monotonic()
+            last_seq = seq
+            count += 1
+            busy += t1 - t0
+            height, width = frame.shape[:2]
+            cx, cy = detection if detection is not None else (0, 0)
+            results.write(seq=count, frame_seq=seq, capture_ts=capture_ts, detect_ts=t1,
+                          found=1.0 if detection is not None else 0.0, cx=cx, cy=cy,
+                          width=width, height=height, detect_time=t1 - t0)
+            stats.write(detect_frames=count, detect_time_total=busy)
+    finally:
+        ring.close()
+        results.close()
+        stats.close()
+
+
+def control_stage(result_spec, stats_spec, motor_pins, spinner_pin, pwm_freq,
+                  use_remote, sim, period, stop):
+    """
+    Worker: RC input, kill switch and motor mixing. In autonomous mode it
+    steers towards the newest published detection.
+    """
+    if sim:
+        from sim_hardware import install_fake_gpio
+        install_fake_gpio()
+    from motor_control import MotorController
+    from main import pursuit_command
+
+    results = SharedLatest.attach(result_spec)
+    stats = SharedLatest.attach(stats_spec)
+    motor_controller = MotorController(motor_pins, spinner_pin, pwm_freq=pwm_freq)
+    remote_control = None
+    if use_remote:
+        from remote_control import RemoteControl
+        remote_control = RemoteControl()
+
+    ticks = 0
+    commands = 0
+    latency_total = 0.0
+    latency_max = 0.0
+    last_result = 0
+    motor_controller.start_spinner()
+    try:
+        while not stop.is_set():
+            ticks += 1
+            if remote_control is not None:
+                remote_control.update()
+                if remote_control.get_killswitch():
+                    motor_controller.stop_all()
+                    motor_controller.stop_spinner()
+                    time.sleep(0.1)
+                    continue
+                mode = remote_control.get_mode()
+            else:
+                mode = 1
+
+            if mode == 0:
+                x_cmd, y_cmd, r_cmd = remote_control.get_movement()
+                motor_controller.xdrive_move(x_cmd, y_cmd, r_cmd)
+            else:
+                result = results.read()
+                if result["seq"] != last_result:
+                    last_result = result["seq"]
+                    if result["found"]:
+                        move_x, move_y, rotate = pursuit_command(
+                            result["cx"], result["cy"], int(result["width"]), int(result["height"]))
+                        motor_controller.xdrive_move(move_x, move_y, rotate)
+                    else:
+                        motor_controller.search_spin()
+                    # Capture -> motor command latency for this detection
+                    latency = time.monotonic() - result["capture_ts"]
+                    commands += 1
+                    latency_total += latency
+                    latency_max = max(latency_max, latency)
+            stats.write(control_ticks=ticks, commands=commands,
+                        latency_total=latency_total, latency_max=latency_max)
+            time.sleep(period)
+    finally:
+        if remote_control is not None:
+            remote_control.close()
+        motor_controller.shutdown()
+        results.close()
+        stats.close()
+
+
+def run_pipeline(source=0, duration=None, sim=False, use_remote=None, width=640, height=480,
+                 fps=None, detector_kwargs=None, motor_pins=(17, 27, 22, 23), spinner_pin=24,
+                 pwm_freq=1000, period=0.02, report=print):
+    """
+    Start the three stage processes and supervise them until `duration`
+    seconds have passed (or Ctrl+C). Returns the final throughput/latency summary.
+    """
+    if use_remote is None:
+        use_remote = not sim
+    detector_kwargs = dict(detector_kwargs or {})
+
+    shape = probe_frame_shape(source, width, height)
+    ring = SharedFrameRing(shape)
+    results = SharedLatest(DETECTION_FIELDS)
+    stats = SharedLatest(STATS_FIELDS)
+    stop = mp.Event()
+
+    workers = [
+        mp.Process(target=capture_stage, name="capture",
+                   args=(source, width, height, fps, ring.spec(), stats.spec(), stop)),
+        mp.Process(target=detect_stage, name="detect",
+                   args=(ring.spec(), results.spec(), stats.spec(), detector_kwargs, stop)),
+        mp.Process(target=control_stage, name="control",
+                   args=(results.spec(), stats.spec(), list(motor_pins), spinner_pin, pwm_freq,
+                         use_remote, sim, period, stop)),
+    ]
+    start = time.monotonic()
+    for worker in workers:
+        worker.start()
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            time.sleep(0.1)
+            if any(not worker.is_alive() for worker in workers):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=2.0)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    elapsed = time.monotonic() - start
+    final = stats.read()
+    summary = dict(
+        elapsed=elapsed,
+        capture_fps=final["capture_frames"] / elapsed,
+        detect_fps=final["detect_frames"] / elapsed,
+        detect_ms=1e3 * final["detect_time_total"] / max(1.0, final["detect_frames"]),
+        control_hz=final["control_ticks"] / elapsed,
+        commands=int(final["commands"]),
+        latency_ms_mean=1e3 * final["latency_total"] / max(1.0, final["commands"]),
+        latency_ms_max=1e3 * final["latency_max"],
+        exit_codes={worker.name: worker.exitcode for worker in workers},
+    )
+    ring.close()
+    results.close()
+    stats.close()
+    if report:
+        for key, value in summary.items():
+            report(f"{key:16s} {value:.2f}" if isinstance(value, float) else f"{key:16s} {value}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipelined capture/detect/control runtime")
+    parser.add_argument("--source", default="0", help="camera index or .npy/video file")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run")
+    parser.add_argument("--sim", action="store_true", help="use stand-in GPIO, no RC receiver")
+    parser.add_argument("--fps", type=float, default=None, help="pace file sources to this rate")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    run_pipeline(source=args.source, duration=args.duration, sim=args.sim,
+                 width=args.width, height=args.height, fps=args.fps,
+                 detector_kwargs=dict(min_area=500, history=500, var_threshold=16, track=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# pwm_backends.py
+"""
+PWM output backends for MotorController.
+
+A backend hands out one channel object per GPIO pin. Channels follow the
+RPi.GPIO.PWM method names so MotorController drives every backend the same
+way:
+    channel.start(duty)            duty in percent, 0..100
+    channel.ChangeDutyCycle(duty)
+    channel.stop()
+
+Backends:
+  - SoftwarePWMBackend: RPi.GPIO software PWM (any pin, costs CPU per pin)
+  - SysfsPWMBackend:    Linux kernel PWM via /sys/class/pwm (hardware timers,
+                        no CPU cost, limited to PWM-capable pins)
+"""
+import os
+import time
+
+class SoftwarePWMBackend:
+    """
+    RPi.GPIO software PWM. Channels are RPi.GPIO.PWM objects.
+    """
+
+    def __init__(self, pwm_freq=1000):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.pwm_freq = pwm_freq
+        GPIO.setmode(GPIO.BCM)
+
+    def open_channel(self, pin):
+        self.GPIO.setup(pin, self.GPIO.OUT)
+        return self.GPIO.PWM(pin, self.pwm_freq)
+
+    def cleanup(self):
+        self.GPIO.cleanup()
+
+
+class SysfsPWMChannel:
+    """
+    One kernel PWM channel. Keeps the duty_cycle file open so each update
+    is a single pwrite().
+    """
+
+    def __init__(self, path, period_ns):
+        self.path = path
+        self.period_ns = period_ns
+        # Duty must never exceed the period; zero it before changing the period
+        self._write("duty_cycle", 0)
+        self._write("period", period_ns)
+        self._duty_fd = os.open(os.path.join(path, "duty_cycle"), os.O_WRONLY)
+        self._truncate = True
+
+    def _write(self, name, value):
+        with open(os.path.join(self.path, name), "w") as f:
+            f.write(str(value))
+
+    def start(self, duty):
+        self.ChangeDutyCycle(duty)
+        self._write("enable", 1)
+
+    def ChangeDutyCycle(self, duty):
+        if not 0.0 <= duty <= 100.0:
+            raise ValueError("dutycycle must have a value from 0.0 to 100.0")
+        value = str(int(self.period_ns * duty / 100.0)).encode()
+        os.pwrite(self._duty_fd, value, 0)
+        if self._truncate:
+            # Only matters for plain files (e.g. a fake sysfs tree in tests);
+            # sysfs attributes take the written value as a whole.
+            try:
+                os.ftruncate(self._duty_fd, len(value))
+            except OSError:
+                self._truncate = False
+
+    def stop(self):
+        self._write("enable", 0)
+        if self._duty_fd is not None:
+            os.close(self._duty_fd)
+            self._duty_fd = None
+
+
+class SysfsPWMBackend:
+    """
+    Linux sysfs hardware PWM (e.g. `dtoverlay=pwm-2chan` on the Pi, which
+    maps GPIO18 -> pwmchip0/pwm0 and GPIO19 -> pwmchip0/pwm1).
+    """
+
+    # Default Raspberry Pi mapping for the pwm-2chan overlay
+    PI_CHANNELS = {12: (0, 0), 18: (0, 0), 13: (0, 1), 19: (0, 1)}
+
+    def __init__(self, pwm_freq=1000, channels=None, root="/sys/class/pwm", export_timeout=1.0,
+                 fallback=None):
+        """
+        :param pwm_freq: PWM frequency in Hz.
+        :param channels: dict pin -> (chip, channel); defaults to PI_CHANNELS.
+        :param root: sysfs PWM class directory (point at a fake tree for testing).
+        :param export_timeout: Seconds to wait for udev to create an exported channel.
+        :param fallback: Backend for pins without a hardware channel (e.g.
+                         SoftwarePWMBackend); without one such pins raise ValueError.
+        """
+        self.pwm_freq = pwm_freq
+        self.period_ns = int(round(1e9 / pwm_freq))
+        self.channels = dict(self.PI_CHANNELS if channels is None else channels)
+        self.root = root
+        self.export_timeout = export_timeout
+        self.fallback = fallback
+        self._exported = []
+
+    def open_channel(self, pin):
+        if pin not in self.channels:
+            if self.fallback is not None:
+                return self.fallback.open_channel(pin)
+            raise ValueError(f"GPIO{pin} has no hardware PWM channel configured")
+        chip, channel = self.channels[pin]
+        chip_path = os.path.join(self.root, f"pwmchip{chip}")
+        path = os.path.join(chip_path, f"pwm{channel}")
+        if not os.path.isdir(path):
+            with open(os.path.join(chip_path, "export"), "w") as f:
+                f.write(str(channel))
+            self._exported.append((chip_path, channel))
+            deadline = time.monotonic() + self.export_timeout
+            while not os.path.isdir(path):
+                if time.monotonic() > deadline:
+                    raise IOError(f"PWM channel {path} did not appear after export")
+                time.sleep(0.01)
+        return SysfsPWMChannel(path, self.period_ns)
+
+    def cleanup(self):
+        for chip_path, channel in self._exported:
+            try:
+                with open(os.path.join(chip_path, "unexport"), "w") as f:
+                    f.write(str(channel))
+            except OSError:
+                pass
+        self._exported = []
+        if self.fallback is not None:
+            self.fallback.cleanup()
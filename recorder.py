@@ -0,0 +1,283 @@
+# recorder.py
+"""
+Memory-mapped match recorder and high-speed replay.
+
+A recording is one file of fixed-size records, preallocated up front and
+memory-mapped, so appending a loop is a copy into the mapping and reading
+record N is pointer arithmetic. Each record holds:
+  - timestamp      time.monotonic() when the record was written
+  - frame_seq      camera sequence number of the frame
+  - capture_time   camera capture timestamp
+  - channels       the 14 iBus channel values of the newest RC snapshot
+  - rc_time        timestamp of that RC snapshot (0 if none yet)
+  - found, cx, cy  detection result
+  - frame          the raw frame (H x W x C uint8)
+
+File layout: 4096-byte header (magic, record count, JSON description),
+then `capacity` records laid out as a NumPy structured array.
+
+Usage:
+    recorder = Recorder("match.rec", frame_shape=(480, 640, 3), capacity=9000)
+    recorder.append(frame, channels=rc.ibus.get_snapshot().channels, detection=(cx, cy))
+    recorder.close()
+
+    source = ReplayFrameSource("match.rec")      # same interface as CameraModule
+    frame = source.get_frame()                   # zero-copy view into the file
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"FLREC001"
+HEADER_SIZE = 4096
+# magic, record count, JSON length
+_HEADER = struct.Struct("<8sQI")
+IBUS_CHANNELS = 14
+# Free space left on the disk when sizing a recording (logs, telemetry, OS)
+DISK_RESERVE = 256 * 1024 * 1024
+
+
+def record_dtype(frame_shape):
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("frame_seq", "<i8"),
+        ("capture_time", "<f8"),
+        ("rc_time", "<f8"),
+        ("channels", "<u2", (IBUS_CHANNELS,)),
+        ("found", "u1"),
+        ("cx", "<i4"),
+        ("cy", "<i4"),
+        ("frame", "u1", tuple(frame_shape)),
+    ], align=True)
+
+
+def fit_records(path, record_size, capacity, header_size=HEADER_SIZE, reserve=DISK_RESERVE):
+    """
+    Largest record count up to `capacity` whose file (header plus records of
+    `record_size` bytes) fits on the disk holding `path` with `reserve` bytes
+    to spare (0 if none fits). The file is sparse until written, so it has
+    to fit before recording starts: a write into the mapping on a full disk
+    kills the process.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    free = shutil.disk_usage(directory).free
+    if os.path.exists(path):
+        # Overwritten, so its current blocks are reclaimed
+        free += os.stat(path).st_blocks * 512
+    return max(0, min(capacity, (free - reserve - header_size) // record_size))
+
+
+def fit_capacity(path, frame_shape, capacity, reserve=DISK_RESERVE):
+    """
+    fit_records() for a recording of `frame_shape` frames.
+    """
+    return fit_records(path, record_dtype(frame_shape).itemsize, capacity, reserve=reserve)
+
+
+class Recorder:
+    """
+    Appends fixed-size records to a preallocated, memory-mapped file.
+    When the file is full further appends are dropped and counted.
+    """
+
+    def __init__(self, path, frame_shape, capacity):
+        """
+        :param path: Output file (overwritten).
+        :param frame_shape: (H, W, C) of the frames that will be recorded.
+        :param capacity: Maximum number of records (e.g. seconds * fps); see
+                         fit_capacity() to bound it by the free disk space.
+        """
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.capacity = capacity
+        self.dtype = record_dtype(self.frame_shape)
+        self.count = 0
+        self.dropped = 0
+
+        description = json.dumps(dict(frame_shape=self.frame_shape, capacity=capacity,
+                                      record_size=self.dtype.itemsize,
+                                      fields=self.dtype.descr)).encode()
+        if _HEADER.size + len(description) > HEADER_SIZE:
+            raise ValueError("recording description does not fit in the header")
+
+        size = HEADER_SIZE + self.dtype.itemsize * capacity
+        with open(path, "wb") as f:
+            f.truncate(size)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._map[:_HEADER.size] = _HEADER.pack(MAGIC, 0, len(description))
+        self._map[_HEADER.size:_HEADER.size + len(description)] = description
+        self.records = np.ndarray((capacity,), dtype=self.dtype, buffer=self._map,
+                                  offset=HEADER_SIZE)
+
+    def append(self, frame, channels=None, detection=None, frame_seq=-1,
+               capture_time=0.0, rc_time=None, timestamp=None):
+        """
+        Write one loop's frame and telemetry. Returns False if the file is full.
+        """
+        if self.count >= self.capacity:
+            self.dropped += 1
+            return False
+        rec = self.records[self.count]
+        rec["timestamp"] = time.monotonic() if timestamp is None else timestamp
+        rec["frame_seq"] = frame_seq
+        rec["capture_time"] = capture_time
+        rec["rc_time"] = rc_time or 0.0
+        if channels is not None:
+            n = min(len(channels), IBUS_CHANNELS)
+            rec["channels"][:n] = channels[:n]
+        if detection is None:
+            rec["found"] = 0
+        else:
+            rec["found"] = 1
+            rec["cx"], rec["cy"] = detection
+        rec["frame"] = frame
+        self.count += 1
+        # Publish the new count so a crash still leaves a readable file
+        struct.pack_into("<Q", self._map, 8, self.count)
+        return True
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if self._map is None:
+            return
+        self.records = None
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+        self._map = None
+
+
+class RecordingReader:
+    """
+    Read-only, memory-mapped view of a recording. `records` is a structured
+    array of the written records; `frames` is an (N, H, W, C) view of them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, json_len = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        description = json.loads(self._map[_HEADER.size:_HEADER.size + json_len])
+        self.frame_shape = tuple(description["frame_shape"])
+        self.capacity = description["capacity"]
+        self.dtype = record_dtype(self.frame_shape)
+        self.count = count
+        self.records = np.ndarray((count,), dtype=self.dtype, buffer=self._map,
+                                  offset=HEADER_SIZE)
+        self.frames = self.records["frame"]
+
+    def __len__(self):
+        return self.count
+
+    def telemetry(self):
+        """
+        Copy of every field except the frames, for analysis.
+        """
+        names = [n for n in self.dtype.names if n != "frame"]
+        out = np.empty(self.count, dtype=[(n, self.dtype[n]) for n in names])
+        for n in names:
+            out[n] = self.records[n]
+        return out
+
+    def close(self):
+        if self._map is None:
+            return
+        self.records = self.frames = None
+        try:
+            self._map.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping is freed with it
+            pass
+        self._file.close()
+        self._map = None
+
+
+class ReplayFrameSource:
+    """
+    Replays a recording with the CameraModule interface. Frames are
+    read-only views into the memory-mapped file, so replay is never
+    I/O-bound once the file is in the page cache.
+    """
+
+    def __init__(self, path, fps=None, loop=False, realtime=False):
+        """
+        :param fps: Deliver at most this many frames per second (None = as fast as possible).
+        :param loop: Rewind at the end instead of raising.
+        :param realtime: Pace frames by their recorded timestamps.
+        """
+        self.reader = RecordingReader(path)
+        if len(self.reader) == 0:
+            raise RuntimeError(f"{path} contains no records")
+        self.period = 1.0 / fps if fps else 0.0
+        self.loop = loop
+        self.realtime = realtime
+        self.index = 0
+        self._next_time = time.monotonic()
+        self._start = None
+        self.last_timestamp = None
+        self.last_seq = -1
+
+    def __len__(self):
+        return len(self.reader)
+
+    def _pace(self):
+        if self.realtime:
+            rec_time = self.reader.records[self.index]["timestamp"]
+            if self._start is None or self.index == 0:
+                self._start = (time.monotonic(), rec_time)
+            wall0, rec0 = self._start
+            delay = (rec_time - rec0) - (time.monotonic() - wall0)
+            if delay > 0:
+                time.sleep(delay)
+        elif self.period:
+            delay = self._next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time + self.period, time.monotonic())
+
+    def get_frame_info(self, timeout=None, newer_than=None):
+        # Every call returns the next record, so it is always newer than `newer_than`
+        if self.index >= len(self.reader):
+            if not self.loop:
+                raise RuntimeError("End of recording.")
+            self.index = 0
+        self._pace()
+        frame = self.reader.frames[self.index]
+        self.last_timestamp = time.monotonic()
+        self.last_seq += 1
+        self.index += 1
+        return frame, self.last_timestamp, self.last_seq
+
+    def get_frame(self):
+        frame, _, _ = self.get_frame_info()
+        return frame
+
+    def get_record(self):
+        """
+        Telemetry record of the frame most recently returned.
+        """
+        return self.reader.records[max(0, self.index - 1)]
+
+    def release(self):
+        self.reader.close()
+
+
+def is_recording(path):
+    """
+    True if `path` is a recorder file (checks the magic bytes).
+    """
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
@@ -5,6 +5,11 @@ class RemoteControl:
     """
     Reads from iBus (via a real UART).
     Provides a method to get mode, get movement, and get killswitch states.
+
+    With `threaded=True` a background thread reads the UART, so RC input is
+    decoded as it arrives instead of waiting for the main loop. With
+    `failsafe_ms` set, data older than that (or no data at all yet) counts
+    as the kill switch being on.
     """
     def __init__(self,
                  uart_port='/dev/ttyAMA0',
@@ -14,18 +19,43 @@ class RemoteControl:
                  x_channel=0,
                  y_channel=1,
                  rotate_channel=3,
-                 killswitch_channel=5):
-        self.ibus = IBUSReceiver(uart_port=uart_port, baud=baud, num_channels=num_channels)
+                 killswitch_channel=5,
+                 threaded=False,
+                 failsafe_ms=None,
+                 ser=None):
+        """
+        :param threaded: Read iBus on a background thread (update() becomes a no-op).
+        :param failsafe_ms: Treat RC data older than this as a kill (None disables).
+        :param ser: Already-open serial-like object, passed through to IBUSReceiver.
+        """
+        self.ibus = IBUSReceiver(uart_port=uart_port, baud=baud, num_channels=num_channels, ser=ser)
         self.mode_channel = mode_channel
         self.x_channel = x_channel
         self.y_channel = y_channel
         self.rotate_channel = rotate_channel
         self.killswitch_channel = killswitch_channel
+        self.failsafe_ms = failsafe_ms
+        if threaded:
+            self.ibus.start_reader()
 
     def update(self):
         # Now we read from the serial buffer and parse iBus frames
         self.ibus.update()
 
+    def signal_age(self):
+        """
+        Seconds since the last valid iBus frame (infinity before the first one).
+        """
+        return self.ibus.signal_age()
+
+    def is_signal_lost(self):
+        """
+        True if failsafe is enabled and the newest RC data is older than failsafe_ms.
+        """
+        if self.failsafe_ms is None:
+            return False
+        return self.signal_age() * 1000.0 > self.failsafe_ms
+
     def get_mode(self):
         """
         For example, channel 4 above 1500 => auton
@@ -34,9 +64,11 @@ class RemoteControl:
         return 1 if val > 1500 else 0
 
     def get_movement(self):
-        x_val = self.ibus.get_channel(self.x_channel)
-        y_val = self.ibus.get_channel(self.y_channel)
-        r_val = self.ibus.get_channel(self.rotate_channel)
+        # All three axes from the same frame
+        channels = self.ibus.get_snapshot().channels
+        x_val = self._channel(channels, self.x_channel)
+        y_val = self._channel(channels, self.y_channel)
+        r_val = self._channel(channels, self.rotate_channel)
 
         def norm(v):
             return (v - 1500) / 500.0  # 1000..2000 -> -1..+1
@@ -44,8 +76,16 @@ class RemoteControl:
         return norm(x_val), norm(y_val), norm(r_val)
 
     def get_killswitch(self):
+        if self.is_signal_lost():
+            return True
         val = self.ibus.get_channel(self.killswitch_channel)
         return (val > 1500)
 
+    @staticmethod
+    def _channel(channels, ch_index):
+        if 0 <= ch_index < len(channels):
+            return channels[ch_index]
+        return 1500
+
     def close(self):
         self.ibus.close()
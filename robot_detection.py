@@ -1,6 +1,10 @@
 # robot_detection.py
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
+from instrumentation import DISABLED
+from motion_gate import ALL_BLOCKS, BlockBackgroundModel
 
 class RobotDetector:
     """
@@ -13,6 +17,49 @@ class RobotDetector:
     Usage:
       1. Create once with `RobotDetector(...)`.
       2. Call `detect_robot(frame)` each loop to get (cx, cy) or None.
+
+    Tracking mode (`track=True`): once the robot is found, later frames only run
+    thresholding, morphology and contour search inside a region of interest
+    around the predicted position, sized from the last bounding box and
+    velocity. After `max_misses` consecutive misses it falls back to a
+    full-frame search.
+
+    Multi-resolution mode (`scale` < 1): background subtraction, morphology
+    and contours run on a frame downscaled by `scale` (e.g. 0.5 or 0.25).
+    Results are mapped back to full-frame coordinates, optionally refined at
+    full resolution inside the coarse bounding box (`refine=True`).
+
+    Luma input: `detect_robot` also takes single-channel (H, W) frames, e.g.
+    the camera_module.LumaFrame Y plane. Background subtraction and
+    morphology then run on one channel; with the color filter enabled the
+    colour image is taken from `frame.bgr()` only when it is needed.
+
+    Tiled mode (`workers` > 1): thresholding, morphology and blob search run
+    on horizontal stripes on a thread pool (OpenCV releases the GIL). Each
+    stripe is processed with a halo of extra rows as deep as the morphology
+    reaches, so its core rows match the full-image mask exactly. Blobs cut by
+    a stripe boundary are merged before picking the largest, so the result
+    is identical to `workers=1`. Background subtraction stays on the whole
+    frame (OpenCV already parallelizes MOG2 internally).
+
+    Motion gating (`motion_gate=motion_gate.MotionGate(...)`): each frame is
+    first compared with the last processed one on a coarse block grid. If
+    nothing changed, the previous result is returned without running any
+    stage (background model untouched; the track only counts the frame, so
+    velocity and ROI prediction span the frames the gate skipped). If only a few blocks
+    changed, background subtraction runs on those blocks only and the rest
+    of the foreground mask is kept from the last frame (blocks that had
+    foreground are recomputed too, as MOG2 keeps changing their mask while
+    the image stands still); thresholding, morphology and blob search then
+    run as usual. The default MOG2 is
+    replaced by a motion_gate.BlockBackgroundModel on the gate's grid, which
+    gives the same mask block for block.
+
+    Warm-up: MOG2 starts from scratch at startup and whenever the processing
+    size changes (set_quality(scale=...)), and its first masks are mostly
+    noise. `warming_up()` is True until the model has seen `warmup_frames`
+    frames at the current size; callers should not act on detections until
+    then. The motion gate is bypassed meanwhile.
     """
 
     def __init__(self,
@@ -21,79 +68,693 @@ class RobotDetector:
                  lower_color=(0, 0, 0),   # HSV lower bound
                  upper_color=(179, 255, 255), # HSV upper bound
                  history=500,
-                 var_threshold=16):
+                 var_threshold=16,
+                 track=False,
+                 roi_margin=1.0,
+                 max_misses=3,
+                 scale=1.0,
+                 scale_min_area=True,
+                 refine=False,
+                 blob_method="contours",
+                 morph_iterations=2,
+                 background_model=None,
+                 workers=1,
+                 motion_gate=None,
+                 warmup_frames=None,
+                 profiler=None):
         """
         :param min_area: Minimum contour area to consider a valid robot.
         :param use_color_filter: Whether to combine color-based filtering with motion detection.
         :param lower_color, upper_color: (H, S, V) ranges for color filtering.
         :param history: Number of frames for background subtractor to build a stable background model.
         :param var_threshold: Threshold for background subtractor's internal segmentation.
+        :param track: Restrict processing to a region of interest around the last detection.
+        :param roi_margin: ROI padding on each side, as a multiple of the last box size.
+        :param max_misses: Consecutive ROI misses before falling back to a full-frame search.
+        :param scale: Processing scale relative to the input frame (1.0, 0.5, 0.25, ...).
+        :param scale_min_area: Multiply min_area by scale**2 when processing downscaled frames.
+        :param refine: Re-run the mask, morphology and contour step at full resolution
+                       inside the coarse box.
+        :param blob_method: "contours" (findContours, fastest on sparse masks) or
+                            "components" (connectedComponentsWithStats, cost independent
+                            of blob count, area is the pixel count).
+        :param morph_iterations: Close/dilate iterations in the morphology cleanup.
+        :param background_model: Background subtractor to use instead of MOG2, e.g. a
+                                 background_model.NumpyBackgroundModel restored from a
+                                 snapshot (history / var_threshold are then unused).
+        :param workers: Number of stripes/threads for the tiled mask and blob search
+                        (1 = serial).
+        :param motion_gate: motion_gate.MotionGate that skips or narrows the work on
+                            frames that did not change (None = process every frame).
+        :param warmup_frames: Frames a fresh background model needs before detections
+                              are trusted (see warming_up()). Defaults to 30 for MOG2
+                              and 0 for a `background_model`; one with its own
+                              warming_up() is asked instead.
+        :param profiler: instrumentation.Profiler; records "detector.*" substage timings.
         """
+        if not 0.0 < scale <= 1.0:
+            raise ValueError("scale must be in (0, 1]")
+        if morph_iterations < 1:
+            raise ValueError("morph_iterations must be at least 1")
+        if blob_method not in ("contours", "components"):
+            raise ValueError("blob_method must be 'contours' or 'components'")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
         self.min_area = min_area
         self.use_color_filter = use_color_filter
         self.lower_color = lower_color
         self.upper_color = upper_color
+        self.scale = scale
+        self.scale_min_area = scale_min_area
+        self.refine = refine
+        self.blob_method = blob_method
+        self.morph_iterations = morph_iterations
+        self.workers = workers
+        # Stripes 1..n-1 run here; stripe 0 runs on the calling thread
+        self._pool = (ThreadPoolExecutor(max_workers=workers - 1,
+                                         thread_name_prefix="detector-tile")
+                      if workers > 1 else None)
+        self.profiler = profiler if profiler is not None else DISABLED
+
+        self.track = track
+        self.roi_margin = roi_margin
+        self.max_misses = max_misses
+        # Last detection as full-frame (x, y, w, h) bounding box plus per-frame velocity of its center
+        self.last_box = None
+        self.velocity = (0.0, 0.0)
+        self.misses = 0
+        # Frames the motion gate skipped since the last box (not misses: nothing moved enough)
+        self.skipped = 0
+        # Full-frame ROI (x0, y0, x1, y1) used on the last call, or None for full frame
+        self.last_roi = None
+
+        self.motion_gate = motion_gate
+        # Result of the last processed frame, returned when the gate sees no change
+        self._last_result = None
+        # Processing shape the "fg" buffer currently holds a complete mask for
+        self._fg_shape = None
+
+        if warmup_frames is None:
+            warmup_frames = 0 if background_model is not None else 30
+        self.warmup_frames = warmup_frames
+        # Processing shape the background model was started at, and frames it has seen since
+        self._model_shape = None
+        self._model_frames = 0
 
         # Create a background subtractor. MOG2 is generally robust to some lighting changes.
-        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=history, varThreshold=var_threshold, detectShadows=True
-        )
+        if background_model is not None:
+            self.bg_subtractor = background_model
+        elif motion_gate is not None:
+            self.bg_subtractor = BlockBackgroundModel(
+                motion_gate.grid,
+                lambda: cv2.createBackgroundSubtractorMOG2(
+                    history=history, varThreshold=var_threshold, detectShadows=True))
+        else:
+            self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
+                history=history, varThreshold=var_threshold, detectShadows=True
+            )
 
         # Morphology kernel to help clean up noise
         self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
 
+        # Persistent per-stage working buffers (see _buffer), so steady-state
+        # detection does not allocate image-sized arrays
+        self._buffers = {}
+
     def detect_robot(self, frame):
         """
         Returns (cx, cy) for the largest valid "robot" contour, or None if none found.
+        `frame` is BGR (H, W, 3) or luma (H, W); see the class docstring.
         Steps:
           1) Convert to HSV if color_filter is used
           2) Apply color mask if requested
           3) Apply background subtraction to isolate motion
           4) Morphological cleanup
-          5) Find contours, pick largest above min_area
+          5) Find contours (or components), pick largest above min_area
+        In tracking mode steps 1, 2, 4 and 5 only run inside the ROI.
+        With scale < 1 everything runs on the downscaled frame and the result
+        is mapped back to full-frame coordinates.
+        With a motion gate, unchanged frames return the previous result.
         """
-        # 1) (Optional) color filtering in HSV space
-        if self.use_color_filter:
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            color_mask = cv2.inRange(hsv, self.lower_color, self.upper_color)
+        scale = self.scale
+        height, width = frame.shape[:2]
+        if scale != 1.0:
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            small = self._buffer("small", (size[1], size[0]) + frame.shape[2:])
+            with self.profiler.stage("detector.resize"):
+                cv2.resize(frame, size, dst=small, interpolation=cv2.INTER_AREA)
         else:
-            # If no color filtering, just create a mask of all 255
-            color_mask = np.ones(frame.shape[:2], dtype=np.uint8) * 255
+            small = frame
+        blocks = ALL_BLOCKS
+        # A warming-up model has to see every frame, or a still scene would
+        # keep it fresh indefinitely
+        if self.motion_gate is not None and not self.warming_up():
+            with self.profiler.stage("detector.gate"):
+                partial = self._can_apply_blocks(small)
+                active = None
+                if partial:
+                    previous = self._buffer("fg", small.shape[:2])
+                    active = self.bg_subtractor.foreground_blocks(previous)
+                blocks = self.motion_gate.check(small, partial=partial, active=active)
+            if blocks is None:
+                if self.last_box is not None:
+                    self.skipped += 1
+                return self._last_result
+        min_area = self.effective_min_area()
+        color, small_color = self._color_source(frame, small)
 
-        # 2) Background subtractor mask
-        fg_mask = self.bg_subtractor.apply(frame)
+        # The background model has to see every full frame to stay consistent,
+        # so MOG2 always runs on the whole (possibly downscaled) image, unless
+        # the gate narrowed the frame down to the blocks that changed.
+        fg_mask = self._buffer("fg", small.shape[:2])
+        with self.profiler.stage("detector.mog2"):
+            if blocks is ALL_BLOCKS:
+                self.bg_subtractor.apply(small, fgmask=fg_mask)
+            else:
+                self.bg_subtractor.apply_blocks(small, fg_mask, blocks)
+        self._fg_shape = fg_mask.shape
+        if fg_mask.shape != self._model_shape:
+            self._model_shape = fg_mask.shape
+            self._model_frames = 0
+        self._model_frames += 1
 
-        # The subtractor might label shadows differently. We can threshold them out:
-        # Everything > 127 is considered foreground
-        _, fg_mask = cv2.threshold(fg_mask, 127, 255, cv2.THRESH_BINARY)
-
-        # Combine color_mask AND foreground mask
-        combined_mask = cv2.bitwise_and(color_mask, fg_mask)
-
-        # 3) Morphological operations to reduce noise
-        # E.g., close small holes
-        combined_mask = cv2.morphologyEx(combined_mask, cv2.MORPH_CLOSE, self.kernel, iterations=2)
-        # Erode + Dilate to remove small specks
-        combined_mask = cv2.erode(combined_mask, self.kernel, iterations=1)
-        combined_mask = cv2.dilate(combined_mask, self.kernel, iterations=2)
-
-        # 4) Find contours in the mask
-        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        best_contour = None
-        best_area = 0
-        for c in contours:
-            area = cv2.contourArea(c)
-            if area >= self.min_area and area > best_area:
-                best_area = area
-                best_contour = c
-
-        if best_contour is None:
+        roi = self._tracking_roi(frame.shape) if self.track else None
+        self.last_roi = roi
+        if roi is not None:
+            x0, y0, x1, y1 = self._to_processing(roi, small.shape)
+            box = None
+            if x1 > x0 and y1 > y0:
+                box = self._find_robot(None if small_color is None else small_color[y0:y1, x0:x1],
+                                       fg_mask[y0:y1, x0:x1], min_area)
+            if box is not None:
+                box = (box[0] + x0, box[1] + y0, box[2], box[3])
+        else:
+            box = self._find_robot(small_color, fg_mask, min_area)
+
+        if box is not None and scale != 1.0:
+            box = self._to_full(box, frame.shape)
+            if self.refine:
+                with self.profiler.stage("detector.refine"):
+                    box = self._refine(frame.shape, color, fg_mask, box) or box
+
+        if self.track:
+            self._update_track(box)
+
+        if box is None:
+            self._last_result = None
             return None  # No valid robot found
 
         # 5) Compute bounding box & center
-        x, y, w, h = cv2.boundingRect(best_contour)
+        x, y, w, h = box
         cx = x + w // 2
         cy = y + h // 2
 
+        self._last_result = (cx, cy)
         return (cx, cy)
+
+    def _can_apply_blocks(self, small):
+        """
+        True if background subtraction can be limited to the changed blocks:
+        the model supports it, is built for this size, and the "fg" buffer
+        still holds the previous mask at that size.
+        """
+        model = self.bg_subtractor
+        return (hasattr(model, "apply_blocks") and model.ready_for(small.shape)
+                and self._fg_shape == small.shape[:2])
+
+    def warming_up(self):
+        """
+        True while the background model is too fresh for its detections to be
+        trusted: fewer than `warmup_frames` frames since startup or since the
+        last change of processing size, or the background model's own
+        warming_up() if it has one (e.g. background_model.NumpyBackgroundModel).
+        """
+        model_warming_up = getattr(self.bg_subtractor, "warming_up", None)
+        if model_warming_up is not None:
+            return model_warming_up()
+        return self._model_frames < self.warmup_frames
+
+    def set_quality(self, scale=None, morph_iterations=None):
+        """
+        Change processing scale and/or morphology iterations between frames.
+        The track is kept (it is in full-frame coordinates); MOG2 re-learns its
+        background from the next frame when the processing size changes, and
+        warming_up() is True again until it has settled.
+        """
+        if scale is not None:
+            if not 0.0 < scale <= 1.0:
+                raise ValueError("scale must be in (0, 1]")
+            if scale != self.scale and self.motion_gate is not None:
+                self.motion_gate.reset()
+            self.scale = scale
+        if morph_iterations is not None:
+            if morph_iterations < 1:
+                raise ValueError("morph_iterations must be at least 1")
+            if morph_iterations != self.morph_iterations and self.motion_gate is not None:
+                self.motion_gate.reset()
+            self.morph_iterations = morph_iterations
+
+    def effective_min_area(self):
+        """
+        min_area in processing-resolution pixels.
+        """
+        if self.scale_min_area:
+            return self.min_area * self.scale * self.scale
+        return self.min_area
+
+    def _buffer(self, name, shape, dtype=np.uint8):
+        """
+        Persistent working buffer for one pipeline stage. Each name owns a flat
+        backing array that only grows; the returned array is a contiguous view
+        of the requested shape, so ROI-sized calls reuse the full-frame storage.
+        """
+        size = int(np.prod(shape))
+        backing = self._buffers.get(name)
+        if backing is None or backing.size < size or backing.dtype != dtype:
+            backing = np.empty(size, dtype=dtype)
+            self._buffers[name] = backing
+        return backing[:size].reshape(shape)
+
+    def _color_source(self, frame, small):
+        """
+        BGR images for the color filter, at full and at processing resolution,
+        or (None, None) when the filter is off. Luma frames are converted
+        through their `bgr()` here, i.e. only when the filter needs colour.
+        """
+        if not self.use_color_filter:
+            return None, None
+        if frame.ndim == 3:
+            return frame, small
+        to_bgr = getattr(frame, "bgr", None)
+        if to_bgr is None:
+            raise ValueError("use_color_filter needs BGR frames or LumaFrames with a colour source")
+        with self.profiler.stage("detector.color"):
+            color = to_bgr()
+            if small is frame:
+                return color, color
+            small_color = self._buffer("small_color", small.shape + (3,))
+            cv2.resize(color, (small.shape[1], small.shape[0]), dst=small_color,
+                       interpolation=cv2.INTER_AREA)
+        return color, small_color
+
+    def close(self):
+        """
+        Shut down the tile thread pool (tiled mode).
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _find_robot(self, color, fg_mask, min_area):
+        """
+        Color filter, threshold, morphology and blob search on `color` /
+        `fg_mask` (full images or matching ROI views; `color` is None when
+        the color filter is off).
+        Returns the (x, y, w, h) box of the largest valid blob, or None.
+        """
+        if self._pool is not None:
+            stripes = self._stripes(fg_mask.shape[0])
+            if len(stripes) > 1:
+                return self._find_robot_tiled(color, fg_mask, min_area, stripes)
+        profiler = self.profiler
+        with profiler.stage("detector.foreground"):
+            mask = self._foreground(color, fg_mask)
+        with profiler.stage("detector.morphology"):
+            mask = self._morphology(mask)
+        with profiler.stage("detector.blob"):
+            return self._largest_blob(mask, min_area)
+
+    def _foreground(self, color, fg_mask, prefix=""):
+        """
+        Binary foreground mask, ANDed with the HSV color mask when enabled.
+        `prefix` selects a separate set of working buffers (one per tile).
+        """
+        shape = fg_mask.shape
+        # The subtractor might label shadows differently. We can threshold them out:
+        # Everything > 127 is considered foreground
+        mask = self._buffer(prefix + "mask", shape)
+        cv2.threshold(fg_mask, 127, 255, cv2.THRESH_BINARY, dst=mask)
+
+        # (Optional) color filtering in HSV space; without it there is nothing to AND
+        if self.use_color_filter:
+            hsv = self._buffer(prefix + "hsv", shape + (3,))
+            cv2.cvtColor(color, cv2.COLOR_BGR2HSV, dst=hsv)
+            color_mask = self._buffer(prefix + "color", shape)
+            cv2.inRange(hsv, self.lower_color, self.upper_color, dst=color_mask)
+            cv2.bitwise_and(color_mask, mask, dst=mask)
+        return mask
+
+    def _morphology(self, mask, prefix=""):
+        """
+        Close small holes, then erode + dilate to remove small specks.
+        Ping-pongs between two persistent buffers; returns the cleaned mask.
+        """
+        tmp = self._buffer(prefix + "morph", mask.shape)
+        iterations = self.morph_iterations
+        cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.kernel, dst=tmp, iterations=iterations)
+        cv2.erode(tmp, self.kernel, dst=mask, iterations=1)
+        cv2.dilate(mask, self.kernel, dst=tmp, iterations=iterations)
+        return tmp
+
+    def _largest_blob(self, mask, min_area):
+        """
+        Returns the (x, y, w, h) box of the largest blob with at least
+        min_area, or None. Uses external contours or a single
+        connected-components-with-stats pass, depending on blob_method.
+        """
+        if self.blob_method == "components":
+            labels = self._buffer("labels", mask.shape, np.int32)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(
+                mask, labels=labels, connectivity=8)
+            if count < 2:
+                return None
+            # Row 0 is the background
+            areas = stats[1:, cv2.CC_STAT_AREA]
+            best = _first_largest(areas, stats[1:])
+            if areas[best] < min_area:
+                return None
+            x, y, w, h = stats[best + 1, :4]
+            return (int(x), int(y), int(w), int(h))
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+        return _pick_largest([(cv2.contourArea(c), cv2.boundingRect(c)) for c in contours],
+                             min_area)
+
+    def _halo(self):
+        """
+        Rows of context a stripe needs so its core matches the full-image
+        mask: how far _morphology reaches (close, erode, dilate).
+        """
+        radius = max(self.kernel.shape) // 2
+        return radius * (3 * self.morph_iterations + 1)
+
+    def _stripes(self, height):
+        """
+        Row ranges [(y0, y1), ...] of the tiles for a region `height` rows tall.
+        Cores shorter than two halos are not worth splitting for.
+        """
+        count = min(self.workers, height // (2 * self._halo()))
+        if count < 2:
+            return [(0, height)]
+        bounds = [height * k // count for k in range(count + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _find_robot_tiled(self, color, fg_mask, min_area, stripes):
+        """
+        _find_robot on horizontal stripes in parallel, then merge the blobs
+        that cross stripe boundaries. Same result as the serial path.
+        """
+        height = fg_mask.shape[0]
+        with self.profiler.stage("detector.tiles"):
+            futures = [self._pool.submit(self._tile, k, color, fg_mask, y0, y1, min_area)
+                       for k, (y0, y1) in enumerate(stripes) if k > 0]
+            y0, y1 = stripes[0]
+            tiles = [self._tile(0, color, fg_mask, y0, y1, min_area)]
+            tiles += [future.result() for future in futures]
+        with self.profiler.stage("detector.merge"):
+            if self.blob_method == "components":
+                candidates = self._merge_components(tiles, stripes)
+            else:
+                candidates = self._merge_contours(tiles, stripes, fg_mask.shape)
+        return _pick_largest(candidates, min_area)
+
+    def _tile(self, index, color, fg_mask, y0, y1, min_area):
+        """
+        Mask, morphology and blob search for rows [y0, y1) of the region,
+        computed on the stripe plus its halo. Returns (complete, cut, extra):
+        `complete` are (area, box) candidates of blobs that do not touch a
+        stripe boundary (full-region coordinates); `cut` are the blobs that
+        do, left for the merge; `extra` is the labels image (components).
+        """
+        height = fg_mask.shape[0]
+        halo = self._halo()
+        h0, h1 = max(0, y0 - halo), min(height, y1 + halo)
+        prefix = f"tile{index}."
+        mask = self._foreground(None if color is None else color[h0:h1], fg_mask[h0:h1], prefix)
+        mask = self._morphology(mask, prefix)
+        core = mask[y0 - h0:y1 - h0]
+        rows = y1 - y0
+        cut_top, cut_bottom = y0 > 0, y1 < height
+
+        complete, cut = [], []
+        if self.blob_method == "components":
+            labels = self._buffer(prefix + "labels", core.shape, np.int32)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(core, labels=labels,
+                                                                  connectivity=8)
+            for label in range(1, count):
+                x, y, w, h, area = (int(v) for v in stats[label])
+                box = (x, y + y0, w, h)
+                if (cut_top and y == 0) or (cut_bottom and y + h == rows):
+                    cut.append((label, area, box))
+                elif area >= min_area:
+                    complete.append((area, box))
+            return complete, cut, labels
+
+        contours, _ = cv2.findContours(core, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            box = (x, y + y0, w, h)
+            if (cut_top and y == 0) or (cut_bottom and y + h == rows):
+                cut.append((contour, box))
+            else:
+                area = cv2.contourArea(contour)
+                if area >= min_area:
+                    complete.append((area, box))
+        return complete, cut, None
+
+    @staticmethod
+    def _cut_groups(tiles, stripes, spans):
+        """
+        Union-find over the cut blobs of all tiles: blobs on either side of
+        a stripe boundary are joined when `spans` says they touch it in
+        8-connected columns. Returns lists of (tile index, cut index).
+        """
+        parent = {}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for k, (_, cut, _) in enumerate(tiles):
+            for i in range(len(cut)):
+                parent[(k, i)] = (k, i)
+        for k in range(len(stripes) - 1):
+            for i, j in spans(k):
+                a, b = find((k, i)), find((k + 1, j))
+                if a != b:
+                    parent[a] = b
+
+        groups = {}
+        for node in parent:
+            groups.setdefault(find(node), []).append(node)
+        return list(groups.values())
+
+    def _merge_components(self, tiles, stripes):
+        """
+        Components mode: blobs cut by a boundary are joined through the
+        labels on both sides of it; areas add up and boxes are united.
+        """
+        def spans(k):
+            upper, lower = tiles[k][2][-1], tiles[k + 1][2][0]
+            index_upper = {cut[0]: i for i, cut in enumerate(tiles[k][1])}
+            index_lower = {cut[0]: j for j, cut in enumerate(tiles[k + 1][1])}
+            pairs = set()
+            for shift in (-1, 0, 1):
+                a = upper[max(0, -shift):len(upper) - max(0, shift)]
+                b = lower[max(0, shift):len(lower) - max(0, -shift)]
+                touching = (a > 0) & (b > 0)
+                pairs.update(zip(a[touching].tolist(), b[touching].tolist()))
+            return [(index_upper[a], index_lower[b]) for a, b in pairs]
+
+        candidates = [c for complete, _, _ in tiles for c in complete]
+        for group in self._cut_groups(tiles, stripes, spans):
+            area = 0
+            x0 = y0 = float("inf")
+            x1 = y1 = 0
+            for k, i in group:
+                _, part_area, (x, y, w, h) = tiles[k][1][i]
+                area += part_area
+                x0, y0 = min(x0, x), min(y0, y)
+                x1, y1 = max(x1, x + w), max(y1, y + h)
+            candidates.append((area, (x0, y0, x1 - x0, y1 - y0)))
+        return candidates
+
+    def _merge_contours(self, tiles, stripes, shape):
+        """
+        Contours mode: cut pieces whose columns meet across a boundary are
+        grouped, drawn filled into a scratch image and re-traced, which gives
+        the same external contours (and areas) as tracing the full mask.
+        """
+        def spans(k):
+            pairs = []
+            y = stripes[k][1]
+            for i, (_, (xa, ya, wa, ha)) in enumerate(tiles[k][1]):
+                if ya + ha != y:
+                    continue
+                for j, (_, (xb, yb, wb, hb)) in enumerate(tiles[k + 1][1]):
+                    # Boxes overlap in x, allowing the diagonal neighbour
+                    if yb == y and xb <= xa + wa and xa <= xb + wb:
+                        pairs.append((i, j))
+            return pairs
+
+        candidates = [c for complete, _, _ in tiles for c in complete]
+        for group in self._cut_groups(tiles, stripes, spans):
+            boxes = [tiles[k][1][i][1] for k, i in group]
+            x0 = min(b[0] for b in boxes)
+            y0 = min(b[1] for b in boxes)
+            x1 = max(b[0] + b[2] for b in boxes)
+            y1 = max(b[1] + b[3] for b in boxes)
+            scratch = self._buffer("merge", (y1 - y0, x1 - x0))
+            scratch[:] = 0
+            for k, i in group:
+                cv2.drawContours(scratch, [tiles[k][1][i][0]], -1, 255, thickness=cv2.FILLED,
+                                 offset=(-x0, stripes[k][0] - y0))
+            contours, _ = cv2.findContours(scratch, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for contour in contours:
+                x, y, w, h = cv2.boundingRect(contour)
+                candidates.append((cv2.contourArea(contour), (x + x0, y + y0, w, h)))
+        return candidates
+
+    def _to_processing(self, rect, shape):
+        """
+        Map a full-frame (x0, y0, x1, y1) rect to processing coordinates.
+        """
+        if self.scale == 1.0:
+            return rect
+        height, width = shape[:2]
+        x0, y0, x1, y1 = rect
+        s = self.scale
+        return (int(x0 * s), int(y0 * s),
+                min(width, int(np.ceil(x1 * s))), min(height, int(np.ceil(y1 * s))))
+
+    def _to_full(self, box, shape):
+        """
+        Map a processing-resolution (x, y, w, h) box back to full-frame coordinates.
+        """
+        height, width = shape[:2]
+        inv = 1.0 / self.scale
+        x, y, w, h = box
+        x0, y0 = int(x * inv), int(y * inv)
+        x1 = min(width, int(np.ceil((x + w) * inv)))
+        y1 = min(height, int(np.ceil((y + h) * inv)))
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _refine(self, shape, color, fg_small, box):
+        """
+        Full-resolution refinement inside a coarse full-frame box: upsample the
+        coarse foreground mask for that box (plus a margin), then run the same
+        threshold / color mask, morphology and blob search as the coarse pass
+        at full resolution, with min_area in full-resolution pixels.
+        :param shape: Full frame shape.
+        :param color: Full-resolution BGR frame, or None without the color filter.
+        Returns a full-frame (x, y, w, h) box, or None to keep the coarse one.
+        """
+        height, width = shape[:2]
+        x, y, w, h = box
+        # One coarse pixel of slack on each side, so edges cut by the box are
+        # recovered, plus the reach of the morphology
+        pad = int(np.ceil(1.0 / self.scale)) + self._halo()
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        x1, y1 = min(width, x + w + pad), min(height, y + h + pad)
+
+        sx0, sy0, sx1, sy1 = self._to_processing((x0, y0, x1, y1), fg_small.shape)
+        if sx1 <= sx0 or sy1 <= sy0:
+            return None
+        fg_crop = self._buffer("refine", (y1 - y0, x1 - x0))
+        cv2.resize(fg_small[sy0:sy1, sx0:sx1], (x1 - x0, y1 - y0), dst=fg_crop,
+                   interpolation=cv2.INTER_LINEAR)
+        mask = self._foreground(None if color is None else color[y0:y1, x0:x1], fg_crop,
+                                "refine.")
+        mask = self._morphology(mask, "refine.")
+
+        refined = self._largest_blob(mask, self.effective_min_area() / (self.scale * self.scale))
+        if refined is None:
+            return None
+        rx, ry, rw, rh = refined
+        return (rx + x0, ry + y0, rw, rh)
+
+    def _tracking_roi(self, shape):
+        """
+        ROI (x0, y0, x1, y1) around the predicted target position, or None
+        when there is no track and a full-frame search is needed.
+        """
+        if self.last_box is None:
+            return None
+        height, width = shape[:2]
+        x, y, w, h = self.last_box
+        vx, vy = self.velocity
+        # Predict one frame ahead and pad by the box size plus the distance
+        # covered per frame (again, for every frame we have already missed
+        # or the gate skipped).
+        steps = self.misses + self.skipped + 1
+        cx = x + w / 2.0 + vx * steps
+        cy = y + h / 2.0 + vy * steps
+        half_w = w * (0.5 + self.roi_margin) + abs(vx) * steps
+        half_h = h * (0.5 + self.roi_margin) + abs(vy) * steps
+        x0 = max(0, int(cx - half_w))
+        y0 = max(0, int(cy - half_h))
+        x1 = min(width, int(cx + half_w) + 1)
+        y1 = min(height, int(cy + half_h) + 1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1, y1)
+
+    def _update_track(self, box):
+        """
+        Keep the last box and center velocity; drop the track after max_misses.
+        Frames skipped by the motion gate count towards the velocity's frame
+        gap but not as misses.
+        """
+        if box is None:
+            self.misses += 1
+            if self.misses >= self.max_misses:
+                self.reset_track()
+            return
+        if self.last_box is not None:
+            px, py, pw, ph = self.last_box
+            steps = self.misses + self.skipped + 1
+            self.velocity = (
+                ((box[0] + box[2] / 2.0) - (px + pw / 2.0)) / steps,
+                ((box[1] + box[3] / 2.0) - (py + ph / 2.0)) / steps,
+            )
+        self.last_box = box
+        self.misses = 0
+        self.skipped = 0
+
+    def reset_track(self):
+        """
+        Forget the current track so the next call searches the full frame.
+        """
+        self.last_box = None
+        self.velocity = (0.0, 0.0)
+        self.misses = 0
+        self.skipped = 0
+
+
+def _pick_largest(candidates, min_area):
+    """
+    Box of the largest (area, box) candidate with at least min_area, or None.
+    Equal areas go to the topmost, then leftmost box, so the choice does not
+    depend on the order blobs were found in.
+    """
+    if not candidates:
+        return None
+    area, box = max(candidates, key=lambda c: (c[0], -c[1][1], -c[1][0]))
+    if area < min_area:
+        return None
+    return tuple(int(v) for v in box)
+
+
+def _first_largest(areas, stats):
+    """
+    Index of the largest area; ties go to the topmost, then leftmost box.
+    """
+    largest = np.flatnonzero(areas == areas.max())
+    if len(largest) == 1:
+        return int(largest[0])
+    order = np.lexsort((stats[largest, cv2.CC_STAT_LEFT], stats[largest, cv2.CC_STAT_TOP]))
+    return int(largest[order[0]])
@@ -0,0 +1,138 @@
+# safety.py
+import os
+import threading
+import time
+
+class KillSwitchWatcher:
+    """
+    Stops the robot independently of the main loop:
+      - kill switch: checked on the iBus reader thread as soon as each frame
+        is decoded (IBUSReceiver listener), so latency is one frame decode
+      - signal loss: a watchdog thread trips when no valid frame has arrived
+        for `failsafe_ms`, waking exactly when the newest frame goes stale
+
+    Tripping calls MotorController.kill(), which zeroes the drive motors and
+    spinner and latches them off. When a fresh frame arrives with the kill
+    switch released, the controller is re-armed and the main loop's next
+    command takes effect again. After the signal was lost, though, the
+    watcher stays tripped (`latched`) until the operator cycles the kill
+    switch (on, then off), so a link that comes back does not restart the
+    spinner on its own; `latch_on_signal_loss=False` re-arms on the first
+    good frame instead. A trip before the first frame ever arrived (boot)
+    does not latch.
+
+    Trips are recorded in `trips` as (time, reason); `last_trip_time` is
+    taken after the outputs were written.
+    """
+
+    def __init__(self, remote_control, motor_controller, failsafe_ms=None, realtime=True,
+                 latch_on_signal_loss=True):
+        """
+        :param remote_control: RemoteControl (its IBUSReceiver reader thread is started).
+        :param motor_controller: MotorController to kill.
+        :param failsafe_ms: Signal-loss timeout; defaults to remote_control.failsafe_ms or 100.
+        :param realtime: Try to give the reader and watchdog threads SCHED_FIFO
+                         priority (needs CAP_SYS_NICE; silently skipped otherwise).
+        :param latch_on_signal_loss: After signal loss, stay tripped until the kill
+                                     switch is cycled instead of re-arming on the
+                                     next good frame.
+        """
+        self.remote_control = remote_control
+        self.motor_controller = motor_controller
+        if failsafe_ms is None:
+            failsafe_ms = remote_control.failsafe_ms or 100
+        self.failsafe = failsafe_ms / 1000.0
+        self.realtime = realtime
+        self.realtime_granted = False
+        self.latch_on_signal_loss = latch_on_signal_loss
+        self.tripped = False
+        self.latched = False
+        self.trips = []
+        self.last_trip_time = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        ibus = self.remote_control.ibus
+        ibus.add_listener(self._on_frame)
+        ibus.start_reader()
+        self._running = True
+        self._thread = threading.Thread(target=self._watchdog_loop, name="kill-watchdog",
+                                        daemon=True)
+        self._thread.start()
+        if self.realtime:
+            granted = [self._raise_priority(t) for t in (ibus._reader, self._thread)]
+            self.realtime_granted = all(granted)
+        return self
+
+    @staticmethod
+    def _raise_priority(thread):
+        if thread is None or not hasattr(os, "sched_setscheduler"):
+            return False
+        try:
+            os.sched_setscheduler(thread.native_id, os.SCHED_FIFO, os.sched_param(50))
+            return True
+        except (OSError, AttributeError):
+            return False
+
+    def _on_frame(self, snapshot):
+        """
+        Runs on the iBus reader thread for every decoded frame.
+        """
+        rc = self.remote_control
+        killed = rc._channel(snapshot.channels, rc.killswitch_channel) > 1500
+        if killed:
+            with self._lock:
+                # Kill switch on: the operator has taken over again
+                self.latched = False
+            self.trip("killswitch")
+        elif self.tripped:
+            self._rearm()
+        # Restart the signal-loss countdown from this frame
+        self._wake.set()
+
+    def _watchdog_loop(self):
+        ibus = self.remote_control.ibus
+        while self._running:
+            age = ibus.signal_age()
+            if age > self.failsafe:
+                self.trip("signal lost")
+                # Nothing to time until the next frame arrives
+                self._wake.wait(timeout=self.failsafe)
+            else:
+                # Sleep until the newest frame would go stale, or a new one arrives
+                self._wake.wait(timeout=self.failsafe - age)
+            self._wake.clear()
+
+    def trip(self, reason):
+        """
+        Kill the motors now (safe to call from any thread; repeated calls while
+        tripped are cheap).
+        """
+        with self._lock:
+            if (reason == "signal lost" and self.latch_on_signal_loss
+                    and self.remote_control.ibus.get_snapshot().timestamp is not None):
+                self.latched = True
+            if self.tripped:
+                return
+            self.tripped = True
+            self.motor_controller.kill()
+            self.last_trip_time = time.monotonic()
+            self.trips.append((self.last_trip_time, reason))
+
+    def _rearm(self):
+        with self._lock:
+            if self.latched or self.remote_control.ibus.signal_age() > self.failsafe:
+                return
+            self.tripped = False
+            self.motor_controller.rearm()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        self.remote_control.ibus.remove_listener(self._on_frame)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
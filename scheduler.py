@@ -0,0 +1,90 @@
+# scheduler.py
+import time
+
+class RateScheduler:
+    """
+    Runs a loop at a fixed rate using absolute deadlines, so the tick rate
+    does not drift with the amount of work done per tick.
+
+    Usage:
+        scheduler = RateScheduler(rate_hz=100)
+        while True:
+            scheduler.wait()
+            ... one control tick ...
+
+    Accounting:
+      - ticks:        ticks started
+      - late_ticks:   ticks that started more than `tolerance` after their deadline
+      - overruns:     times a tick's work ran past one or more later deadlines
+      - missed_ticks: deadlines skipped because of overruns
+      - max_lateness: worst start delay seen, in seconds
+    """
+
+    def __init__(self, rate_hz=100.0, tolerance=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate_hz: Tick rate.
+        :param tolerance: Start delay (s) beyond which a tick counts as late
+                          (default: 10% of the period).
+        :param clock, sleep: Injectable time source, for simulation.
+        """
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.period = 1.0 / rate_hz
+        self.tolerance = self.period * 0.1 if tolerance is None else tolerance
+        self.clock = clock
+        self.sleep = sleep
+        self.reset()
+
+    def reset(self):
+        self.next_deadline = None
+        self.ticks = 0
+        self.late_ticks = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.max_lateness = 0.0
+        self.start_time = None
+
+    def wait(self):
+        """
+        Sleep until the next deadline and return it. If the previous tick ran
+        past later deadlines, those ticks are counted as missed and skipped, so
+        the schedule keeps its phase instead of bursting to catch up.
+        """
+        now = self.clock()
+        if self.next_deadline is None:
+            self.next_deadline = now
+            self.start_time = now
+
+        deadline = self.next_deadline
+        if now < deadline:
+            self.sleep(deadline - now)
+        elif now - deadline >= self.period:
+            missed = int((now - deadline) // self.period)
+            self.overruns += 1
+            self.missed_ticks += missed
+            deadline += missed * self.period
+
+        lateness = self.clock() - deadline
+        if lateness > self.tolerance:
+            self.late_ticks += 1
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+        self.ticks += 1
+        self.next_deadline = deadline + self.period
+        return deadline
+
+    def achieved_rate(self):
+        """
+        Average tick rate since the first wait().
+        """
+        if self.start_time is None or self.ticks < 2:
+            return 0.0
+        elapsed = self.clock() - self.start_time
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.ticks} ticks at {self.achieved_rate():.1f} Hz "
+                f"(target {1.0 / self.period:.1f} Hz), {self.late_ticks} late, "
+                f"{self.overruns} overruns, {self.missed_ticks} missed, "
+                f"max lateness {self.max_lateness * 1e3:.2f} ms")
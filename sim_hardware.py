@@ -0,0 +1,374 @@
+# sim_hardware.py
+"""
+Stand-in hardware for running the robot code on any Linux box:
+  - A fake `RPi.GPIO` module (records duty cycles instead of driving pins)
+  - A fake `serial` module with an in-memory port, used when pyserial is missing
+  - A fake `picamera2` module serving synthetic frames through the request API
+  - A fake /sys/class/pwm directory tree for pwm_backends.SysfsPWMBackend
+
+Call `install_fake_gpio()` / `install_fake_serial()` / `install_fake_picamera2()`
+before importing motor_control / ibus / creating a Picamera2 frame source.
+"""
+import os
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+
+class FakePWM:
+    """
+    Mimics RPi.GPIO.PWM. Keeps the current duty cycle and a write counter.
+    """
+
+    def __init__(self, pin, frequency):
+        self.pin = pin
+        self.frequency = frequency
+        self.duty = 0.0
+        self.running = False
+        self.writes = 0
+
+    def start(self, duty):
+        self.duty = duty
+        self.running = True
+        self.writes += 1
+
+    def ChangeDutyCycle(self, duty):
+        if not 0.0 <= duty <= 100.0:
+            raise ValueError("dutycycle must have a value from 0.0 to 100.0")
+        self.duty = duty
+        self.writes += 1
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.running = False
+
+
+def _make_gpio_module():
+    gpio = types.ModuleType("RPi.GPIO")
+    gpio.BCM = 11
+    gpio.BOARD = 10
+    gpio.OUT = 0
+    gpio.IN = 1
+    gpio.LOW = 0
+    gpio.HIGH = 1
+    gpio.pins = {}   # pin -> mode
+    gpio.pwms = []   # every FakePWM created, in order
+
+    def setmode(mode):
+        gpio.mode = mode
+
+    def setwarnings(flag):
+        pass
+
+    def setup(pin, mode, **kwargs):
+        gpio.pins[pin] = mode
+
+    def output(pin, value):
+        pass
+
+    def input(pin):
+        return 0
+
+    def PWM(pin, frequency):
+        pwm = FakePWM(pin, frequency)
+        gpio.pwms.append(pwm)
+        return pwm
+
+    def cleanup(*args):
+        gpio.pins.clear()
+
+    gpio.setmode = setmode
+    gpio.setwarnings = setwarnings
+    gpio.setup = setup
+    gpio.output = output
+    gpio.input = input
+    gpio.PWM = PWM
+    gpio.cleanup = cleanup
+    return gpio
+
+
+def install_fake_gpio():
+    """
+    Register a fake `RPi.GPIO` in sys.modules (no-op if already installed)
+    and return it.
+    """
+    existing = sys.modules.get("RPi.GPIO")
+    if existing is not None and getattr(existing, "pwms", None) is not None:
+        return existing
+    gpio = _make_gpio_module()
+    rpi = types.ModuleType("RPi")
+    rpi.GPIO = gpio
+    sys.modules["RPi"] = rpi
+    sys.modules["RPi.GPIO"] = gpio
+    return gpio
+
+
+class FakeSerial:
+    """
+    In-memory stand-in for serial.Serial. Bytes given to `inject()` are
+    returned by read(); bytes passed to write() are kept in `written`.
+    read() waits up to `timeout` for data, like a real port.
+    """
+
+    def __init__(self, port=None, baudrate=115200, timeout=None, **kwargs):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self.written = bytearray()
+        self._rx = bytearray()
+        self._cond = threading.Condition()
+
+    def inject(self, data):
+        with self._cond:
+            self._rx += data
+            self._cond.notify_all()
+
+    @property
+    def in_waiting(self):
+        return len(self._rx)
+
+    def read(self, size=1):
+        with self._cond:
+            if not self._rx and self.timeout != 0:
+                self._cond.wait(self.timeout)
+            out = bytes(self._rx[:size])
+            del self._rx[:size]
+            return out
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+def install_fake_serial(force=False):
+    """
+    Register a fake `serial` module if pyserial is not importable (or
+    always, with force=True) and return the `serial` module in use.
+    """
+    if not force:
+        try:
+            import serial
+            if hasattr(serial, "Serial"):
+                return serial
+        except ImportError:
+            pass
+    module = types.ModuleType("serial")
+    module.Serial = FakeSerial
+    module.SerialException = type("SerialException", (IOError,), {})
+    module.PARITY_NONE = "N"
+    module.STOPBITS_ONE = 1
+    module.EIGHTBITS = 8
+    sys.modules["serial"] = module
+    return module
+
+
+class FakeRequest:
+    """
+    Completed request of a FakePicamera2: one camera buffer plus metadata.
+    """
+
+    def __init__(self, camera, buffer, timestamp_ns):
+        self.camera = camera
+        self.buffer = buffer
+        self.metadata = {"SensorTimestamp": timestamp_ns}
+        self.released = False
+
+    def get_metadata(self):
+        return dict(self.metadata)
+
+    def release(self):
+        if self.released:
+            raise RuntimeError("request released twice")
+        self.released = True
+        self.camera._return(self.buffer)
+
+
+class FakeMappedArray:
+    """
+    Stand-in for picamera2.MappedArray: `.array` is the request's buffer.
+    """
+
+    def __init__(self, request, stream):
+        if request.released:
+            raise RuntimeError("mapping a released request")
+        self.request = request
+        self.array = request.buffer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.array = None
+
+
+class FakePicamera2:
+    """
+    Stand-in for picamera2.Picamera2 with the request API. Frames are a
+    moving disc (frame_sources.SyntheticSource) at `fps`, in a fixed set of
+    `buffer_count` buffers. capture_request() raises when every buffer is
+    held by an unreleased request, where a real camera would stall.
+    """
+
+    def __init__(self, camera_num=0, fps=30.0):
+        self.camera_num = camera_num
+        self.fps = fps
+        self.config = None
+        self.started = False
+        self.closed = False
+        self.frames_captured = 0
+        self._free = []
+        self._synthetic = None
+        self._lock = threading.Lock()
+
+    def create_video_configuration(self, main=None, buffer_count=6):
+        main = dict({"size": (640, 480), "format": "XBGR8888"}, **(main or {}))
+        return {"main": main, "buffer_count": buffer_count}
+
+    def configure(self, config):
+        from frame_sources import SyntheticSource
+
+        if config["main"]["format"] not in ("RGB888", "YUV420"):
+            raise ValueError(f"FakePicamera2 does not emulate {config['main']['format']}")
+        self.config = config
+        width, height = config["main"]["size"]
+        shape = (height, width, 3) if config["main"]["format"] == "RGB888" else (height * 3 // 2, width)
+        self._free = [np.empty(shape, dtype=np.uint8) for _ in range(config["buffer_count"])]
+        self._synthetic = SyntheticSource(width, height, fps=self.fps)
+
+    def start(self):
+        if self.config is None:
+            raise RuntimeError("camera is not configured")
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.closed = True
+
+    def capture_request(self):
+        if not self.started:
+            raise RuntimeError("camera is not started")
+        with self._lock:
+            if not self._free:
+                raise RuntimeError("all camera buffers are held by unreleased requests")
+            buffer = self._free.pop()
+        _, frame = self._synthetic.read(buffer if buffer.ndim == 3 else None)
+        if buffer.ndim == 2:
+            import cv2
+            cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=buffer)
+        self.frames_captured += 1
+        return FakeRequest(self, buffer, time.monotonic_ns())
+
+    def _return(self, buffer):
+        with self._lock:
+            self._free.append(buffer)
+
+    @property
+    def buffers_held(self):
+        return self.config["buffer_count"] - len(self._free)
+
+
+def install_fake_picamera2():
+    """
+    Register a fake `picamera2` module (Picamera2, MappedArray) in
+    sys.modules and return it.
+    """
+    module = types.ModuleType("picamera2")
+    module.Picamera2 = FakePicamera2
+    module.MappedArray = FakeMappedArray
+    sys.modules["picamera2"] = module
+    return module
+
+
+class FakeSysfsPWM:
+    """
+    A /sys/class/pwm stand-in in a plain directory: `chips` pwmchipN
+    directories with export/unexport files. A thread plays the kernel's
+    part: a channel number written to `export` creates pwmM/ with period,
+    duty_cycle and enable files (like udev, a little later); one written to
+    `unexport` removes it. Exports and unexports are recorded as (chip, channel).
+    """
+
+    def __init__(self, root, chips=1, npwm=2, respond=True):
+        """
+        :param root: Empty directory to build the tree in (e.g. a tmp dir).
+        :param respond: Create channels on export; False emulates a channel
+                        that never appears.
+        """
+        self.root = str(root)
+        self.npwm = npwm
+        self.respond = respond
+        self.exports = []
+        self.unexports = []
+        for chip in range(chips):
+            path = self._chip_path(chip)
+            os.makedirs(path, exist_ok=True)
+            for name, value in (("export", ""), ("unexport", ""), ("npwm", npwm)):
+                self._write(os.path.join(path, name), value)
+        self._chips = chips
+        self._running = True
+        self._thread = threading.Thread(target=self._kernel_loop, name="fake-sysfs",
+                                        daemon=True)
+        self._thread.start()
+
+    def _chip_path(self, chip):
+        return os.path.join(self.root, f"pwmchip{chip}")
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, "w") as f:
+            f.write(str(value))
+
+    def read(self, chip, channel, name):
+        """
+        Current content of pwmchip<chip>/pwm<channel>/<name>.
+        """
+        with open(os.path.join(self._chip_path(chip), f"pwm{channel}", name)) as f:
+            return f.read()
+
+    def _take(self, path):
+        with open(path, "r+") as f:
+            value = f.read().strip()
+            f.seek(0)
+            f.truncate()
+        return int(value) if value else None
+
+    def _kernel_loop(self):
+        while self._running:
+            for chip in range(self._chips):
+                chip_path = self._chip_path(chip)
+                channel = self._take(os.path.join(chip_path, "export"))
+                if channel is not None:
+                    self.exports.append((chip, channel))
+                    if self.respond and channel < self.npwm:
+                        path = os.path.join(chip_path, f"pwm{channel}")
+                        os.makedirs(path, exist_ok=True)
+                        for name in ("period", "duty_cycle", "enable"):
+                            self._write(os.path.join(path, name), 0)
+                channel = self._take(os.path.join(chip_path, "unexport"))
+                if channel is not None:
+                    self.unexports.append((chip, channel))
+                    path = os.path.join(chip_path, f"pwm{channel}")
+                    for name in ("period", "duty_cycle", "enable"):
+                        if os.path.exists(os.path.join(path, name)):
+                            os.remove(os.path.join(path, name))
+                    if os.path.isdir(path):
+                        os.rmdir(path)
+            time.sleep(0.002)
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,61 @@
+# startup.py
+import threading
+import time
+
+class BackgroundInit:
+    """
+    Runs one initializer (e.g. opening the camera) on a daemon thread so
+    several slow bring-up steps overlap, and so the control loop can start
+    before the slower ones finish.
+
+    Usage:
+        camera_init = BackgroundInit(lambda: CameraModule(0), name="camera")
+        ...
+        if camera_init.done():
+            camera = camera_init.result()   # re-raises the initializer's error
+    """
+
+    def __init__(self, factory, name="init"):
+        """
+        :param factory: Callable returning the initialized object.
+        :param name: Thread name, also used in error messages.
+        """
+        self.name = name
+        self.started = time.monotonic()
+        self.finished = None
+        self._factory = factory
+        self._value = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._value = self._factory()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.finished = time.monotonic()
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def elapsed(self):
+        """
+        Seconds the initializer took (or has been running so far).
+        """
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    def result(self, timeout=None):
+        """
+        Wait for the initializer and return its value, re-raising its error.
+        Raises TimeoutError if it does not finish within `timeout` seconds.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} initialization did not finish in {timeout} s")
+        if self._error is not None:
+            raise self._error
+        return self._value
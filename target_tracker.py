@@ -0,0 +1,87 @@
+# target_tracker.py
+import math
+
+class AlphaBetaTracker:
+    """
+    Constant-velocity alpha-beta filter for the detected target centroid.
+
+    Sits between RobotDetector and the pursuit controller:
+      - update() with each detection and the capture timestamp of its frame
+      - predict() the position at the moment the motor command takes effect,
+        compensating capture + detection + actuation latency
+      - short detection dropouts are bridged by extrapolating for up to
+        `max_coast` seconds before the track is dropped
+
+    Positions are in pixels, velocities in pixels per second, times in
+    time.monotonic() seconds.
+    """
+
+    def __init__(self, alpha=0.85, beta=0.3, max_coast=0.25, max_speed=None):
+        """
+        :param alpha: Position correction gain (0..1); higher trusts measurements more.
+        :param beta: Velocity correction gain (0..2); higher reacts faster to speed changes.
+        :param max_coast: Seconds to keep predicting without a detection.
+        :param max_speed: Optional clamp on the velocity estimate (pixels/s).
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.max_coast = max_coast
+        self.max_speed = max_speed
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = 0.0
+        self.vx = self.vy = 0.0
+        self.last_time = None     # time of the last state update
+        self.last_seen = None     # time of the last real detection
+        self.updates = 0
+
+    @property
+    def active(self):
+        return self.last_seen is not None
+
+    def update(self, cx, cy, timestamp):
+        """
+        Correct the track with a detection at (cx, cy) seen at `timestamp`.
+        """
+        if self.last_time is None or timestamp <= self.last_time:
+            # First detection (or no time elapsed): take the position as is
+            self.x, self.y = float(cx), float(cy)
+            self.last_time = self.last_seen = max(timestamp, self.last_time or timestamp)
+            self.updates += 1
+            return
+
+        dt = timestamp - self.last_time
+        # Predict to the measurement time, then correct
+        px = self.x + self.vx * dt
+        py = self.y + self.vy * dt
+        rx = cx - px
+        ry = cy - py
+        self.x = px + self.alpha * rx
+        self.y = py + self.alpha * ry
+        self.vx += self.beta * rx / dt
+        self.vy += self.beta * ry / dt
+        if self.max_speed is not None:
+            speed = math.hypot(self.vx, self.vy)
+            if speed > self.max_speed:
+                self.vx *= self.max_speed / speed
+                self.vy *= self.max_speed / speed
+        self.last_time = self.last_seen = timestamp
+        self.updates += 1
+
+    def miss(self, timestamp):
+        """
+        Report a frame without a detection. Drops the track once it has
+        coasted longer than max_coast.
+        """
+        if self.last_seen is not None and timestamp - self.last_seen > self.max_coast:
+            self.reset()
+
+    def predict(self, timestamp):
+        """
+        Predicted (x, y) at `timestamp`, or None without a live track.
+        """
+        if self.last_seen is None or timestamp - self.last_seen > self.max_coast:
+            return None
+        dt = timestamp - self.last_time
+        return (self.x + self.vx * dt, self.y + self.vy * dt)
@@ -0,0 +1,227 @@
+# telemetry.py
+"""
+Flight recorder for the control loop: one fixed-size binary record per
+tick in a preallocated ring, overwritten oldest-first.
+
+Each record (RECORD, little-endian, 75 bytes) holds:
+  timestamp   time.monotonic()
+  tick        running record number (gaps after wrap show what was overwritten)
+  mode        RC mode (0 manual, 1 auton)
+  killswitch  1 if the kill switch (or RC failsafe) was active
+  channels    14 RC channel values (unused channels are 0)
+  found, cx, cy   detection result that arrived this tick
+  seq         camera frame seq of that result (-1 = no new result)
+  duties      the four drive motor duty cycles (%)
+  spinner     spinner duty cycle (%)
+
+Logging is a single struct.pack_into() into the ring, a few microseconds
+per call. With `path` the ring is a memory-mapped file, so the record
+survives a crash of the process; flush() forces it to disk.
+
+    prune_logs("telemetry-%Y%m%d-%H%M%S.bin", keep=19)  # cap the old files
+    path = log_path("telemetry-%Y%m%d-%H%M%S.bin")   # a new file per run
+    capacity = fit_log_capacity(path, 30000)          # cut to the free disk space
+    telemetry = TelemetryLogger(capacity=capacity, path=path)
+    telemetry.log(mode, killswitch, channels, detection, duties, spinner, seq=seq)
+    ...
+    records = read_telemetry(path)   # NumPy structured array, oldest first
+"""
+import glob
+import mmap
+import os
+import re
+import struct
+import time
+
+MAGIC = b"FLTLM001"
+HEADER_SIZE = 64
+# magic, record size, capacity, records written
+_HEADER = struct.Struct("<8sIIQ")
+_COUNT = struct.Struct("<Q")
+_COUNT_OFFSET = 16
+NUM_CHANNELS = 14
+
+RECORD = struct.Struct("<dIBB14HBiii4ff")
+# Same layout as RECORD, for read_telemetry()
+RECORD_FIELDS = [
+    ("timestamp", "<f8"),
+    ("tick", "<u4"),
+    ("mode", "u1"),
+    ("killswitch", "u1"),
+    ("channels", "<u2", (NUM_CHANNELS,)),
+    ("found", "u1"),
+    ("cx", "<i4"),
+    ("cy", "<i4"),
+    ("seq", "<i4"),
+    ("duties", "<f4", (4,)),
+    ("spinner", "<f4"),
+]
+
+# Zero padding for RC snapshots with fewer than 14 channels, indexed by length
+_PAD = tuple((0,) * (NUM_CHANNELS - n) for n in range(NUM_CHANNELS + 1))
+
+
+def log_path(pattern):
+    """
+    File name for a new log: `pattern` expanded with time.strftime, with
+    "-1", "-2", ... added before the extension if that file already exists
+    (e.g. the clock was reset on a board without an RTC).
+    """
+    path = time.strftime(pattern)
+    root, ext = os.path.splitext(path)
+    n = 0
+    while os.path.exists(path):
+        n += 1
+        path = f"{root}-{n}{ext}"
+    return path
+
+
+def fit_log_capacity(path, capacity, reserve=None):
+    """
+    Largest ring capacity up to `capacity` whose file at `path` fits on the
+    disk with `reserve` bytes to spare (default recorder.DISK_RESERVE), or 0
+    if none fits. Like a recording, the ring is sparse until written.
+    """
+    from recorder import DISK_RESERVE, fit_records
+    return fit_records(path, RECORD.size, capacity, header_size=HEADER_SIZE,
+                       reserve=DISK_RESERVE if reserve is None else reserve)
+
+
+def prune_logs(pattern, keep):
+    """
+    Delete all but the newest `keep` logs named by log_path(pattern) (by
+    modification time) and return the deleted paths. Only files that start
+    with the telemetry MAGIC are deleted, whatever else matches the pattern.
+    """
+    root, ext = os.path.splitext(pattern)
+    # strftime fields and the "-N" suffix of log_path() become wildcards
+    parts = re.split(r"(?:%.)+", root)
+    wildcard = "*".join(glob.escape(part) for part in parts) + "*" + glob.escape(ext)
+    logs = []
+    for path in glob.glob(wildcard):
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) == MAGIC:
+                    logs.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    logs.sort()
+    deleted = []
+    for _, path in logs[:max(0, len(logs) - keep)]:
+        try:
+            os.remove(path)
+            deleted.append(path)
+        except OSError:
+            pass
+    return deleted
+
+
+class TelemetryLogger:
+    """
+    Preallocated ring of RECORD-sized entries, in memory or in a
+    memory-mapped file (same layout either way: header, then the ring).
+    """
+
+    def __init__(self, capacity=30000, path=None):
+        """
+        :param capacity: Number of records kept (e.g. seconds * loop rate).
+        :param path: Optional file backing the ring (overwritten).
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.path = path
+        self.count = 0
+        size = HEADER_SIZE + capacity * RECORD.size
+        self._file = None
+        if path is None:
+            self.buffer = bytearray(size)
+        else:
+            with open(path, "wb") as f:
+                f.truncate(size)
+            self._file = open(path, "r+b")
+            self.buffer = mmap.mmap(self._file.fileno(), size)
+        _HEADER.pack_into(self.buffer, 0, MAGIC, RECORD.size, capacity, 0)
+
+    def log(self, mode, killswitch, channels, detection, duties, spinner, timestamp=None,
+            seq=-1):
+        """
+        Append one record, overwriting the oldest once the ring is full.
+        :param channels: RC channel values (up to 14).
+        :param detection: (cx, cy) or None.
+        :param duties: Sequence whose first four items are the drive motor duties.
+        :param spinner: Spinner duty cycle.
+        :param seq: Camera frame seq the detection came from (-1 = no new result).
+        """
+        count = self.count
+        if len(channels) != NUM_CHANNELS:
+            channels = tuple(channels[:NUM_CHANNELS]) + _PAD[min(len(channels), NUM_CHANNELS)]
+        if detection is None:
+            found, cx, cy = 0, 0, 0
+        else:
+            found = 1
+            cx, cy = detection
+        RECORD.pack_into(self.buffer, HEADER_SIZE + (count % self.capacity) * RECORD.size,
+                         time.monotonic() if timestamp is None else timestamp,
+                         count & 0xFFFFFFFF, mode, 1 if killswitch else 0, *channels,
+                         found, int(cx), int(cy), seq,
+                         duties[0], duties[1], duties[2], duties[3], spinner)
+        self.count = count + 1
+        _COUNT.pack_into(self.buffer, _COUNT_OFFSET, self.count)
+
+    def flush(self):
+        """
+        Write the file-backed ring to disk (no-op in memory).
+        """
+        if self._file is not None:
+            self.buffer.flush()
+
+    def save(self, path):
+        """
+        Write the ring (header included) to `path`, e.g. for an in-memory logger.
+        """
+        with open(path, "wb") as f:
+            f.write(self.buffer)
+
+    def close(self):
+        if self._file is not None:
+            self.buffer.flush()
+            self.buffer.close()
+            self._file.close()
+            self._file = None
+
+
+def record_dtype():
+    import numpy as np
+    dtype = np.dtype(RECORD_FIELDS)
+    if dtype.itemsize != RECORD.size:
+        raise RuntimeError("RECORD_FIELDS does not match the RECORD layout")
+    return dtype
+
+
+def read_telemetry(source):
+    """
+    Records of a TelemetryLogger, a ring file or raw ring bytes as a NumPy
+    structured array (RECORD_FIELDS), oldest first.
+    """
+    import numpy as np
+
+    if isinstance(source, TelemetryLogger):
+        data = bytes(source.buffer)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+
+    magic, record_size, capacity, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a telemetry ring")
+    if record_size != RECORD.size:
+        raise ValueError(f"record size {record_size} does not match this version ({RECORD.size})")
+    ring = np.frombuffer(data, dtype=record_dtype(), count=capacity, offset=HEADER_SIZE)
+    if count <= capacity:
+        return ring[:count].copy()
+    # Unroll: the oldest record sits right after the newest one
+    start = count % capacity
+    return np.concatenate((ring[start:], ring[:start]))
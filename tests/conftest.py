@@ -0,0 +1,77 @@
+"""
+Shared fixtures: repo import path, fake RPi.GPIO, and a pty standing in
+for a UART (real pyserial on the slave side).
+"""
+import os
+import sys
+import tty
+
+import pytest
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import sim_hardware  # noqa: E402
+
+# Tests must never drive real pins
+sim_hardware.install_fake_gpio()
+
+
+class PtyPort:
+    """
+    A raw pty pair: code under test opens `path` as its serial port, the
+    test writes to / reads from the master side.
+    """
+
+    def __init__(self):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+
+    def write(self, data):
+        os.write(self.master, data)
+
+    def read(self, size=4096):
+        return os.read(self.master, size)
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def pty_port():
+    port = PtyPort()
+    yield port
+    port.close()
+
+
+def ibus_frame(channels):
+    """
+    A valid 32-byte iBus frame for up to 14 channel values.
+    """
+    channels = list(channels) + [1500] * (14 - len(channels))
+    body = bytearray(b"\x20\x40")
+    for value in channels:
+        body += value.to_bytes(2, "little")
+    checksum = sum(body) & 0xFFFF
+    return bytes(body + checksum.to_bytes(2, "little"))
+
+
+def wait_for(predicate, timeout=1.0, interval=0.001):
+    """
+    Poll `predicate` until it is true or `timeout` seconds passed; returns its last value.
+    """
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return predicate()
+        time.sleep(interval)
+    return True
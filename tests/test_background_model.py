@@ -0,0 +1,73 @@
+"""
+NumpyBackgroundModel snapshots restored for frames of another format or size.
+"""
+import cv2
+import numpy as np
+import pytest
+
+from background_model import NumpyBackgroundModel
+
+
+def arena(width=160, height=120):
+    rng = np.random.default_rng(1)
+    return rng.integers(40, 200, (height, width, 3), dtype=np.uint8)
+
+
+def snapshot(tmp_path, frame):
+    model = NumpyBackgroundModel()
+    for _ in range(5):
+        model.apply(frame)
+    path = str(tmp_path / "bg.npz")
+    model.save(path)
+    return path
+
+
+def test_bgr_snapshot_works_on_luma_frames(tmp_path):
+    bgr = arena()
+    model = NumpyBackgroundModel.from_snapshot(snapshot(tmp_path, bgr))
+    luma = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    assert not model.apply(luma).any()
+
+    moved = luma.copy()
+    moved[40:60, 50:80] = 0
+    mask = model.apply(moved)
+    assert mask[45:55, 55:75].all()
+    assert model.background.shape == luma.shape
+
+
+def test_bgr_snapshot_on_smaller_luma_frames(tmp_path):
+    bgr = arena()
+    model = NumpyBackgroundModel.from_snapshot(snapshot(tmp_path, bgr))
+    small = cv2.resize(cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY), (80, 60),
+                       interpolation=cv2.INTER_AREA)
+    assert np.count_nonzero(model.apply(small)) < 0.01 * small.size
+
+
+def test_luma_snapshot_cannot_serve_bgr_frames(tmp_path):
+    bgr = arena()
+    path = snapshot(tmp_path, cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY))
+    model = NumpyBackgroundModel.from_snapshot(path)
+    with pytest.raises(ValueError, match="pixel format"):
+        model.apply(bgr)
+
+
+def test_scale_round_trip_keeps_the_snapshot(tmp_path):
+    bgr = arena()
+    model = NumpyBackgroundModel.from_snapshot(snapshot(tmp_path, bgr))
+    original = model.background.copy()
+    small = cv2.resize(bgr, (80, 60), interpolation=cv2.INTER_AREA)
+    model.apply(small)
+    model.apply(bgr)
+    # Resampled from the snapshot, not upsampled from the 80x60 copy
+    assert np.abs(model.background - original).max() < 1.0
+    assert not model.warming_up()
+
+
+def test_resized_learned_background_warms_up_again():
+    bgr = arena()
+    model = NumpyBackgroundModel(warmup_frames=5)
+    for _ in range(5):
+        model.apply(bgr)
+    assert not model.warming_up()
+    model.apply(cv2.resize(bgr, (80, 60), interpolation=cv2.INTER_AREA))
+    assert model.warming_up()
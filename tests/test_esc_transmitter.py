@@ -0,0 +1,101 @@
+"""
+esc_transmitter.ESCTransmitter writer thread, rate limit and TX statistics
+on a pty UART.
+"""
+import select
+import time
+
+import pytest
+
+from conftest import wait_for
+from esc_transmitter import PACKET_SIZE, ESCTransmitter, encode_packet
+
+
+def packet(ch1, ch2, ch3, ch4):
+    return bytes(encode_packet(bytearray(PACKET_SIZE), ch1, ch2, ch3, ch4))
+
+
+def read_packets(pty_port, timeout=0.2):
+    """
+    Everything the transmitter wrote until the line is idle for `timeout`, split into packets.
+    """
+    data = b""
+    while select.select([pty_port.master], [], [], timeout)[0]:
+        data += pty_port.read()
+    assert len(data) % PACKET_SIZE == 0
+    return [data[i:i + PACKET_SIZE] for i in range(0, len(data), PACKET_SIZE)]
+
+
+@pytest.fixture
+def transmitter(pty_port):
+    esc = ESCTransmitter(port=pty_port.path, max_rate_hz=20)
+    yield esc
+    esc.close()
+
+
+def test_send_is_written_by_the_writer_thread(pty_port, transmitter):
+    transmitter.send(0, 64, 128, 255)
+    assert transmitter.flush()
+    assert read_packets(pty_port) == [packet(0, 64, 128, 255)]
+    assert (transmitter.commands, transmitter.packets, transmitter.bytes) == (1, 1, PACKET_SIZE)
+    assert transmitter.coalesced == 0 and transmitter.errors == 0
+    assert transmitter.summary().startswith("1 commands, 1 packets (6 bytes), 0 coalesced, 0 errors")
+
+    with pytest.raises(ValueError):
+        transmitter.send(0, 0, 0, 256)
+    assert transmitter.commands == 1
+
+
+def test_rate_limit_coalesces_to_newest_command(pty_port, transmitter):
+    start = time.monotonic()
+    for value in range(60):
+        transmitter.send(value, value, value, value)
+        time.sleep(0.005)
+    elapsed = time.monotonic() - start
+    assert transmitter.flush()
+
+    packets = read_packets(pty_port)
+    # 20 Hz over ~0.3 s: a handful of packets, never one per command
+    assert 2 <= len(packets) <= elapsed / 0.05 + 2
+    assert packets[-1] == packet(59, 59, 59, 59)
+    assert transmitter.packets == len(packets)
+    assert transmitter.coalesced == transmitter.commands - transmitter.packets == 60 - len(packets)
+    assert transmitter.bytes == PACKET_SIZE * len(packets)
+
+
+def test_send_never_waits_for_the_rate_limit(pty_port, transmitter):
+    transmitter.send(1, 1, 1, 1)
+    assert wait_for(lambda: transmitter.packets == 1)
+    start = time.monotonic()
+    for _ in range(100):
+        transmitter.send(2, 2, 2, 2)
+    assert time.monotonic() - start < 0.02
+    assert transmitter.flush()
+    assert read_packets(pty_port) == [packet(1, 1, 1, 1), packet(2, 2, 2, 2)]
+
+
+def test_close_sends_the_pending_command(pty_port):
+    esc = ESCTransmitter(port=pty_port.path, max_rate_hz=5)
+    esc.send(1, 2, 3, 4)
+    esc.send(5, 6, 7, 8)
+    esc.close()
+    assert read_packets(pty_port)[-1] == packet(5, 6, 7, 8)
+
+
+class FailingSerial:
+    def write(self, data):
+        raise IOError("line down")
+
+    def close(self):
+        pass
+
+
+def test_write_errors_are_counted():
+    esc = ESCTransmitter(ser=FailingSerial())
+    try:
+        esc.send(0, 0, 0, 0)
+        assert esc.flush()
+        assert esc.errors == 1 and esc.packets == 0
+        assert isinstance(esc.last_error, IOError)
+    finally:
+        esc.close()
@@ -0,0 +1,171 @@
+"""
+frame_sources backends: synthetic frames, .npy / video files and the
+Picamera2 request path against sim_hardware's fake camera.
+"""
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+import sim_hardware
+from camera_module import CameraModule
+from frame_sources import FileSource, Picamera2Source, SyntheticSource
+from pipeline import probe_frame_shape
+
+
+def test_synthetic_draws_the_disc_at_centre():
+    source = SyntheticSource(64, 48, count=3, radius=4, color=(255, 255, 255))
+    for i in range(3):
+        ret, frame = source.read()
+        assert ret and frame.shape == (48, 64, 3)
+        x, y = source.centre(i)
+        assert frame[y, x].tolist() == [255, 255, 255]
+        assert frame[0, 0].tolist() == source.background[0, 0].tolist()
+    # count reached
+    assert source.read() == (False, None)
+    assert source.stats.frames == 3
+
+
+def test_synthetic_fills_the_callers_buffer():
+    source = SyntheticSource(64, 48)
+    out = np.zeros((48, 64, 3), dtype=np.uint8)
+    ret, frame = source.read(out)
+    assert ret and frame is out
+    # A buffer of the wrong shape is not used
+    ret, frame = source.read(np.zeros((4, 4, 3), dtype=np.uint8))
+    assert ret and frame.shape == (48, 64, 3)
+
+
+def test_unsupported_pixel_format_is_rejected():
+    with pytest.raises(ValueError, match="pixel_format"):
+        SyntheticSource(64, 48, pixel_format="yuyv")
+
+
+def write_npy(path, count):
+    frames = np.stack([np.full((24, 32, 3), 10 * i, dtype=np.uint8) for i in range(count)])
+    np.save(path, frames)
+    return frames
+
+
+def test_npy_frames_in_order_then_end(tmp_path):
+    path = str(tmp_path / "frames.npy")
+    frames = write_npy(path, 3)
+    source = FileSource(path, loop=False)
+    assert (source.width, source.height) == (32, 24)
+    for expected in frames:
+        ret, frame = source.read()
+        assert ret
+        np.testing.assert_array_equal(frame, expected)
+    assert source.read() == (False, None)
+
+
+def test_npy_loops_and_copies_into_out(tmp_path):
+    path = str(tmp_path / "frames.npy")
+    frames = write_npy(path, 2)
+    source = FileSource(path)
+    out = np.empty((24, 32, 3), dtype=np.uint8)
+    for i in range(5):
+        ret, frame = source.read(out)
+        assert ret and frame is out
+        np.testing.assert_array_equal(frame, frames[i % 2])
+
+
+def test_npy_must_be_a_frame_stack(tmp_path):
+    path = str(tmp_path / "frame.npy")
+    np.save(path, np.zeros((24, 32, 3), dtype=np.uint8))
+    with pytest.raises(ValueError, match="expected"):
+        FileSource(path)
+
+
+def write_avi(path, count):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (32, 24))
+    for i in range(count):
+        writer.write(np.full((24, 32, 3), 40 * i, dtype=np.uint8))
+    writer.release()
+
+
+def test_video_file_frames_and_loop(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    write_avi(path, 4)
+
+    source = FileSource(path, loop=False)
+    assert (source.width, source.height) == (32, 24)
+    means = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        means.append(frame.mean())
+    source.release()
+    assert len(means) == 4
+    assert means == sorted(means) and means[-1] - means[0] > 100
+
+    source = FileSource(path)
+    assert all(source.read()[0] for _ in range(9))
+    source.release()
+
+
+def test_missing_video_file(tmp_path):
+    with pytest.raises(RuntimeError, match="Could not open"):
+        FileSource(str(tmp_path / "missing.avi"))
+
+
+def test_camera_module_file_backend(tmp_path):
+    path = str(tmp_path / "frames.npy")
+    frames = write_npy(path, 2)
+    camera = CameraModule(camera_index=path, backend="file")
+    try:
+        for i in range(3):
+            frame, _, seq = camera.get_frame_info()
+            np.testing.assert_array_equal(frame, frames[i % 2])
+            assert seq == i
+    finally:
+        camera.release()
+    assert probe_frame_shape(path) == (24, 32, 3)
+
+
+@pytest.fixture
+def fake_picamera2(monkeypatch):
+    # Undo the fake module after the test
+    monkeypatch.delitem(sys.modules, "picamera2", raising=False)
+    return sim_hardware.install_fake_picamera2()
+
+
+def test_picamera2_copies_each_request_once(fake_picamera2, monkeypatch):
+    camera = fake_picamera2.Picamera2(fps=None)
+    source = Picamera2Source(width=64, height=48, buffer_count=2, picam2=camera)
+    assert (source.width, source.height) == (64, 48) and camera.started
+
+    copies = []
+    copyto = np.copyto
+    monkeypatch.setattr(np, "copyto", lambda dst, src: copies.append(src) or copyto(dst, src))
+
+    out = np.empty((48, 64, 3), dtype=np.uint8)
+    for i in range(5):
+        ret, frame = source.read(out)
+        assert ret and frame is out
+        # One copy per request, out of a camera buffer and not into one
+        assert len(copies) == i + 1
+        assert not any(np.shares_memory(out, buffer) for buffer in camera._free)
+        x, y = camera._synthetic.centre(i)
+        assert frame[y, x].tolist() == list(camera._synthetic.color)
+    # Every request went back to the camera
+    assert camera.frames_captured == 5 and len(camera._free) == 2
+    assert source.stats.frames == 5
+
+    # Without `out` the frame is a fresh array, still copied once
+    ret, frame = source.read()
+    assert ret and len(copies) == 6
+    assert not any(np.shares_memory(frame, buffer) for buffer in camera._free)
+
+    source.release()
+    assert not camera.started and camera.closed
+
+
+def test_picamera2_yuv420(fake_picamera2):
+    source = Picamera2Source(width=64, height=48, pixel_format="yuv420",
+                             picam2=fake_picamera2.Picamera2(fps=None))
+    ret, frame = source.read()
+    assert ret and frame.shape == (72, 64)
+    source.release()
@@ -0,0 +1,60 @@
+"""
+governor.FrameBudgetGovernor ladder and RobotDetector warm-up after a scale change.
+"""
+import numpy as np
+
+from background_model import NumpyBackgroundModel
+from governor import FrameBudgetGovernor
+from robot_detection import RobotDetector
+
+
+def frames(count, width=160, height=120):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    return [base.copy() for _ in range(count)]
+
+
+def test_default_ladder_changes_scale_last():
+    scales = [scale for scale, _, _ in FrameBudgetGovernor.LEVELS]
+    assert scales == sorted(scales, reverse=True)
+    # Morphology and frame skipping are cut before the first scale change
+    first = scales.index(0.5)
+    before = FrameBudgetGovernor.LEVELS[:first]
+    assert any(morph == 1 for _, morph, _ in before)
+    assert any(skip for _, _, skip in before)
+
+
+def test_degrade_to_new_scale_warms_up_again():
+    detector = RobotDetector(min_area=50, warmup_frames=5)
+    governor = FrameBudgetGovernor(detector, budget=0.01, window=2, clock=lambda: 0.0)
+    stream = iter(frames(40))
+
+    warming = []
+    for _ in range(6):
+        detector.detect_robot(next(stream))
+        warming.append(detector.warming_up())
+    assert warming == [True] * 4 + [False] * 2
+
+    # Over budget: steps down until the scale changes
+    while detector.scale == 1.0:
+        governor.observe(0.02)
+        governor.observe(0.02)
+    detector.detect_robot(next(stream))
+    assert detector.warming_up()
+    for _ in range(4):
+        detector.detect_robot(next(stream))
+    assert not detector.warming_up()
+
+
+def test_restored_background_model_needs_no_warm_up(tmp_path):
+    model = NumpyBackgroundModel()
+    for frame in frames(3):
+        model.apply(frame)
+    path = str(tmp_path / "bg.npz")
+    model.save(path)
+    detector = RobotDetector(min_area=50, background_model=NumpyBackgroundModel.from_snapshot(path))
+    detector.detect_robot(frames(1)[0])
+    assert not detector.warming_up()
+    detector.set_quality(scale=0.5)
+    detector.detect_robot(frames(1)[0])
+    assert not detector.warming_up()
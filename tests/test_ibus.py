@@ -0,0 +1,186 @@
+"""
+IBUSReceiver background reader and RemoteControl failsafe on a pty UART.
+"""
+import threading
+import time
+
+from conftest import ibus_frame, wait_for
+from ibus import IBUSReceiver
+from remote_control import RemoteControl
+
+
+def test_reader_publishes_snapshot_with_timestamp_and_counter(pty_port):
+    ibus = IBUSReceiver(uart_port=pty_port.path, num_channels=6)
+    try:
+        assert ibus.get_snapshot().timestamp is None
+        assert ibus.signal_age() == float("inf")
+        ibus.start_reader()
+        before = time.monotonic()
+        pty_port.write(ibus_frame([1000, 1100, 1200, 1300, 1400, 1500]))
+        assert wait_for(lambda: ibus.get_snapshot().frame == 1)
+        snapshot = ibus.get_snapshot()
+        assert snapshot.channels == (1000, 1100, 1200, 1300, 1400, 1500)
+        assert before <= snapshot.timestamp <= time.monotonic()
+        assert ibus.signal_age() < 0.5
+        # The reader owns the port; polling is a no-op
+        assert ibus.update() is False
+    finally:
+        ibus.close()
+
+
+def test_reader_reassembles_split_frames_and_skips_corrupt_ones(pty_port):
+    ibus = IBUSReceiver(uart_port=pty_port.path, num_channels=6)
+    try:
+        ibus.start_reader()
+        frame = ibus_frame([1800] * 6)
+        corrupt = bytearray(ibus_frame([1200] * 6))
+        corrupt[10] ^= 0xFF
+        pty_port.write(b"\x00\x20" + bytes(corrupt) + frame[:7])
+        time.sleep(0.05)
+        pty_port.write(frame[7:])
+        assert wait_for(lambda: ibus.get_snapshot().frame == 1)
+        assert ibus.get_snapshot().channels == (1800,) * 6
+        assert ibus.frames_bad >= 1
+    finally:
+        ibus.close()
+
+
+def test_snapshots_never_mix_frames(pty_port):
+    ibus = IBUSReceiver(uart_port=pty_port.path, num_channels=6)
+    stop = threading.Event()
+
+    def transmit():
+        value = 1000
+        while not stop.is_set():
+            pty_port.write(ibus_frame([value] * 6))
+            value = 1000 + (value - 999) % 1000
+            time.sleep(0.0005)
+
+    thread = threading.Thread(target=transmit, daemon=True)
+    try:
+        ibus.start_reader()
+        thread.start()
+        assert wait_for(lambda: ibus.get_snapshot().frame > 0)
+        deadline = time.monotonic() + 0.3
+        seen = set()
+        while time.monotonic() < deadline:
+            snapshot = ibus.get_snapshot()
+            assert len(set(snapshot.channels)) == 1
+            seen.add(snapshot.frame)
+        assert len(seen) > 10
+    finally:
+        stop.set()
+        thread.join()
+        ibus.close()
+
+
+def test_failsafe_treats_missing_and_stale_data_as_kill(pty_port):
+    remote_control = RemoteControl(uart_port=pty_port.path, killswitch_channel=5,
+                                   threaded=True, failsafe_ms=50)
+    try:
+        # Nothing received yet
+        assert remote_control.is_signal_lost()
+        assert remote_control.get_killswitch()
+
+        pty_port.write(ibus_frame([1500, 1500, 1000, 1500, 2000, 1000]))
+        assert wait_for(lambda: not remote_control.get_killswitch())
+        assert remote_control.get_mode() == 1
+
+        # Signal stops: stale after failsafe_ms
+        assert wait_for(lambda: remote_control.get_killswitch(), timeout=0.5)
+        assert remote_control.signal_age() > 0.05
+
+        pty_port.write(ibus_frame([1500, 1500, 1000, 1500, 1000, 2000]))
+        assert wait_for(lambda: remote_control.ibus.get_snapshot().frame == 2)
+        # Fresh data, but the kill switch itself is on
+        assert remote_control.get_killswitch()
+    finally:
+        remote_control.close()
+
+
+def test_failsafe_disabled_never_kills_on_age(pty_port):
+    remote_control = RemoteControl(uart_port=pty_port.path, killswitch_channel=5)
+    try:
+        assert not remote_control.is_signal_lost()
+        assert not remote_control.get_killswitch()
+    finally:
+        remote_control.close()
+
+
+class IdlePort:
+    """
+    An open port that never delivers bytes: the tests below feed() directly.
+    """
+
+    is_open = True
+
+    def close(self):
+        pass
+
+
+NOISE = bytes(range(64, 64 + 45))
+
+
+def receiver():
+    return IBUSReceiver(num_channels=6, ser=IdlePort())
+
+
+def test_feed_reassembles_a_frame_split_across_calls():
+    ibus = receiver()
+    frame = ibus_frame([1100, 1200, 1300, 1400, 1500, 1600])
+    assert ibus.feed(NOISE + frame[:5]) is False
+    assert ibus.feed(frame[5:20]) is False
+    assert ibus.get_snapshot().frame == 0
+    assert ibus.feed(frame[20:]) is True
+    assert ibus.get_snapshot().channels == (1100, 1200, 1300, 1400, 1500, 1600)
+    assert (ibus.frames_ok, ibus.frames_bad) == (1, 0)
+    assert ibus.start == ibus.end == 0
+
+
+def test_feed_keeps_a_trailing_lone_header_byte():
+    ibus = receiver()
+    frame = ibus_frame([1700] * 6)
+    assert ibus.feed(NOISE + frame[:1]) is False
+    # Only the 0x20 survives, as the possible start of the next header
+    assert bytes(ibus.buffer[ibus.start:ibus.end]) == b"\x20"
+    assert ibus.feed(frame[1:]) is True
+    assert ibus.get_snapshot().channels == (1700,) * 6
+
+
+def test_bad_checksum_header_in_noise_resyncs_onto_the_real_frame():
+    ibus = receiver()
+    frame = ibus_frame([1300] * 6)
+    # A false header whose 32 bytes overlap the start of the real frame
+    assert ibus.feed(NOISE + b"\x20\x40" + b"\x01" * 5 + frame + NOISE) is True
+    assert (ibus.frames_ok, ibus.frames_bad) == (1, 1)
+    assert ibus.get_snapshot().channels == (1300,) * 6
+
+
+def test_only_the_newest_frame_of_a_backlog_is_decoded():
+    ibus = receiver()
+    data = b"".join(ibus_frame([1000 + i] * 6) for i in range(5))
+    assert ibus.feed(data) is True
+    assert ibus.frames_ok == 5 and ibus.get_snapshot().frame == 5
+    assert ibus.get_snapshot().channels == (1004,) * 6
+
+
+def test_compact_of_a_full_buffer_keeps_the_last_31_bytes():
+    ibus = receiver()
+    size = ibus.BUFFER_SIZE
+    ibus.buffer[:] = bytes(i % 251 for i in range(size))
+    ibus.start, ibus.end = 0, size
+    ibus._compact()
+    assert (ibus.start, ibus.end) == (0, ibus.IBUS_FRAME_SIZE - 1)
+    assert bytes(ibus.buffer[:31]) == bytes(i % 251 for i in range(size - 31, size))
+
+
+def test_feed_survives_more_noise_than_the_buffer_holds():
+    ibus = receiver()
+    frame = ibus_frame([1900] * 6)
+    # Three buffers of noise; the frame's first 5 bytes fill the third one
+    noise = (NOISE * ibus.BUFFER_SIZE)[:3 * ibus.BUFFER_SIZE - 5]
+    assert ibus.feed(noise + frame[:10]) is False
+    assert ibus.end - ibus.start < ibus.IBUS_FRAME_SIZE
+    assert ibus.feed(frame[10:]) is True
+    assert ibus.get_snapshot().channels == (1900,) * 6
+    assert ibus.frames_bad == 0
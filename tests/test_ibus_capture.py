@@ -0,0 +1,99 @@
+"""
+ibus_capture dropout statistics: from arrival times, never from byte gaps.
+"""
+import threading
+import time
+
+import numpy as np
+import serial
+
+from conftest import ibus_frame
+from ibus_capture import (FRAME_PERIOD, decode_capture, format_stats, load_capture,
+                          load_chunk_times, record_capture)
+
+NOISE = bytes(range(64, 64 + 45))
+
+
+def timed_stream(slots):
+    """
+    One read per 7 ms slot: `slots` holds the bytes that arrived in each
+    (b"" = silence). Returns (data, chunk_times).
+    """
+    data = b""
+    rows = []
+    for i, chunk in enumerate(slots):
+        data += chunk
+        if chunk:
+            rows.append((len(data), i * FRAME_PERIOD))
+    return data, np.array(rows, dtype=np.float64)
+
+
+def test_garbage_is_not_missing_frames():
+    frame = ibus_frame([1500] * 6)
+    slots = [frame] * 4 + [NOISE + frame] * 4 + [frame] * 4
+    data, chunk_times = timed_stream(slots)
+    stats = decode_capture(data, chunk_times=chunk_times).stats
+    assert stats["valid_frames"] == 12
+    assert stats["garbage_bytes"] == 4 * len(NOISE)
+    assert stats["dropouts"] == 0 and stats["missing_frames"] == 0
+
+
+def test_silence_counts_missing_frames():
+    frame = ibus_frame([1500] * 6)
+    slots = [frame] * 3 + [b""] * 5 + [frame] * 3 + [b""] + [NOISE + frame]
+    data, chunk_times = timed_stream(slots)
+    stats = decode_capture(data, chunk_times=chunk_times).stats
+    assert stats["valid_frames"] == 7
+    assert stats["dropouts"] == 2
+    assert stats["missing_frames"] == 6
+    assert stats["longest_dropout_frames"] == 5
+    assert "2 dropouts, 6 frames missing" in format_stats(stats)
+
+
+def test_batched_frames_after_a_read_stall_are_not_missing():
+    frame = ibus_frame([1500] * 6)
+    # A 50 ms stall: the seven frames sent meanwhile arrive in one read
+    chunk_times = np.array([(32, 0.0), (64, 0.007), (96, 0.014), (320, 0.064)])
+    stats = decode_capture(frame * 10, chunk_times=chunk_times).stats
+    assert stats["valid_frames"] == 10
+    assert stats["dropouts"] == 0 and stats["missing_frames"] == 0
+    assert stats["frame_loss"] == 0.0
+
+    # The same stall with two of the seven frames lost on the way
+    chunk_times = np.array([(32, 0.0), (64, 0.007), (96, 0.014), (256, 0.064)])
+    stats = decode_capture(frame * 8, chunk_times=chunk_times).stats
+    assert stats["dropouts"] == 1 and stats["missing_frames"] == 2
+
+
+def test_without_times_dropouts_are_unknown():
+    frame = ibus_frame([1500] * 6)
+    stats = decode_capture((frame + NOISE) * 5).stats
+    assert stats["valid_frames"] == 5
+    assert stats["missing_frames"] is None
+    assert format_stats(stats).endswith("dropouts unknown (no timestamps)")
+
+
+def test_record_capture_on_pty(pty_port, tmp_path):
+    period = 0.02
+    frame = ibus_frame([1200] * 6)
+
+    def transmit():
+        for i in range(16):
+            # A 100 ms silence: four frame slots with nothing on the line
+            if not 6 <= i < 10:
+                pty_port.write(frame)
+            time.sleep(period)
+
+    path = str(tmp_path / "capture.bin")
+    thread = threading.Thread(target=transmit)
+    with serial.Serial(pty_port.path, 115200, timeout=0.005) as ser:
+        thread.start()
+        size = record_capture(ser, path, 16 * period + 0.05)
+    thread.join()
+
+    assert size == 12 * len(frame)
+    capture = decode_capture(load_capture(path), frame_period=period,
+                             chunk_times=load_chunk_times(path))
+    assert capture.stats["valid_frames"] == 12
+    assert capture.stats["dropouts"] == 1
+    assert 3 <= capture.stats["missing_frames"] <= 5
@@ -0,0 +1,47 @@
+"""
+RobotDetector tracking through frames the motion gate skips.
+"""
+import cv2
+import numpy as np
+
+from motion_gate import MotionGate
+from robot_detection import RobotDetector
+
+
+def scene(x=None, width=320, height=240):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(60, 80, (height, width, 3), dtype=np.uint8)
+    if x is not None:
+        cv2.circle(frame, (x, height // 2), 15, (230, 230, 230), -1)
+    return frame
+
+
+def test_gate_hits_count_towards_track_velocity():
+    gate = MotionGate(refresh_interval=0)
+    detector = RobotDetector(min_area=100, track=True, motion_gate=gate)
+    # The gate lets every frame through until MOG2 has learned the empty arena
+    empty = scene()
+    for _ in range(30):
+        detector.detect_robot(empty)
+    assert not detector.warming_up()
+    assert gate.hits == 0
+
+    # The disc moves 6 px on every third frame; the two repeats are gate hits
+    x = 60
+    for step in range(8):
+        frame = scene(x)
+        first = detector.detect_robot(frame)
+        assert first is not None and abs(first[0] - x) <= 1
+        assert detector.skipped == 0
+        assert detector.detect_robot(frame) == first
+        assert detector.detect_robot(frame) == first
+        assert detector.skipped == 2 and detector.misses == 0
+        x += 6
+
+    assert gate.hits == 16
+    # 6 px over three frames, not over one
+    assert abs(detector.velocity[0] - 2.0) < 0.5
+    assert abs(detector.velocity[1]) < 0.5
+    # The ROI is predicted three frames ahead of the last box
+    x0, _, x1, _ = detector._tracking_roi(empty.shape)
+    assert abs((x0 + x1) / 2.0 - (x - 6 + 3 * 2.0)) <= 2
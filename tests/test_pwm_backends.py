@@ -0,0 +1,95 @@
+"""
+pwm_backends.SysfsPWMBackend against a fake sysfs tree (sim_hardware.FakeSysfsPWM).
+"""
+import os
+
+import pytest
+
+from conftest import wait_for
+from motor_control import MotorController
+from pwm_backends import SoftwarePWMBackend, SysfsPWMBackend
+from sim_hardware import FakePWM, FakeSysfsPWM
+
+CHANNELS = {18: (0, 0), 19: (0, 1)}
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    fake = FakeSysfsPWM(tmp_path)
+    yield fake
+    fake.stop()
+
+
+def test_open_channel_exports_and_sets_period(sysfs):
+    backend = SysfsPWMBackend(1000, channels=CHANNELS, root=sysfs.root)
+    channel = backend.open_channel(18)
+    assert sysfs.exports == [(0, 0)]
+    assert sysfs.read(0, 0, "period") == "1000000"
+    assert sysfs.read(0, 0, "duty_cycle") == "0"
+
+    channel.start(25)
+    assert sysfs.read(0, 0, "duty_cycle") == "250000"
+    assert sysfs.read(0, 0, "enable") == "1"
+    channel.ChangeDutyCycle(100)
+    assert sysfs.read(0, 0, "duty_cycle") == "1000000"
+    # A shorter value replaces the longer one entirely
+    channel.ChangeDutyCycle(5)
+    assert sysfs.read(0, 0, "duty_cycle") == "50000"
+    with pytest.raises(ValueError):
+        channel.ChangeDutyCycle(101)
+
+    channel.stop()
+    assert sysfs.read(0, 0, "enable") == "0"
+    backend.cleanup()
+    assert wait_for(lambda: sysfs.unexports == [(0, 0)])
+    assert wait_for(lambda: not os.path.isdir(os.path.join(sysfs.root, "pwmchip0", "pwm0")))
+
+
+def test_already_exported_channel_is_reused(sysfs):
+    first = SysfsPWMBackend(50, channels=CHANNELS, root=sysfs.root)
+    first.open_channel(19)
+    second = SysfsPWMBackend(50, channels=CHANNELS, root=sysfs.root)
+    second.open_channel(19)
+    assert sysfs.exports == [(0, 1)]
+    assert sysfs.read(0, 1, "period") == "20000000"
+    # Only the backend that exported a channel unexports it
+    second.cleanup()
+    first.cleanup()
+    assert wait_for(lambda: sysfs.unexports == [(0, 1)])
+
+
+def test_export_timeout(tmp_path):
+    fake = FakeSysfsPWM(tmp_path, respond=False)
+    try:
+        backend = SysfsPWMBackend(1000, channels=CHANNELS, root=fake.root, export_timeout=0.05)
+        with pytest.raises(IOError):
+            backend.open_channel(18)
+    finally:
+        fake.stop()
+
+
+def test_pins_without_hardware_channel_use_fallback(sysfs):
+    without = SysfsPWMBackend(1000, channels=CHANNELS, root=sysfs.root)
+    with pytest.raises(ValueError):
+        without.open_channel(17)
+
+    backend = SysfsPWMBackend(1000, channels=CHANNELS, root=sysfs.root,
+                              fallback=SoftwarePWMBackend(1000))
+    software = backend.open_channel(17)
+    assert isinstance(software, FakePWM)
+    assert software.frequency == 1000
+
+
+def test_motor_controller_on_hardware_spinner(sysfs):
+    backend = SysfsPWMBackend(1000, channels=CHANNELS, root=sysfs.root,
+                              fallback=SoftwarePWMBackend(1000))
+    motor_controller = MotorController([17, 27, 22, 23], 18, backend=backend)
+    motor_controller.start_spinner()
+    assert sysfs.read(0, 0, "duty_cycle") == "1000000"
+    assert sysfs.read(0, 0, "enable") == "1"
+    motor_controller.xdrive_move(0.0, 1.0, 0.0)
+    assert isinstance(motor_controller.motor_pwm[0], FakePWM)
+    assert motor_controller.motor_pwm[0].duty == 100
+    motor_controller.shutdown()
+    assert sysfs.read(0, 0, "duty_cycle") == "0"
+    assert wait_for(lambda: sysfs.unexports == [(0, 0)])
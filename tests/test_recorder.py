@@ -0,0 +1,110 @@
+"""
+Recorder sizing against the free disk space, and recording round trips
+through RecordingReader / ReplayFrameSource.
+"""
+import collections
+
+import numpy as np
+import pytest
+
+import recorder
+from recorder import (HEADER_SIZE, Recorder, RecordingReader, ReplayFrameSource,
+                      fit_capacity, is_recording, record_dtype)
+
+Usage = collections.namedtuple("Usage", ["total", "used", "free"])
+SHAPE = (480, 640, 3)
+
+
+def test_fit_capacity_keeps_requested_length_when_it_fits(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder.shutil, "disk_usage", lambda path: Usage(0, 0, 10 ** 12))
+    assert fit_capacity(str(tmp_path / "match.rec"), SHAPE, 900) == 900
+
+
+def test_fit_capacity_cuts_to_free_space_minus_reserve(tmp_path, monkeypatch):
+    record_size = record_dtype(SHAPE).itemsize
+    free = HEADER_SIZE + 100 * record_size + 1000
+    monkeypatch.setattr(recorder.shutil, "disk_usage", lambda path: Usage(0, 0, free))
+    assert fit_capacity(str(tmp_path / "match.rec"), SHAPE, 900, reserve=1000) == 100
+    assert fit_capacity(str(tmp_path / "match.rec"), SHAPE, 900, reserve=free) == 0
+
+
+def frame(i, shape=(24, 32, 3)):
+    """
+    A frame that differs per index and per column.
+    """
+    image = np.empty(shape, dtype=np.uint8)
+    image[...] = (10 * i + np.arange(shape[1]))[:, None] % 256
+    return image
+
+
+def record(path, count, capacity):
+    rec = Recorder(path, frame(0).shape, capacity=capacity)
+    written = [rec.append(frame(i), channels=[1000 + i] * 6,
+                          detection=(i, 2 * i) if i % 2 else None,
+                          frame_seq=100 + i, capture_time=10.0 + i, rc_time=20.0 + i,
+                          timestamp=30.0 + i)
+               for i in range(count)]
+    rec.close()
+    return rec, written
+
+
+def test_round_trip_through_reader(tmp_path):
+    path = str(tmp_path / "match.rec")
+    record(path, 5, capacity=8)
+    assert is_recording(path)
+
+    reader = RecordingReader(path)
+    try:
+        assert len(reader) == 5 and reader.capacity == 8
+        for i in range(5):
+            np.testing.assert_array_equal(reader.frames[i], frame(i))
+        telemetry = reader.telemetry()
+        assert telemetry["frame_seq"].tolist() == [100, 101, 102, 103, 104]
+        assert telemetry["timestamp"].tolist() == [30.0, 31.0, 32.0, 33.0, 34.0]
+        assert telemetry["capture_time"][3] == 13.0 and telemetry["rc_time"][3] == 23.0
+        assert telemetry["channels"][2].tolist() == [1002] * 6 + [0] * 8
+        assert telemetry["found"].tolist() == [0, 1, 0, 1, 0]
+        assert (telemetry["cx"][3], telemetry["cy"][3]) == (3, 6)
+    finally:
+        reader.close()
+
+
+def test_full_recording_keeps_the_first_records(tmp_path):
+    path = str(tmp_path / "match.rec")
+    rec, written = record(path, 6, capacity=4)
+    assert written == [True] * 4 + [False] * 2
+    assert rec.count == 4 and rec.dropped == 2
+    reader = RecordingReader(path)
+    try:
+        assert reader.telemetry()["frame_seq"].tolist() == [100, 101, 102, 103]
+    finally:
+        reader.close()
+
+
+def test_replay_in_order_and_wraps_when_looping(tmp_path):
+    path = str(tmp_path / "match.rec")
+    record(path, 3, capacity=3)
+
+    source = ReplayFrameSource(path)
+    try:
+        for i in range(3):
+            image, _, seq = source.get_frame_info()
+            np.testing.assert_array_equal(image, frame(i))
+            assert seq == i
+            assert source.get_record()["frame_seq"] == 100 + i
+        with pytest.raises(RuntimeError):
+            source.get_frame()
+    finally:
+        source.release()
+
+    source = ReplayFrameSource(path, loop=True)
+    try:
+        seqs = []
+        for i in range(7):
+            image, _, seq = source.get_frame_info()
+            np.testing.assert_array_equal(image, frame(i % 3))
+            seqs.append(seq)
+        # Sequence numbers keep increasing across the wrap
+        assert seqs == list(range(7))
+    finally:
+        source.release()
@@ -0,0 +1,122 @@
+"""
+safety.KillSwitchWatcher and main.apply_killswitch against a pty UART and
+fake GPIO.
+"""
+import time
+
+import pytest
+
+from conftest import ibus_frame, wait_for
+import main
+from motor_control import MotorController
+from remote_control import RemoteControl
+from safety import KillSwitchWatcher
+
+KILL_CHANNEL = 5
+FAILSAFE_MS = 100
+RELEASED = ibus_frame([1500, 1500, 1000, 1500, 1000, 1000])
+KILLED = ibus_frame([1500, 1500, 1000, 1500, 1000, 2000])
+
+
+@pytest.fixture
+def robot(pty_port):
+    remote_control = RemoteControl(uart_port=pty_port.path, killswitch_channel=KILL_CHANNEL,
+                                   failsafe_ms=FAILSAFE_MS)
+    motor_controller = MotorController([17, 27, 22, 23], 24)
+    watcher = KillSwitchWatcher(remote_control, motor_controller, realtime=False).start()
+    yield remote_control, motor_controller, watcher
+    watcher.stop()
+    remote_control.close()
+    motor_controller.shutdown()
+
+
+def run_ticks(pty_port, remote_control, motor_controller, seconds, frame=RELEASED):
+    """
+    Control ticks at 100 Hz with one RC frame written before each (frame=None: no signal).
+    """
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if frame is not None:
+            pty_port.write(frame)
+        time.sleep(0.01)
+        main.apply_killswitch(remote_control, motor_controller)
+
+
+def spinner_duty(motor_controller):
+    return motor_controller.last_duty[-1]
+
+
+def test_boot_trips_then_first_frame_starts_spinner(pty_port, robot):
+    remote_control, motor_controller, watcher = robot
+    # No RC frame yet: the watchdog trips and the loop keeps everything off
+    assert wait_for(lambda: watcher.tripped)
+    run_ticks(pty_port, remote_control, motor_controller, 0.05, frame=None)
+    assert spinner_duty(motor_controller) == 0
+
+    run_ticks(pty_port, remote_control, motor_controller, 0.2)
+    assert not watcher.tripped
+    assert not motor_controller.killed
+    assert spinner_duty(motor_controller) == 100
+
+
+def test_kill_switch_stops_outputs_within_bound(pty_port, robot):
+    remote_control, motor_controller, watcher = robot
+    run_ticks(pty_port, remote_control, motor_controller, 0.2)
+    motor_controller.xdrive_move(0.5, 0.5, 0.0)
+    assert any(motor_controller.last_duty)
+
+    t_write = time.monotonic()
+    pty_port.write(KILLED)
+    # No control tick runs: the watcher alone has to stop everything
+    assert wait_for(lambda: not any(motor_controller.last_duty), timeout=0.5)
+    assert watcher.last_trip_time - t_write < 0.05
+    assert watcher.trips[-1][1] == "killswitch"
+
+
+def test_kill_switch_release_restarts_spinner(pty_port, robot):
+    remote_control, motor_controller, watcher = robot
+    run_ticks(pty_port, remote_control, motor_controller, 0.2)
+    run_ticks(pty_port, remote_control, motor_controller, 0.1, frame=KILLED)
+    assert spinner_duty(motor_controller) == 0
+
+    run_ticks(pty_port, remote_control, motor_controller, 0.1)
+    assert spinner_duty(motor_controller) == 100
+
+
+def drop_signal(pty_port, remote_control, motor_controller, watcher):
+    run_ticks(pty_port, remote_control, motor_controller, 0.2)
+    assert spinner_duty(motor_controller) == 100
+
+    # RC link drops for longer than the failsafe
+    run_ticks(pty_port, remote_control, motor_controller, 2 * FAILSAFE_MS / 1000.0, frame=None)
+    assert watcher.trips[-1][1] == "signal lost"
+    assert spinner_duty(motor_controller) == 0
+
+
+def test_signal_dropout_latches_spinner_off_until_switch_cycled(pty_port, robot):
+    remote_control, motor_controller, watcher = robot
+    drop_signal(pty_port, remote_control, motor_controller, watcher)
+
+    # The link comes back with the kill switch released: still off
+    run_ticks(pty_port, remote_control, motor_controller, 0.1)
+    assert watcher.tripped and watcher.latched
+    assert not remote_control.get_killswitch()
+    assert main.apply_killswitch(remote_control, motor_controller)
+    assert spinner_duty(motor_controller) == 0
+
+    # Kill switch on, then off again
+    run_ticks(pty_port, remote_control, motor_controller, 0.05, frame=KILLED)
+    assert not watcher.latched and spinner_duty(motor_controller) == 0
+    run_ticks(pty_port, remote_control, motor_controller, 0.1)
+    assert not watcher.tripped
+    assert spinner_duty(motor_controller) == 100
+
+
+def test_signal_dropout_restores_spinner_without_latch(pty_port, robot):
+    remote_control, motor_controller, watcher = robot
+    watcher.latch_on_signal_loss = False
+    drop_signal(pty_port, remote_control, motor_controller, watcher)
+
+    run_ticks(pty_port, remote_control, motor_controller, 0.1)
+    assert not watcher.tripped and not watcher.latched
+    assert spinner_duty(motor_controller) == 100
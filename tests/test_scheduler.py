@@ -0,0 +1,86 @@
+"""
+RateScheduler on a fake clock: overrun accounting and no catch-up burst
+after a long tick.
+"""
+import pytest
+
+from scheduler import RateScheduler
+
+
+class FakeClock:
+    """
+    Manual time source; sleep() advances it and records the delay.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def scheduler(clock, rate_hz=100.0):
+    return RateScheduler(rate_hz, clock=clock, sleep=clock.sleep)
+
+
+def test_on_time_ticks_sleep_to_each_deadline():
+    clock = FakeClock()
+    sched = scheduler(clock)
+    deadlines = []
+    for _ in range(5):
+        deadlines.append(sched.wait())
+        clock.now += 0.004
+    assert deadlines == pytest.approx([0.0, 0.01, 0.02, 0.03, 0.04])
+    assert clock.sleeps == pytest.approx([0.006] * 4)
+    assert (sched.late_ticks, sched.overruns, sched.missed_ticks) == (0, 0, 0)
+
+
+def test_long_tick_counts_missed_deadlines():
+    clock = FakeClock()
+    sched = scheduler(clock)
+    sched.wait()
+    # One tick's work runs 35 ms, past the 10 and 20 ms deadlines
+    clock.now += 0.035
+    assert sched.wait() == pytest.approx(0.03)
+    assert sched.overruns == 1 and sched.missed_ticks == 2
+    assert sched.late_ticks == 1 and sched.max_lateness == pytest.approx(0.005)
+    assert sched.ticks == 2
+
+
+def test_no_catch_up_burst_after_an_overrun():
+    clock = FakeClock()
+    sched = scheduler(clock)
+    sched.wait()
+    clock.now += 0.035
+    sched.wait()
+    clock.sleeps.clear()
+
+    # The following ticks wait for their own deadlines, one period apart,
+    # instead of firing back to back for the skipped ones
+    deadlines = []
+    for _ in range(4):
+        deadlines.append(sched.wait())
+        clock.now += 0.001
+    assert deadlines == pytest.approx([0.04, 0.05, 0.06, 0.07])
+    assert clock.sleeps == pytest.approx([0.005, 0.009, 0.009, 0.009])
+    assert sched.overruns == 1 and sched.missed_ticks == 2 and sched.late_ticks == 1
+
+
+def test_tick_late_by_less_than_a_period_is_not_an_overrun():
+    clock = FakeClock()
+    sched = scheduler(clock)
+    sched.wait()
+    clock.now += 0.015
+    assert sched.wait() == pytest.approx(0.01)
+    assert sched.overruns == 0 and sched.missed_ticks == 0 and sched.late_ticks == 1
+    assert sched.wait() == pytest.approx(0.02)
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        RateScheduler(0)
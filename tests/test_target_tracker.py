@@ -0,0 +1,88 @@
+"""
+AlphaBetaTracker: prediction ahead of the last detection, coasting through
+dropouts and dropping the track after max_coast. Timestamps are explicit,
+so every test runs on its own clock.
+"""
+import pytest
+
+from target_tracker import AlphaBetaTracker
+
+PERIOD = 0.02
+
+
+def track(tracker, count, speed=(100.0, -50.0), start=(10.0, 300.0)):
+    """
+    Feed `count` detections of a target moving at constant `speed` (px/s);
+    returns the time of the last one.
+    """
+    for i in range(count):
+        t = i * PERIOD
+        tracker.update(start[0] + speed[0] * t, start[1] + speed[1] * t, t)
+    return (count - 1) * PERIOD
+
+
+def test_first_detection_is_taken_as_is():
+    tracker = AlphaBetaTracker()
+    assert not tracker.active and tracker.predict(0.0) is None
+    tracker.update(40, 30, 5.0)
+    assert tracker.active and tracker.updates == 1
+    assert tracker.predict(5.0) == (40.0, 30.0)
+    # No velocity yet: the prediction stays put
+    assert tracker.predict(5.1) == (40.0, 30.0)
+
+
+def test_predicts_ahead_along_the_velocity():
+    tracker = AlphaBetaTracker()
+    last = track(tracker, 50)
+    assert tracker.vx == pytest.approx(100.0, rel=1e-3)
+    assert tracker.vy == pytest.approx(-50.0, rel=1e-3)
+
+    x, y = tracker.predict(last + 0.1)
+    assert x == pytest.approx(10.0 + 100.0 * (last + 0.1), abs=0.1)
+    assert y == pytest.approx(300.0 - 50.0 * (last + 0.1), abs=0.1)
+
+
+def test_max_speed_clamps_the_velocity():
+    tracker = AlphaBetaTracker(max_speed=60.0)
+    track(tracker, 50, speed=(300.0, 400.0))
+    assert (tracker.vx, tracker.vy) == (pytest.approx(36.0), pytest.approx(48.0))
+
+
+def test_coasts_through_misses_then_drops_the_track():
+    tracker = AlphaBetaTracker(max_coast=0.25)
+    last = track(tracker, 50)
+
+    # Within max_coast: misses keep the track and predict() extrapolates
+    for i in range(1, 13):
+        tracker.miss(last + i * PERIOD)
+    assert tracker.active
+    x, _ = tracker.predict(last + 0.24)
+    assert x == pytest.approx(10.0 + 100.0 * (last + 0.24), abs=0.1)
+
+    # predict() gives up past max_coast even before the next miss
+    assert tracker.predict(last + 0.26) is None
+    tracker.miss(last + 0.26)
+    assert not tracker.active and tracker.updates == 0
+
+    # The next detection starts a new track from scratch
+    tracker.update(500, 20, last + 0.3)
+    assert tracker.predict(last + 0.4) == (500.0, 20.0)
+
+
+def test_detection_resets_the_coast():
+    tracker = AlphaBetaTracker(max_coast=0.25)
+    last = track(tracker, 10)
+    tracker.miss(last + 0.2)
+    tracker.update(10.0 + 100.0 * (last + 0.2), 300.0 - 50.0 * (last + 0.2), last + 0.2)
+    tracker.miss(last + 0.4)
+    assert tracker.active and tracker.predict(last + 0.4) is not None
+
+
+def test_reset_forgets_the_track():
+    tracker = AlphaBetaTracker()
+    last = track(tracker, 20)
+    tracker.reset()
+    assert not tracker.active and tracker.predict(last) is None
+    assert (tracker.vx, tracker.vy, tracker.updates) == (0.0, 0.0, 0)
+    tracker.update(7, 8, last + 1.0)
+    assert tracker.predict(last + 1.1) == (7.0, 8.0)
@@ -0,0 +1,69 @@
+"""
+telemetry log naming, disk sizing and pruning, and the detection seq in
+each record.
+"""
+import collections
+import os
+
+import recorder
+from telemetry import (HEADER_SIZE, RECORD, TelemetryLogger, fit_log_capacity, log_path,
+                       prune_logs, read_telemetry)
+
+Usage = collections.namedtuple("Usage", ["total", "used", "free"])
+
+
+def test_log_path_never_reuses_a_file(tmp_path):
+    pattern = str(tmp_path / "telemetry-%Y%m%d.bin")
+    first = log_path(pattern)
+    TelemetryLogger(capacity=4, path=first).close()
+    second = log_path(pattern)
+    TelemetryLogger(capacity=4, path=second).close()
+    assert second == first[:-len(".bin")] + "-1.bin"
+    assert log_path(pattern).endswith("-2.bin")
+
+
+def test_records_carry_the_detection_seq(tmp_path):
+    path = str(tmp_path / "t.bin")
+    telemetry = TelemetryLogger(capacity=4, path=path)
+    duties = [0.0] * 5
+    telemetry.log(1, False, [1500] * 6, (10, 20), duties, 0.0, seq=7)
+    telemetry.log(1, False, [1500] * 6, None, duties, 0.0)
+    telemetry.log(1, False, [1500] * 6, None, duties, 0.0, seq=8)
+    telemetry.close()
+
+    records = read_telemetry(path)
+    assert records["seq"].tolist() == [7, -1, 8]
+    assert records["found"].tolist() == [1, 0, 0]
+    assert (records["cx"][0], records["cy"][0]) == (10, 20)
+
+
+def test_fit_log_capacity_cuts_to_free_space_minus_reserve(tmp_path, monkeypatch):
+    path = str(tmp_path / "telemetry.bin")
+    free = HEADER_SIZE + 100 * RECORD.size + 1000
+    monkeypatch.setattr(recorder.shutil, "disk_usage", lambda path: Usage(0, 0, free))
+    assert fit_log_capacity(path, 30000, reserve=1000) == 100
+    assert fit_log_capacity(path, 50, reserve=1000) == 50
+    assert fit_log_capacity(path, 30000) == 0
+
+
+def test_prune_logs_keeps_the_newest(tmp_path):
+    pattern = str(tmp_path / "telemetry-%Y%m%d-%H%M%S.bin")
+    paths = []
+    for i, name in enumerate(["telemetry-20260101-120000.bin",
+                              "telemetry-20260101-120000-1.bin",
+                              "telemetry-20260102-080000.bin",
+                              "telemetry-20260103-090000.bin"]):
+        path = str(tmp_path / name)
+        TelemetryLogger(capacity=2, path=path).close()
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+    # Matches the pattern but is not a telemetry ring
+    other = tmp_path / "telemetry-notes.bin"
+    other.write_bytes(b"keep me")
+
+    assert sorted(prune_logs(pattern, keep=2)) == sorted(paths[:2])
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(p) for p in paths[2:]] + ["telemetry-notes.bin"])
+    assert prune_logs(pattern, keep=2) == []
+    assert sorted(prune_logs(pattern, keep=0)) == sorted(paths[2:])
+    assert other.read_bytes() == b"keep me"
@@ -0,0 +1,79 @@
+"""
+Tiled RobotDetector (workers > 1) must return exactly what the serial path does.
+"""
+import cv2
+import numpy as np
+import pytest
+
+from frame_sources import SyntheticSource
+from robot_detection import RobotDetector
+
+SHAPES = ((480, 640), (240, 320), (150, 200), (720, 1280))
+
+
+def random_mask(rng, height, width):
+    """
+    MOG2-like foreground mask (0 / 127 shadow / 255) with varied blob shapes:
+    discs, boxes, outlines, lines, arcs and speckle noise.
+    """
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(rng.integers(1, 40)):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        value = int(rng.choice([255, 255, 127]))
+        kind = rng.integers(0, 4)
+        if kind == 0:
+            cv2.circle(mask, (x, y), int(rng.integers(1, 60)), value, -1)
+        elif kind == 1:
+            corner = (x + int(rng.integers(-80, 80)), y + int(rng.integers(-80, 80)))
+            cv2.rectangle(mask, (x, y), corner, value, int(rng.choice([-1, 1, 2, 5])))
+        elif kind == 2:
+            end = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            cv2.line(mask, (x, y), end, value, int(rng.integers(1, 6)))
+        else:
+            axes = (int(rng.integers(5, 90)), int(rng.integers(5, 90)))
+            cv2.ellipse(mask, (x, y), axes, int(rng.integers(0, 180)), 0,
+                        int(rng.integers(90, 360)), value, int(rng.choice([-1, 3, 8])))
+    mask[rng.random((height, width)) < rng.choice([0.0, 0.01, 0.2])] = 255
+    return mask
+
+
+@pytest.mark.parametrize("method", ["contours", "components"])
+@pytest.mark.parametrize("iterations", [1, 2])
+def test_find_robot_matches_serial_on_random_masks(method, iterations):
+    rng = np.random.default_rng(1)
+    serial = RobotDetector(blob_method=method, morph_iterations=iterations)
+    tiled = [RobotDetector(blob_method=method, morph_iterations=iterations, workers=workers)
+             for workers in (2, 3, 4)]
+    try:
+        found = 0
+        for i in range(48):
+            fg = random_mask(rng, *SHAPES[i % len(SHAPES)])
+            min_area = float(rng.choice([1, 50, 500]))
+            expected = serial._find_robot(None, fg, min_area)
+            found += expected is not None
+            for detector in tiled:
+                assert detector._find_robot(None, fg, min_area) == expected, \
+                    (i, detector.workers)
+        assert found > 24
+    finally:
+        for detector in tiled:
+            detector.close()
+
+
+@pytest.mark.parametrize("config", [
+    dict(),
+    dict(track=True),
+    dict(scale=0.5, refine=True, track=True),
+    dict(blob_method="components", track=True),
+])
+def test_detect_robot_matches_serial(config):
+    source = SyntheticSource(320, 240, count=60)
+    frames = [source.read()[1] for _ in range(60)]
+    serial = RobotDetector(min_area=100, **config)
+    tiled = RobotDetector(min_area=100, workers=4, **config)
+    try:
+        results = [serial.detect_robot(frame) for frame in frames]
+        assert [tiled.detect_robot(frame) for frame in frames] == results
+        assert sum(result is not None for result in results) > 30
+    finally:
+        tiled.close()
@@ -0,0 +1,71 @@
+"""
+VisionWorker on a threaded CameraModule fed by a paced synthetic source.
+"""
+import time
+
+import pytest
+
+from camera_module import CameraModule
+from frame_sources import SyntheticSource
+from vision_worker import VisionWorker
+
+
+class RecordingDetector:
+    """
+    Stands in for RobotDetector: records every frame it is given.
+    """
+
+    def __init__(self):
+        self.frames = []
+
+    def detect_robot(self, frame):
+        self.frames.append(frame)
+        return None
+
+    def warming_up(self):
+        return False
+
+
+def test_worker_processes_each_frame_once():
+    camera = CameraModule(source=SyntheticSource(160, 120, fps=30), threaded=True)
+    detector = RecordingDetector()
+    worker = VisionWorker(camera, detector)
+    seqs = []
+    try:
+        worker.set_enabled(True)
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            result = worker.latest()
+            if result is not None and (not seqs or result.seq != seqs[-1]):
+                seqs.append(result.seq)
+            time.sleep(0.001)
+    finally:
+        worker.stop()
+        camera.release()
+
+    # About 15 frames at 30 fps; a worker that re-detects the newest frame
+    # would run hundreds of times
+    assert 5 <= worker.frames <= 20
+    assert len(detector.frames) == worker.frames
+    assert seqs == sorted(set(seqs))
+    assert worker.error is None
+
+
+def test_callback_error_is_reported():
+    camera = CameraModule(source=SyntheticSource(160, 120, fps=60), threaded=True)
+
+    def on_result(frame, result):
+        raise IOError("disk full")
+
+    worker = VisionWorker(camera, RecordingDetector(), on_result=on_result)
+    try:
+        worker.set_enabled(True)
+        deadline = time.monotonic() + 1.0
+        while worker.error is None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert isinstance(worker.error, IOError)
+        with pytest.raises(IOError):
+            worker.latest()
+    finally:
+        worker.stop()
+        camera.release()
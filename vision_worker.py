@@ -0,0 +1,96 @@
+# vision_worker.py
+import threading
+import time
+from collections import namedtuple
+from instrumentation import DISABLED
+
+# One detection: (cx, cy) or None, the (height, width) of the frame it came
+# from, the camera sequence number and capture time, when detection finished,
+# and whether the detector's background model was still warming up.
+VisionResult = namedtuple('VisionResult', ['detection', 'frame_shape', 'seq',
+                                           'capture_time', 'done_time', 'warming_up'])
+
+class VisionWorker:
+    """
+    Runs camera capture + RobotDetector on a background thread and publishes
+    the newest VisionResult. The control loop polls `latest()` and applies new
+    results when they appear, so slow detection never stretches a control tick.
+    OpenCV releases the GIL while it works, so this overlaps with the loop.
+    Each camera frame is processed at most once: when detection is faster
+    than the camera, the worker waits for the next frame (`newer_than`).
+    """
+
+    def __init__(self, camera, detector, profiler=None, on_result=None, governor=None):
+        """
+        :param camera: CameraModule (or anything with get_frame_info(newer_than=seq)).
+        :param detector: RobotDetector (detect_robot() and warming_up()).
+        :param profiler: instrumentation.Profiler for the capture/detect stages.
+        :param on_result: Optional callback(frame, result) run on the worker
+                          thread after each detection (e.g. a Recorder).
+        :param governor: Optional governor.FrameBudgetGovernor; skips frames and
+                         adjusts detector quality from the measured detection time.
+        """
+        self.camera = camera
+        self.detector = detector
+        self.profiler = profiler if profiler is not None else DISABLED
+        self.on_result = on_result
+        self.governor = governor
+        self.result = None
+        self.error = None
+        self.frames = 0
+        # Camera seq of the last frame taken (processed or skipped by the governor)
+        self.last_seq = None
+        self._enabled = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="vision", daemon=True)
+        self._thread.start()
+
+    def set_enabled(self, enabled):
+        """
+        Pause or resume detection (e.g. only run it in autonomous mode).
+        """
+        if enabled:
+            self._enabled.set()
+        else:
+            self._enabled.clear()
+
+    def _loop(self):
+        while self._running:
+            if not self._enabled.wait(timeout=0.1):
+                continue
+            try:
+                with self.profiler.stage("camera.get_frame"):
+                    frame, capture_time, seq = self.camera.get_frame_info(
+                        newer_than=self.last_seq)
+                self.last_seq = seq
+                if self.governor is not None and self.governor.should_skip():
+                    continue
+                t0 = time.perf_counter()
+                with self.profiler.stage("detector.detect_robot"):
+                    detection = self.detector.detect_robot(frame)
+                if self.governor is not None:
+                    self.governor.observe(time.perf_counter() - t0)
+                self.frames += 1
+                result = VisionResult(detection, frame.shape[:2], seq, capture_time,
+                                      time.monotonic(), self.detector.warming_up())
+                self.result = result
+                if self.on_result is not None:
+                    self.on_result(frame, result)
+            except Exception as e:
+                # Surface the failure to the control loop via latest()
+                self.error = e
+                self._running = False
+                break
+
+    def latest(self):
+        """
+        Newest VisionResult, or None before the first one.
+        Re-raises an error from the worker thread.
+        """
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=1.0)